@@ -8,8 +8,10 @@ import hashlib
 import base64
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from app.models.database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.database import AsyncSessionLocal, get_read_db
+from app.batch import current_batch
 from app.models.user import User
 import os
 
@@ -55,18 +57,15 @@ def verify_token(token: str) -> Optional[dict]:
     except JWTError:
         return None
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    """Obtener usuario actual desde el token"""
+async def authenticate_token(token: str, db: AsyncSession) -> User:
+    """Usuario al que pertenece un token válido"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    payload = verify_token(credentials.credentials)
+    payload = verify_token(token)
     if payload is None:
         raise credentials_exception
     
@@ -74,21 +73,42 @@ def get_current_user(
     if username is None:
         raise credentials_exception
     
-    user = db.query(User).filter(User.username == username).first()
+    result = await db.execute(select(User).where(User.username == username))
+    user = result.scalars().first()
     if user is None:
         raise credentials_exception
     
     return user
 
-def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_read_db)
+) -> User:
+    """Obtener usuario actual desde el token"""
+    # En las subpeticiones de /api/batch el usuario ya se autenticó en la petición principal
+    batch = current_batch()
+    if batch is not None:
+        return batch.user
+    return await authenticate_token(credentials.credentials, db)
+
+async def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
     """Obtener usuario activo actual"""
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
+async def get_stream_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> User:
+    """Usuario activo de una conexión de larga duración (SSE)"""
+    # Sesión propia que se cierra antes de emitir: la del dependency duraría toda la conexión
+    async with AsyncSessionLocal() as db:
+        user = await authenticate_token(credentials.credentials, db)
+    if not user.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return user
+
 def require_role(required_role: str):
     """Decorator para requerir un rol específico"""
-    def role_checker(current_user: User = Depends(get_current_active_user)):
+    async def role_checker(current_user: User = Depends(get_current_active_user)):
         if current_user.role.value != required_role and current_user.role.value != "admin":
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -0,0 +1,35 @@
+"""
+Contexto de las subpeticiones de /api/batch
+La petición agrupada autentica al usuario y abre una sesión de lectura una
+sola vez; mientras se ejecutan sus subpeticiones, las dependencies de
+autenticación y de sesión devuelven esos mismos objetos.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+
+class BatchContext:
+    """Usuario autenticado y sesión compartidos por las subpeticiones"""
+
+    def __init__(self, user, db):
+        self.user = user
+        self.db = db
+
+
+_current_batch: ContextVar[Optional[BatchContext]] = ContextVar("batch_context", default=None)
+
+
+def current_batch() -> Optional[BatchContext]:
+    """Contexto de la petición agrupada en curso (None fuera de /api/batch)"""
+    return _current_batch.get()
+
+
+@contextmanager
+def batch_scope(user, db):
+    """Compartir usuario y sesión con las subpeticiones ejecutadas dentro del bloque"""
+    token = _current_batch.set(BatchContext(user, db))
+    try:
+        yield
+    finally:
+        _current_batch.reset(token)
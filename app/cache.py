@@ -0,0 +1,193 @@
+"""
+Caché para respuestas GET
+Entradas con TTL por ruta en un almacén intercambiable (app.cache_backends),
+invalidación por etiquetas (nombres de tabla) al confirmar escrituras ORM,
+difundida a los demás workers, y coalescencia de fallos simultáneos
+(singleflight) dentro de cada worker.
+"""
+from functools import wraps
+from typing import Iterable
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.cache_backends import CacheBackend, create_backend
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "True").lower() == "true"
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1000"))
+# Almacén: memory (por worker), sqlite (compartido en el host) o redis (compartido entre hosts)
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory").lower()
+
+# Parámetros de los endpoints que no forman parte de la clave
+IGNORED_PARAMETERS = ("db", "current_user")
+
+
+class ResponseCache:
+    """Caché con TTL por entrada e invalidación por etiquetas sobre un almacén intercambiable"""
+
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+        self.in_flight = {}  # clave -> Future del cálculo en curso
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    async def _call(self, method, *args):
+        """Ejecutar una operación del almacén (en un hilo si hace E/S)"""
+        if self.backend.blocking:
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    async def get(self, key):
+        """Valor de la clave o None si no existe o ha caducado"""
+        value = await self._call(self.backend.get, key)
+        # Los contadores se actualizan en el bucle de eventos, no en el hilo del almacén
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key, value, ttl: float, tags: Iterable[str], generations: dict = None):
+        """Guardar un valor (se descarta si sus etiquetas se invalidaron mientras se calculaba)"""
+        self.backend.set(key, value, ttl, tuple(tags), generations)
+
+    def generations(self, tags: Iterable[str]) -> dict:
+        return self.backend.generations(tags)
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        """Eliminar las entradas asociadas a las etiquetas"""
+        return self.backend.invalidate_tags(tags)
+
+    def clear(self):
+        self.backend.clear()
+
+    async def get_or_compute(self, key, ttl: float, tags: Iterable[str], compute):
+        """Devolver el valor cacheado o calcularlo una sola vez para todas las peticiones concurrentes"""
+        value = await self.get(key)
+        if value is not None:
+            return value
+
+        pending = self.in_flight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                # Si se canceló la petición que calculaba el valor, calcularlo aquí
+                if not pending.cancelled():
+                    raise
+                return await compute()
+
+        future = asyncio.get_running_loop().create_future()
+        self.in_flight[key] = future
+        try:
+            generations = await self._call(self.generations, tags)
+            value = await compute()
+            await self._call(self.set, key, value, ttl, tags, generations)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Evitar el aviso de excepción no recuperada si nadie esperaba
+            future.exception()
+            raise
+        finally:
+            del self.in_flight[key]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": CACHE_ENABLED,
+            **self.backend.stats(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "coalesced": self.coalesced,
+            "in_flight": len(self.in_flight),
+        }
+
+
+response_cache = ResponseCache(create_backend(CACHE_BACKEND, CACHE_MAX_ENTRIES))
+
+
+def cached(ttl: float, tags: Iterable[str]):
+    """Decorador para endpoints GET asíncronos: cachea el resultado por ruta y parámetros"""
+    tags = tuple(tags)
+
+    def decorator(endpoint):
+        @wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            if not CACHE_ENABLED:
+                return await endpoint(*args, **kwargs)
+            params = tuple(sorted((k, v) for k, v in kwargs.items() if k not in IGNORED_PARAMETERS))
+            key = (endpoint.__module__, endpoint.__name__, params)
+            return await response_cache.get_or_compute(key, ttl, tags, lambda: endpoint(*args, **kwargs))
+        return wrapper
+
+    return decorator
+
+
+# Funciones que reciben las tablas modificadas tras cada commit ORM
+write_listeners = []
+
+
+def on_tables_written(listener):
+    """Registrar una función a la que se pasan las tablas escritas en cada commit"""
+    write_listeners.append(listener)
+    return listener
+
+
+@event.listens_for(Session, "after_flush")
+def collect_written_tables(session, flush_context):
+    """Anotar las tablas modificadas en la transacción"""
+    written = session.info.setdefault("written_tables", set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        table = getattr(obj, "__tablename__", None)
+        if table:
+            written.add(table)
+
+
+@event.listens_for(Session, "after_commit")
+def invalidate_written_tables(session):
+    """Invalidar las entradas de las tablas modificadas al confirmar"""
+    written = session.info.pop("written_tables", None)
+    if written:
+        try:
+            removed = response_cache.invalidate_tags(written)
+            logger.debug(f"Cache invalidated for {sorted(written)}: {removed} entries")
+            response_cache.backend.publish(written)
+        except Exception:
+            # Un fallo del almacén no debe afectar a la escritura ya confirmada
+            logger.exception(f"Cache invalidation failed for {sorted(written)}")
+        notify_write_listeners(written)
+
+
+def notify_write_listeners(tables: set):
+    """Avisar a los listeners de las tablas escritas (en este worker o difundidas por otro)"""
+    for listener in write_listeners:
+        try:
+            listener(tables)
+        except Exception:
+            # Un fallo del listener no debe afectar a la escritura ya confirmada
+            logger.exception(f"Write listener {listener.__name__} failed")
+
+
+def start_invalidation_listener():
+    """Recibir las invalidaciones difundidas por los demás workers"""
+    response_cache.backend.start(notify_write_listeners)
+
+
+def stop_invalidation_listener():
+    response_cache.backend.stop()
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_written_tables(session):
+    session.info.pop("written_tables", None)
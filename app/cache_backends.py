@@ -0,0 +1,471 @@
+"""
+Almacenes de la caché de respuestas
+- memory: en el proceso (un solo worker)
+- sqlite: fichero SQLite compartido por los workers de un mismo host
+- redis: servidor Redis (o compatible con su protocolo) compartido entre hosts
+
+Los almacenes compartidos guardan los valores como JSON y difunden las
+invalidaciones a los demás workers (tabla de eventos en SQLite, pub/sub en
+Redis), que las reciben en un hilo y avisan a sus listeners locales.
+"""
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Iterable
+from fastapi.encoders import jsonable_encoder
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+CACHE_SQLITE_PATH = os.getenv("CACHE_SQLITE_PATH", "./cache.db")
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+CACHE_REDIS_PREFIX = os.getenv("CACHE_REDIS_PREFIX", "sgcn:cache:")
+# Cadencia con la que cada worker lee las invalidaciones de los demás (segundos, backend sqlite)
+CACHE_POLL_INTERVAL = float(os.getenv("CACHE_POLL_INTERVAL", "0.2"))
+
+
+def encode_key(key) -> str:
+    """Clave de texto estable para los almacenes compartidos"""
+    return hashlib.sha1(repr(key).encode()).hexdigest()
+
+
+def encode_value(value) -> str:
+    return json.dumps(jsonable_encoder(value), separators=(",", ":"))
+
+
+class CacheBackend(ABC):
+    """Interfaz de los almacenes: entradas con TTL, etiquetas y difusión de invalidaciones"""
+
+    name = "base"
+    # Las operaciones hacen E/S y se ejecutan fuera del bucle de eventos
+    blocking = False
+
+    def __init__(self):
+        # Identifica al proceso para ignorar sus propias invalidaciones difundidas
+        self.origin = uuid.uuid4().hex
+        self.invalidations = 0
+        self.received = 0
+
+    @abstractmethod
+    def get(self, key):
+        """Valor de la clave o None si no existe, ha caducado o se invalidó"""
+
+    @abstractmethod
+    def set(self, key, value, ttl: float, tags: Iterable[str], generations: dict = None):
+        """Guardar un valor (se descarta si sus etiquetas se invalidaron mientras se calculaba)"""
+
+    @abstractmethod
+    def generations(self, tags: Iterable[str]) -> dict:
+        """Generación actual de cada etiqueta (para descartar valores calculados antes de una invalidación)"""
+
+    @abstractmethod
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        """Eliminar las entradas asociadas a las etiquetas (visible para todos los workers)"""
+
+    @abstractmethod
+    def clear(self):
+        """Eliminar todas las entradas"""
+
+    def publish(self, tables: Iterable[str]):
+        """Difundir las tablas escritas a los demás workers"""
+
+    def start(self, on_invalidation: Callable[[set], None]):
+        """Empezar a recibir las invalidaciones de los demás workers"""
+
+    def stop(self):
+        pass
+
+    def stats(self) -> dict:
+        return {"backend": self.name, "invalidations": self.invalidations, "received": self.received}
+
+
+class MemoryBackend(CacheBackend):
+    """Caché LRU en el proceso; cada worker tiene la suya y no hay difusión"""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int):
+        super().__init__()
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # clave -> (expira, valor, etiquetas)
+        self.tag_keys = {}  # etiqueta -> claves
+        self.tag_generations = {}  # etiqueta -> número de invalidaciones
+        self.evictions = 0
+        self.expirations = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value, tags = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl: float, tags: Iterable[str], generations: dict = None):
+        with self._lock:
+            if generations and any(self.tag_generations.get(t, 0) != g for t, g in generations.items()):
+                return
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = (time.monotonic() + ttl, value, tuple(tags))
+            for tag in tags:
+                self.tag_keys.setdefault(tag, set()).add(key)
+            while len(self.entries) > self.max_entries:
+                oldest = next(iter(self.entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def generations(self, tags: Iterable[str]) -> dict:
+        with self._lock:
+            return {tag: self.tag_generations.get(tag, 0) for tag in tags}
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        removed = 0
+        with self._lock:
+            for tag in tags:
+                self.tag_generations[tag] = self.tag_generations.get(tag, 0) + 1
+                for key in list(self.tag_keys.get(tag, ())):
+                    self._remove(key)
+                    removed += 1
+            self.invalidations += removed
+        return removed
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.tag_keys.clear()
+
+    def _remove(self, key):
+        _, _, tags = self.entries.pop(key)
+        for tag in tags:
+            keys = self.tag_keys.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.tag_keys[tag]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                **super().stats(),
+                "entries": len(self.entries),
+                "max_entries": self.max_entries,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+class SQLiteBackend(CacheBackend):
+    """Caché en un fichero SQLite compartido por los workers del host"""
+
+    name = "sqlite"
+    blocking = True
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS cache_entries (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS ix_cache_entries_expires_at ON cache_entries (expires_at)",
+        "CREATE TABLE IF NOT EXISTS cache_tags (tag TEXT NOT NULL, key TEXT NOT NULL, PRIMARY KEY (tag, key))",
+        "CREATE TABLE IF NOT EXISTS cache_generations (tag TEXT PRIMARY KEY, generation INTEGER NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS cache_events ("
+        "seq INTEGER PRIMARY KEY AUTOINCREMENT, origin TEXT NOT NULL, tables TEXT NOT NULL, created_at REAL NOT NULL)",
+    )
+    # Eventos de invalidación que se conservan para los workers que se retrasen
+    EVENTS_KEPT = 1000
+
+    def __init__(self, path: str, max_entries: int, poll_interval: float = CACHE_POLL_INTERVAL):
+        super().__init__()
+        self.path = path
+        self.max_entries = max_entries
+        self.poll_interval = poll_interval
+        self.evictions = 0
+        self._local = threading.local()
+        self._thread = None
+        self._stopping = threading.Event()
+        with self._connect() as conn:
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Conexión del hilo actual (sqlite3 no comparte conexiones entre hilos)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _current_generations(self, conn, tags) -> dict:
+        tags = list(tags)
+        if not tags:
+            return {}
+        rows = conn.execute(
+            f"SELECT tag, generation FROM cache_generations WHERE tag IN ({','.join('?' * len(tags))})", tags
+        ).fetchall()
+        return {tag: 0 for tag in tags} | dict(rows)
+
+    def get(self, key):
+        row = self._connect().execute(
+            "SELECT value, expires_at FROM cache_entries WHERE key = ?", (encode_key(key),)
+        ).fetchone()
+        if row is None or row[1] <= time.time():
+            return None
+        return json.loads(row[0])
+
+    def set(self, key, value, ttl: float, tags: Iterable[str], generations: dict = None):
+        key = encode_key(key)
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Comprobar las generaciones dentro de la transacción que escribe la entrada
+            if generations and self._current_generations(conn, generations) != generations:
+                conn.execute("ROLLBACK")
+                return
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, encode_value(value), time.time() + ttl),
+            )
+            conn.executemany("INSERT OR IGNORE INTO cache_tags (tag, key) VALUES (?, ?)", [(t, key) for t in tags])
+            excess = conn.execute("SELECT count(*) FROM cache_entries").fetchone()[0] - self.max_entries
+            if excess > 0:
+                # Expulsar las entradas más próximas a caducar
+                evicted = conn.execute(
+                    "DELETE FROM cache_entries WHERE key IN "
+                    "(SELECT key FROM cache_entries ORDER BY expires_at LIMIT ?)", (excess,)
+                ).rowcount
+                conn.execute("DELETE FROM cache_tags WHERE key NOT IN (SELECT key FROM cache_entries)")
+                self.evictions += evicted
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def generations(self, tags: Iterable[str]) -> dict:
+        return self._current_generations(self._connect(), tags)
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        tags = list(tags)
+        if not tags:
+            return 0
+        marks = ",".join("?" * len(tags))
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT INTO cache_generations (tag, generation) VALUES (?, 1) "
+                "ON CONFLICT (tag) DO UPDATE SET generation = generation + 1", [(t,) for t in tags]
+            )
+            removed = conn.execute(
+                f"DELETE FROM cache_entries WHERE key IN (SELECT key FROM cache_tags WHERE tag IN ({marks}))", tags
+            ).rowcount
+            conn.execute(f"DELETE FROM cache_tags WHERE tag IN ({marks})", tags)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self.invalidations += removed
+        return removed
+
+    def clear(self):
+        conn = self._connect()
+        conn.execute("DELETE FROM cache_entries")
+        conn.execute("DELETE FROM cache_tags")
+
+    def publish(self, tables: Iterable[str]):
+        conn = self._connect()
+        seq = conn.execute(
+            "INSERT INTO cache_events (origin, tables, created_at) VALUES (?, ?, ?)",
+            (self.origin, json.dumps(sorted(tables)), time.time()),
+        ).lastrowid
+        if seq % 100 == 0:
+            conn.execute("DELETE FROM cache_events WHERE seq <= ?", (seq - self.EVENTS_KEPT,))
+
+    def start(self, on_invalidation: Callable[[set], None]):
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        last = self._connect().execute("SELECT coalesce(max(seq), 0) FROM cache_events").fetchone()[0]
+        self._thread = threading.Thread(
+            target=self._poll, args=(on_invalidation, last), name="cache-invalidations", daemon=True
+        )
+        self._thread.start()
+
+    def _poll(self, on_invalidation, last: int):
+        while not self._stopping.wait(self.poll_interval):
+            try:
+                rows = self._connect().execute(
+                    "SELECT seq, origin, tables FROM cache_events WHERE seq > ? ORDER BY seq", (last,)
+                ).fetchall()
+            except sqlite3.Error:
+                logger.exception("Reading cache invalidations failed")
+                continue
+            for seq, origin, tables in rows:
+                last = seq
+                if origin != self.origin:
+                    self.received += 1
+                    on_invalidation(set(json.loads(tables)))
+
+    def stop(self):
+        if self._thread is not None:
+            self._stopping.set()
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def stats(self) -> dict:
+        conn = self._connect()
+        return {
+            **super().stats(),
+            "path": self.path,
+            "entries": conn.execute("SELECT count(*) FROM cache_entries WHERE expires_at > ?", (time.time(),)).fetchone()[0],
+            "max_entries": self.max_entries,
+            "evictions": self.evictions,
+        }
+
+
+class RedisBackend(CacheBackend):
+    """Caché en Redis; las invalidaciones se difunden por pub/sub a todos los workers"""
+
+    name = "redis"
+    blocking = True
+
+    def __init__(self, url: str, prefix: str = CACHE_REDIS_PREFIX, client=None):
+        super().__init__()
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("CACHE_BACKEND=redis requires the redis package (pip install redis)")
+        self.watch_error = redis.WatchError
+        if client is None:
+            client = redis.Redis.from_url(url)
+        self.url = url
+        self.prefix = prefix
+        self.client = client
+        self.channel = f"{prefix}invalidations"
+        self._pubsub = None
+        self._thread = None
+
+    def _entry(self, key: str) -> str:
+        return f"{self.prefix}entry:{key}"
+
+    def _tag(self, tag: str) -> str:
+        return f"{self.prefix}tag:{tag}"
+
+    def _generation(self, tag: str) -> str:
+        return f"{self.prefix}gen:{tag}"
+
+    def get(self, key):
+        value = self.client.get(self._entry(encode_key(key)))
+        return None if value is None else json.loads(value)
+
+    def set(self, key, value, ttl: float, tags: Iterable[str], generations: dict = None):
+        tags = list(tags)
+        entry = self._entry(encode_key(key))
+        ttl_ms = max(1, int(ttl * 1000))
+        with self.client.pipeline() as pipe:
+            if generations:
+                # Transacción optimista: se anula si alguna etiqueta se invalida entretanto
+                keys = [self._generation(t) for t in generations]
+                pipe.watch(*keys)
+                if self._read_generations(pipe, list(generations)) != generations:
+                    pipe.reset()
+                    return
+                pipe.multi()
+            pipe.set(entry, encode_value(value), px=ttl_ms)
+            # Los índices de etiqueta no caducan: se vacían al invalidar la etiqueta
+            for tag in tags:
+                pipe.sadd(self._tag(tag), entry)
+            try:
+                pipe.execute()
+            except self.watch_error:
+                pass
+
+    def _read_generations(self, client, tags: list) -> dict:
+        if not tags:
+            return {}
+        values = client.mget([self._generation(t) for t in tags])
+        return {tag: int(value or 0) for tag, value in zip(tags, values)}
+
+    def generations(self, tags: Iterable[str]) -> dict:
+        return self._read_generations(self.client, list(tags))
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        tags = list(tags)
+        if not tags:
+            return 0
+        with self.client.pipeline(transaction=False) as pipe:
+            for tag in tags:
+                pipe.incr(self._generation(tag))
+                pipe.smembers(self._tag(tag))
+            results = pipe.execute()
+        entries = set().union(*results[1::2])
+        removed = self.client.delete(*entries) if entries else 0
+        self.client.delete(*[self._tag(t) for t in tags])
+        self.invalidations += removed
+        return removed
+
+    def clear(self):
+        keys = list(self.client.scan_iter(match=f"{self.prefix}entry:*"))
+        keys += list(self.client.scan_iter(match=f"{self.prefix}tag:*"))
+        if keys:
+            self.client.delete(*keys)
+
+    def publish(self, tables: Iterable[str]):
+        self.client.publish(self.channel, json.dumps({"origin": self.origin, "tables": sorted(tables)}))
+
+    def start(self, on_invalidation: Callable[[set], None]):
+        if self._thread is not None:
+            return
+        self._pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+
+        def handle(message):
+            data = json.loads(message["data"])
+            if data["origin"] != self.origin:
+                self.received += 1
+                on_invalidation(set(data["tables"]))
+
+        self._pubsub.subscribe(**{self.channel: handle})
+        self._thread = self._pubsub.run_in_thread(sleep_time=1, daemon=True, exception_handler=self._on_error)
+
+    def _on_error(self, error, pubsub, thread):
+        # Reintentar tras un corte de conexión; redis-py se resuscribe al reconectar
+        logger.warning(f"Cache invalidation subscriber error: {error!r}")
+        time.sleep(1)
+
+    def stop(self):
+        if self._thread is not None:
+            self._thread.stop()
+            self._thread.join(timeout=5)
+            self._pubsub.close()
+            self._thread = None
+            self._pubsub = None
+
+    def stats(self) -> dict:
+        return {
+            **super().stats(),
+            "url": self.url,
+            "prefix": self.prefix,
+            "entries": sum(1 for _ in self.client.scan_iter(match=f"{self.prefix}entry:*", count=1000)),
+        }
+
+
+def create_backend(name: str, max_entries: int) -> CacheBackend:
+    """Crear el almacén indicado por CACHE_BACKEND"""
+    if name == "memory":
+        return MemoryBackend(max_entries)
+    if name == "sqlite":
+        return SQLiteBackend(CACHE_SQLITE_PATH, max_entries)
+    if name == "redis":
+        return RedisBackend(CACHE_REDIS_URL)
+    raise ValueError(f"Unknown CACHE_BACKEND: {name} (use memory, sqlite or redis)")
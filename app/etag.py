@@ -0,0 +1,82 @@
+"""
+Peticiones GET condicionales (ETag / If-None-Match)
+El ETag de una lista o de un elemento se calcula con validadores baratos
+(número de filas, id máximo y últimas fechas de creación y edición) sin
+cargar ni serializar las filas. Si coincide con el que envía el cliente se
+responde 304.
+"""
+from typing import Optional, Sequence
+from fastapi import Request, Response
+from sqlalchemy import select, func
+import hashlib
+import os
+
+ETAG_ENABLED = os.getenv("ETAG_ENABLED", "True").lower() == "true"
+
+# Los clientes pueden guardar la respuesta pero deben revalidarla siempre
+CACHE_CONTROL = "private, no-cache"
+
+
+def modification_columns(model) -> list:
+    """Columnas de fecha que cambian al crear o editar una fila"""
+    return [getattr(model, name) for name in ("created_at", "updated_at") if hasattr(model, name)]
+
+
+def collection_validator_query(model, where: Sequence = ()):
+    """Número de filas, id máximo y últimas fechas de creación y edición de un conjunto filtrado"""
+    # Una subconsulta por agregado: así cada máximo se resuelve con su índice sin recorrer la tabla
+    aggregates = [func.count(), func.max(model.id), *[func.max(column) for column in modification_columns(model)]]
+    return select(*[
+        select(aggregate).select_from(model).where(*where).scalar_subquery() for aggregate in aggregates
+    ])
+
+
+def item_validator_query(model, item_id: int):
+    """Id y fechas de creación y edición de una fila (sin cargar el resto de columnas)"""
+    return select(model.id, *modification_columns(model)).where(model.id == item_id)
+
+
+def make_etag(request: Request, validators) -> str:
+    """ETag débil a partir de la ruta, los parámetros y los validadores"""
+    raw = repr((request.url.path, sorted(request.query_params.multi_items()), tuple(validators)))
+    return 'W/"%s"' % hashlib.sha1(raw.encode()).hexdigest()[:20]
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Comparación débil con la cabecera If-None-Match"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+
+def conditional_response(request: Request, response: Response, validators) -> Optional[Response]:
+    """Añadir el ETag a la respuesta; devuelve un 304 si el cliente ya tiene esa versión"""
+    etag = make_etag(request, validators)
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
+async def collection_etag(request: Request, response: Response, db, model, where: Sequence = ()) -> Optional[Response]:
+    """Validar una lista (AsyncSession); devuelve un 304 o None si hay que generarla"""
+    if not ETAG_ENABLED:
+        return None
+    row = (await db.execute(collection_validator_query(model, where))).one()
+    return conditional_response(request, response, row)
+
+
+async def item_etag(request: Request, response: Response, db, model, item_id: int) -> Optional[Response]:
+    """Validar un elemento (AsyncSession); devuelve un 304 o None si hay que cargarlo"""
+    if not ETAG_ENABLED:
+        return None
+    row = (await db.execute(item_validator_query(model, item_id))).first()
+    if row is None:
+        # El endpoint responde 404 al no encontrarlo
+        return None
+    return conditional_response(request, response, row)
@@ -0,0 +1,64 @@
+"""
+Listas con campos a elección (?fields=title,status,created_at)
+Solo se leen de la base de datos las columnas pedidas (selección Core, sin
+instanciar objetos ORM) y se serializan con un esquema reducido, de modo que
+la memoria, la E/S y el tamaño del JSON dependen de los campos solicitados y
+no de las columnas de texto largas que la vista no muestra.
+"""
+from functools import lru_cache
+from typing import Optional, Tuple
+from fastapi import HTTPException, status
+from pydantic import ConfigDict, create_model
+from sqlalchemy import select
+from sqlalchemy.orm import Bundle
+
+# Campos que se incluyen siempre (identifican la fila y construyen el cursor)
+REQUIRED_FIELDS = ("id",)
+
+
+@lru_cache(maxsize=256)
+def slim_schema(schema, fields: Tuple[str, ...]):
+    """Esquema con solo `fields` de `schema` (mismos tipos y valores por defecto)"""
+    definitions = {name: (schema.model_fields[name].annotation, schema.model_fields[name]) for name in fields}
+    return create_model(
+        f"{schema.__name__}Fields", __config__=ConfigDict(from_attributes=True), **definitions
+    )
+
+
+class FieldSet:
+    """Campos seleccionables de la lista de un modelo (los del esquema de respuesta)"""
+
+    def __init__(self, model, schema):
+        self.model = model
+        self.schema = schema
+
+    def parse(self, fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+        """
+        Campos pedidos en el orden del esquema, o None para la fila completa
+        Los nombres que no están en el esquema se rechazan con 400.
+        """
+        if not fields:
+            return None
+        requested = {name.strip() for name in fields.split(",") if name.strip()}
+        unknown = requested - set(self.schema.model_fields)
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+            )
+        requested.update(REQUIRED_FIELDS)
+        return tuple(name for name in self.schema.model_fields if name in requested)
+
+    def select(self, fields: Optional[Tuple[str, ...]]):
+        """SELECT de la fila completa o solo de las columnas pedidas"""
+        if fields is None:
+            return select(self.model)
+        columns = [getattr(self.model, name) for name in fields]
+        # El Bundle agrupa las columnas en un único elemento por fila, como la entidad
+        return select(Bundle(self.model.__tablename__, *columns))
+
+    def response_schema(self, fields: Optional[Tuple[str, ...]]):
+        """Esquema con el que se serializan las filas"""
+        if fields is None:
+            return self.schema
+        return slim_schema(self.schema, fields)
@@ -0,0 +1,218 @@
+"""
+Filtros y orden de las listas
+Cada router declara qué columnas se pueden filtrar y por cuáles se puede
+ordenar; los parámetros de la petición se traducen a expresiones de
+SQLAlchemy:
+- ?status=open,in_progress       valores (uno o varios) de una columna
+- ?created_at_from=2026-01-01    rango de fechas (desde, inclusive)
+- ?created_at_to=2026-03-31      rango de fechas (hasta; una fecha sin hora incluye ese día)
+- ?sort=-created_at              orden ("-" descendente), siempre desempatado por id
+Solo se admiten columnas con índice. Si ningún índice sirve a la vez los
+filtros y el orden (la base de datos tendría que ordenar todas las filas
+filtradas), la consulta se permite solo si el conjunto filtrado no supera
+LIST_UNINDEXED_MAX_ROWS filas; si lo supera se responde 400.
+"""
+from typing import Callable, Dict, List, Optional
+from fastapi import Depends, HTTPException, Request, status
+from sqlalchemy import DateTime, String, func, select, type_coerce
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.database import get_read_db
+from app.pagination import SortKey, dialect_name
+from datetime import datetime, timedelta, timezone
+import os
+
+# Filas que puede ordenar la base de datos sin un índice que sirva al orden
+LIST_UNINDEXED_MAX_ROWS = int(os.getenv("LIST_UNINDEXED_MAX_ROWS", "5000"))
+
+
+def bad_request(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
+def comparable(column, dialect: str):
+    """Columna tal como se compara (en SQLite las fechas se comparan como texto)"""
+    if dialect == "sqlite" and isinstance(column.type, DateTime):
+        return type_coerce(column, String)
+    return column
+
+
+def date_bound(value: datetime, dialect: str):
+    """Límite de un rango de fechas en el formato en que se compara la columna"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    # Mismo formato que guarda SQLite (sin microsegundos si son cero)
+    return value.isoformat(sep=" ") if dialect == "sqlite" else value
+
+
+class ValuesFilter:
+    """Igualdad con uno o varios valores (?name=a,b); `convert` valida cada valor"""
+
+    def __init__(self, column, convert: Callable = str):
+        self.column = column
+        self.convert = convert
+
+    def parse(self, name: str, raw: List[str]) -> list:
+        values = []
+        for value in (item.strip() for part in raw for item in part.split(",")):
+            if not value:
+                continue
+            try:
+                values.append(self.convert(value))
+            except ValueError:
+                raise bad_request(f"Invalid value for {name}: {value}")
+        return list(dict.fromkeys(values))
+
+
+class DateRangeFilter:
+    """Rango de fechas (?name_from=, ?name_to=)"""
+
+    def __init__(self, column):
+        self.column = column
+
+    @staticmethod
+    def parse_date(name: str, value: str) -> datetime:
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            raise bad_request(f"Invalid date for {name}: {value}")
+
+
+class ParsedQuery:
+    """Filtros y orden de una petición"""
+
+    def __init__(self, list_query: "ListQuery", where: list, equal: set, filtered: set, sort: SortKey):
+        self.list_query = list_query
+        self.where = where
+        self.equal = equal
+        self.filtered = filtered
+        self.sort = sort
+
+    @property
+    def indexed(self) -> bool:
+        """
+        Hay un índice cuyas primeras columnas son filtros de igualdad (un valor)
+        seguidas de la columna de orden, y ningún filtro queda fuera de él
+        """
+        sort_column = self.sort.column.name
+        for columns in self.list_query.indexes:
+            for position, name in enumerate(columns):
+                if name == sort_column:
+                    prefix = set(columns[:position])
+                    if prefix <= self.equal and self.filtered <= prefix | {sort_column}:
+                        return True
+                    break
+                if name not in self.equal:
+                    break
+        return False
+
+    async def check(self, db: AsyncSession, max_rows: int = LIST_UNINDEXED_MAX_ROWS):
+        """Rechazar (400) las combinaciones sin índice que filtran demasiadas filas"""
+        if self.indexed:
+            return
+        model = self.list_query.model
+        probe = select(model.id).where(*self.where).limit(max_rows + 1).subquery()
+        matched = (await db.execute(select(func.count()).select_from(probe))).scalar_one()
+        if matched > max_rows:
+            sorts = ", ".join(self.list_query.sorts)
+            raise bad_request(
+                f"No index supports sorting by {self.sort.name} with these filters and they match more than "
+                f"{max_rows} rows; narrow the filters or use a supported sort ({sorts})"
+            )
+
+
+class ListQuery:
+    """
+    Filtros y órdenes admitidos en la lista de un modelo
+    `aliases` mantiene los parámetros antiguos (status_filter=...) y
+    `path_filters` añade como igualdad los parámetros de la ruta (kpi_id).
+    """
+
+    def __init__(
+        self,
+        model,
+        filters: Dict[str, object],
+        sorts: Dict[str, object],
+        default_sort: str,
+        aliases: Optional[Dict[str, str]] = None,
+        path_filters: Optional[Dict[str, object]] = None,
+    ):
+        self.model = model
+        self.filters = filters
+        self.sorts = sorts
+        self.aliases = aliases or {}
+        self.path_filters = path_filters or {}
+        table = model.__table__
+        self.indexes = [tuple(column.name for column in index.columns) for index in table.indexes]
+        self.indexes.append(tuple(column.name for column in table.primary_key.columns))
+        self.sort_keys = {}
+        for name, column in sorts.items():
+            self.require_index(column, f"sort {name}")
+            self.sort_keys[name] = SortKey(name, column, model.id, descending=False)
+            self.sort_keys[f"-{name}"] = SortKey(name, column, model.id, descending=True)
+        for name, spec in filters.items():
+            self.require_index(spec.column, f"filter {name}")
+        self.default_sort = self.sort_keys[default_sort]
+
+    def require_index(self, column, what: str):
+        """Las columnas filtrables y ordenables deben encabezar algún índice"""
+        if not any(columns[0] == column.name for columns in self.indexes):
+            raise ValueError(f"{self.model.__tablename__}: {what} needs an index starting with {column.name}")
+
+    def values(self, request: Request, name: str) -> List[str]:
+        values = request.query_params.getlist(name)
+        for alias, target in self.aliases.items():
+            if target == name and not values:
+                values = request.query_params.getlist(alias)
+        return values
+
+    def parse(
+        self,
+        request: Request,
+        sort: Optional[str] = None,
+        db: AsyncSession = Depends(get_read_db),
+    ) -> ParsedQuery:
+        """Dependency: traduce los parámetros de la petición (400 si alguno no es válido)"""
+        dialect = dialect_name(db)
+        where, equal, filtered = [], set(), set()
+        for name, column in self.path_filters.items():
+            if name not in request.path_params:
+                continue
+            try:
+                where.append(column == int(request.path_params[name]))
+            except ValueError:
+                raise bad_request(f"Invalid value for {name}: {request.path_params[name]}")
+            equal.add(column.name)
+            filtered.add(column.name)
+        for name, spec in self.filters.items():
+            column = spec.column
+            if isinstance(spec, DateRangeFilter):
+                start, end = request.query_params.get(f"{name}_from"), request.query_params.get(f"{name}_to")
+                if start:
+                    where.append(comparable(column, dialect) >= date_bound(spec.parse_date(f"{name}_from", start), dialect))
+                    filtered.add(column.name)
+                if end:
+                    bound = spec.parse_date(f"{name}_to", end)
+                    if len(end) == 10:
+                        # Solo fecha: hasta el final de ese día
+                        where.append(comparable(column, dialect) < date_bound(bound + timedelta(days=1), dialect))
+                    else:
+                        where.append(comparable(column, dialect) <= date_bound(bound, dialect))
+                    filtered.add(column.name)
+                continue
+            values = spec.parse(name, self.values(request, name))
+            if not values:
+                continue
+            if len(values) == 1:
+                where.append(column == values[0])
+                equal.add(column.name)
+            else:
+                where.append(column.in_(values))
+            filtered.add(column.name)
+        if sort is None:
+            sort_key = self.default_sort
+        elif sort in self.sort_keys:
+            sort_key = self.sort_keys[sort]
+        else:
+            raise bad_request(f"Unsupported sort: {sort} (use {', '.join(self.sort_keys)})")
+        return ParsedQuery(self, where, equal, filtered, sort_key)
+
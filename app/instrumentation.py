@@ -0,0 +1,235 @@
+"""
+Instrumentación de consultas SQL por petición
+Cuenta y cronometra las sentencias ejecutadas durante cada petición HTTP
+y registra las consultas lentas con su plan de ejecución
+"""
+from collections import Counter
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import event
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger("app.slow_queries")
+
+# En modo desarrollo se avisa de sentencias repetidas (patrón N+1)
+DEBUG = os.getenv("DEBUG", "False").lower() == "true"
+QUERY_REPEAT_THRESHOLD = int(os.getenv("QUERY_REPEAT_THRESHOLD", "5"))
+
+# Consultas lentas (0 desactiva el registro)
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "200"))
+SLOW_QUERY_LOG_FILE = os.getenv("SLOW_QUERY_LOG_FILE", "")
+SLOW_QUERY_MAX_FINGERPRINTS = int(os.getenv("SLOW_QUERY_MAX_FINGERPRINTS", "500"))
+
+if SLOW_QUERY_LOG_FILE:
+    _handler = logging.FileHandler(SLOW_QUERY_LOG_FILE)
+    _handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+    slow_query_logger.addHandler(_handler)
+    slow_query_logger.setLevel(logging.INFO)
+
+# Marcadores de parámetros de sqlite (?), psycopg2 (%(name)s) y asyncpg ($1)
+_PARAM = r"(?:\?|%\(\w+\)s|\$\d+)"
+_PARAM_LIST = re.compile(rf"\(\s*{_PARAM}(?:\s*,\s*{_PARAM})+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+_current_stats: ContextVar[Optional["RequestQueryStats"]] = ContextVar("request_query_stats", default=None)
+
+
+def statement_shape(statement: str) -> str:
+    """Forma normalizada de una sentencia (listas IN de distinto tamaño se agrupan)"""
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    return _PARAM_LIST.sub("(?)", shape)
+
+
+def statement_fingerprint(shape: str) -> str:
+    """Identificador corto de una forma de sentencia"""
+    return hashlib.sha1(shape.encode()).hexdigest()[:12]
+
+
+def parameter_shape(parameters):
+    """Tipos de los parámetros enlazados, sin sus valores"""
+    if isinstance(parameters, dict):
+        return {name: type(value).__name__ for name, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+class RequestQueryStats:
+    """Consultas ejecutadas durante una petición"""
+
+    def __init__(self, route: str = None):
+        self.route = route
+        self.count = 0
+        self.duration = 0.0  # segundos
+        self.shapes = Counter()
+
+    def record(self, statement: str, elapsed: float):
+        self.count += 1
+        self.duration += elapsed
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated_shapes(self, threshold: int = QUERY_REPEAT_THRESHOLD) -> list:
+        """Sentencias que se repiten al menos `threshold` veces"""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+    def server_timing(self) -> str:
+        """Valor para la cabecera Server-Timing"""
+        return f'db;desc="{self.count} queries";dur={self.duration * 1000:.2f}'
+
+
+class SlowQueryLog:
+    """Registro de consultas lentas agrupadas por forma de sentencia"""
+
+    def __init__(self, threshold_ms: float, max_fingerprints: int):
+        self.threshold_ms = threshold_ms
+        self.max_fingerprints = max_fingerprints
+        self.entries = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold_ms > 0
+
+    def record(self, statement: str, parameters, elapsed_ms: float, route: str = None, plan: list = None):
+        """Registrar una consulta que superó el umbral"""
+        shape = statement_shape(statement)
+        fingerprint = statement_fingerprint(shape)
+        entry = {
+            "fingerprint": fingerprint,
+            "elapsed_ms": round(elapsed_ms, 2),
+            "route": route,
+            "parameter_shape": parameter_shape(parameters),
+            "statement": shape,
+            "plan": plan,
+        }
+        slow_query_logger.warning(json.dumps(entry, default=str))
+
+        with self._lock:
+            stats = self.entries.get(fingerprint)
+            if stats is None:
+                if len(self.entries) >= self.max_fingerprints:
+                    # Descartar la forma menos lenta para acotar la memoria
+                    fastest = min(self.entries, key=lambda k: self.entries[k]["max_ms"])
+                    del self.entries[fastest]
+                stats = self.entries[fingerprint] = {
+                    "fingerprint": fingerprint,
+                    "statement": shape,
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                }
+            stats["count"] += 1
+            stats["total_ms"] += elapsed_ms
+            if elapsed_ms >= stats["max_ms"]:
+                stats.update(
+                    max_ms=elapsed_ms,
+                    route=route,
+                    parameter_shape=entry["parameter_shape"],
+                    plan=plan,
+                    last_seen=datetime.utcnow().isoformat(),
+                )
+
+    def top(self, limit: int = 20) -> list:
+        """Formas de sentencia más lentas (por tiempo máximo)"""
+        with self._lock:
+            entries = sorted(self.entries.values(), key=lambda e: e["max_ms"], reverse=True)[:limit]
+            return [
+                {
+                    **entry,
+                    "total_ms": round(entry["total_ms"], 2),
+                    "max_ms": round(entry["max_ms"], 2),
+                    "avg_ms": round(entry["total_ms"] / entry["count"], 2),
+                } for entry in entries
+            ]
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+
+
+slow_query_log = SlowQueryLog(SLOW_QUERY_THRESHOLD_MS, SLOW_QUERY_MAX_FINGERPRINTS)
+
+
+EXPLAINABLE_STATEMENTS = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+
+def explain_statement(conn, statement: str, parameters) -> list:
+    """Capturar el plan de ejecución de una sentencia en la misma conexión"""
+    if not statement.lstrip().upper().startswith(EXPLAINABLE_STATEMENTS):
+        return None
+    sqlite = conn.dialect.name == "sqlite"
+    prefix = "EXPLAIN QUERY PLAN " if sqlite else "EXPLAIN "
+    conn.info["explaining"] = True
+    try:
+        if sqlite:
+            rows = conn.exec_driver_sql(prefix + statement, parameters).fetchall()
+            return [row[-1] for row in rows]
+        # En PostgreSQL un error abortaría la transacción en curso
+        with conn.begin_nested():
+            rows = conn.exec_driver_sql(prefix + statement, parameters).fetchall()
+        return [row[0] for row in rows]
+    except Exception as e:
+        return [f"EXPLAIN failed: {str(e)}"]
+    finally:
+        conn.info["explaining"] = False
+
+
+def start_request_stats(route: str = None):
+    """Iniciar la recolección para la petición actual"""
+    stats = RequestQueryStats(route)
+    token = _current_stats.set(stats)
+    return stats, token
+
+
+def stop_request_stats(token):
+    """Finalizar la recolección para la petición actual"""
+    _current_stats.reset(token)
+
+
+def get_request_stats() -> Optional[RequestQueryStats]:
+    """Estadísticas de la petición en curso (None fuera de una petición)"""
+    return _current_stats.get()
+
+
+def warn_repeated_queries(method: str, path: str, stats: RequestQueryStats):
+    """Avisar de posibles N+1 en modo desarrollo"""
+    for shape, n in stats.repeated_shapes():
+        logger.warning(f"Possible N+1: statement executed {n} times in {method} {path}: {shape[:200]}")
+
+
+def instrument_engine(bind):
+    """Registrar los hooks de cursor en un engine (para AsyncEngine usar .sync_engine)"""
+
+    @event.listens_for(bind, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if conn.info.get("explaining"):
+            return
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(bind, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if conn.info.get("explaining"):
+            return
+        elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.record(statement, elapsed)
+
+        elapsed_ms = elapsed * 1000
+        if slow_query_log.enabled and elapsed_ms >= slow_query_log.threshold_ms:
+            plan = None if executemany else explain_statement(conn, statement, parameters)
+            slow_query_log.record(statement, parameters, elapsed_ms, stats.route if stats else None, plan)
+
+    @event.listens_for(bind, "handle_error")
+    def handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and not conn.info.get("explaining") and conn.info.get("query_start_time"):
+            conn.info["query_start_time"].pop()
@@ -1,29 +1,64 @@
 """
 Aplicación principal del sistema SGCN-SGC
 """
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Depends, Request
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse
 from sqlalchemy.orm import Session
-from app.models.database import engine, Base
-from app.routers import auth, documents, incidents, non_conformities, audits, kpis, dashboard, notifications, business_continuity as bc_router
-from app.models import user, document, non_conformity, incident, audit, business_continuity, notification, kpi, change_control
+from app.models.database import engine, async_engine, read_engine, dispose_async_engines
+from app.instrumentation import DEBUG, instrument_engine, start_request_stats, stop_request_stats, warn_repeated_queries
+from app.routers import auth, documents, incidents, non_conformities, audits, kpis, dashboard, notifications, admin, batch, business_continuity as bc_router
+from app.migrate import migrate
+from app.services.alert_service import alert_evaluator
+from app.cache import start_invalidation_listener, stop_invalidation_listener
 import os
 
-# Crear las tablas de la base de datos
-Base.metadata.create_all(bind=engine)
+# Crear tablas e índices al arrancar (en producción usar python -m app.migrate)
+AUTO_MIGRATE = os.getenv("AUTO_MIGRATE", "False").lower() == "true"
 
-# Crear directorio de uploads
-os.makedirs("uploads/documents", exist_ok=True)
+# Instrumentar las consultas SQL de todos los engines
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+if read_engine is not async_engine:
+    instrument_engine(read_engine.sync_engine)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Ciclo de vida de la aplicación"""
+    if AUTO_MIGRATE:
+        migrate()
+    await alert_evaluator.start()
+    start_invalidation_listener()
+    yield
+    stop_invalidation_listener()
+    await alert_evaluator.stop()
+    await dispose_async_engines()
 
 # Inicializar FastAPI
 app = FastAPI(
     title="SGCN-SGC Prototype",
     description="Sistema Integrado de Gestión de Calidad y Continuidad del Negocio - Prototipo",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    # Respuestas JSON codificadas con orjson
+    default_response_class=ORJSONResponse
 )
 
+@app.middleware("http")
+async def query_instrumentation(request: Request, call_next):
+    """Exponer número y duración de las consultas SQL en la cabecera Server-Timing"""
+    stats, token = start_request_stats(f"{request.method} {request.url.path}")
+    try:
+        response = await call_next(request)
+    finally:
+        stop_request_stats(token)
+    response.headers["Server-Timing"] = stats.server_timing()
+    if DEBUG:
+        warn_repeated_queries(request.method, request.url.path, stats)
+    return response
+
 # Montar archivos estáticos
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 
@@ -40,6 +75,8 @@ app.include_router(kpis.router, prefix="/api")
 app.include_router(dashboard.router, prefix="/api")
 app.include_router(notifications.router, prefix="/api")
 app.include_router(bc_router.router, prefix="/api")
+app.include_router(admin.router, prefix="/api")
+app.include_router(batch.router, prefix="/api")
 
 @app.get("/", response_class=HTMLResponse)
 async def read_root(request: Request):
@@ -0,0 +1,60 @@
+"""
+Migración del esquema de la base de datos
+Crea las tablas e índices que falten. Se ejecuta de forma explícita antes de
+arrancar los workers (python -m app.migrate) o al inicio con AUTO_MIGRATE=True.
+"""
+from sqlalchemy import inspect
+from app.models.database import engine, Base
+from app.models import user, document, non_conformity, incident, audit, business_continuity, notification, kpi, change_control, counter, rollup, change_log
+from app.models.counter import EntityCounter
+from app.services.counter_service import reconcile
+from app.models.rollup import DailyRollup
+from app.services.rollup_service import backfill
+from app.models.change_log import ChangeLogEntry
+from app.services import change_service
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def migrate(bind=None) -> dict:
+    """Crear tablas e índices que no existan en la base de datos"""
+    bind = bind or engine
+    existing_tables = set(inspect(bind).get_table_names())
+    Base.metadata.create_all(bind=bind)
+
+    # create_all no añade índices nuevos a tablas que ya existían
+    inspector = inspect(bind)
+    created_indexes = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                index.create(bind=bind)
+                created_indexes.append(index.name)
+
+    result = {
+        "created_tables": [t.name for t in Base.metadata.sorted_tables if t.name not in existing_tables],
+        "created_indexes": created_indexes,
+    }
+
+    # Poblar los contadores la primera vez que se crea su tabla
+    if EntityCounter.__tablename__ in result["created_tables"]:
+        reconcile(bind)
+    # Y los agregados diarios, la primera vez que se crea la suya
+    if DailyRollup.__tablename__ in result["created_tables"]:
+        backfill(bind)
+    # Y el registro de cambios de la sincronización incremental
+    if ChangeLogEntry.__tablename__ in result["created_tables"]:
+        change_service.backfill(bind)
+    logger.info(f"Schema migrated: {result}")
+    return result
+
+
+if __name__ == "__main__":
+    result = migrate()
+    print(f"✅ Tablas creadas: {len(result['created_tables'])}, índices creados: {len(result['created_indexes'])}")
+    for name in result["created_tables"] + result["created_indexes"]:
+        print(f"   - {name}")
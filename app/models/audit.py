@@ -1,7 +1,7 @@
 """
 Modelo de Auditoría Interna (RF-06)
 """
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Enum, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Enum, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.models.database import Base
@@ -21,6 +21,16 @@ class AuditType(str, enum.Enum):
 
 class Audit(Base):
     __tablename__ = "audits"
+    __table_args__ = (
+        # Paginación por cursor: ORDER BY created_at, id
+        Index("ix_audits_created_at_id", "created_at", "id"),
+        Index("ix_audits_status_planned_start_date", "status", "planned_start_date"),
+        Index("ix_audits_audit_type_status", "audit_type", "status"),
+        # Filtros y órdenes de la lista (app/filters.py)
+        Index("ix_audits_status_created_at", "status", "created_at"),
+        Index("ix_audits_audit_type_created_at", "audit_type", "created_at"),
+        Index("ix_audits_auditor_lead_created_at", "auditor_lead", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(200), nullable=False)
@@ -51,7 +61,7 @@ class Audit(Base):
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), index=True)
     
     # Relaciones
     lead_auditor = relationship("User", foreign_keys=[auditor_lead])
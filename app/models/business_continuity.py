@@ -1,7 +1,7 @@
 """
 Modelos para Continuidad del Negocio (RF-04, RF-05)
 """
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Enum, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Enum, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.models.database import Base
@@ -21,11 +21,15 @@ class PlanStatus(str, enum.Enum):
 
 class BusinessContinuityPlan(Base):
     __tablename__ = "business_continuity_plans"
+    __table_args__ = (
+        # Paginación por cursor: ORDER BY created_at, id
+        Index("ix_business_continuity_plans_created_at_id", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(200), nullable=False)
     description = Column(Text)
-    status = Column(Enum(PlanStatus), default=PlanStatus.DRAFT)
+    status = Column(Enum(PlanStatus), default=PlanStatus.DRAFT, index=True)
     
     # Detalles del plan
     scope = Column(Text)  # Alcance del plan
@@ -52,11 +56,15 @@ class BusinessContinuityPlan(Base):
 
 class EmergencySimulation(Base):
     __tablename__ = "emergency_simulations"
+    __table_args__ = (
+        # Paginación por cursor: ORDER BY created_at, id
+        Index("ix_emergency_simulations_created_at_id", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(200), nullable=False)
     description = Column(Text)
-    status = Column(Enum(SimulationStatus), default=SimulationStatus.PLANNED)
+    status = Column(Enum(SimulationStatus), default=SimulationStatus.PLANNED, index=True)
     
     # Detalles de la simulación
     scenario = Column(Text)  # Escenario simulado
@@ -0,0 +1,33 @@
+"""
+Modelo del registro de cambios para la sincronización incremental
+Mantenido por los listeners de app.services.change_service
+"""
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Index
+from sqlalchemy.sql import func
+from app.models.database import Base
+
+class ChangeLogEntry(Base):
+    __tablename__ = "change_log"
+    # AUTOINCREMENT: SQLite no reutiliza la secuencia de una entrada borrada
+    __table_args__ = (
+        Index("ix_change_log_table_name_txid_seq", "table_name", "txid", "seq"),
+        Index("ix_change_log_table_name_row_id", "table_name", "row_id", unique=True),
+        {"sqlite_autoincrement": True},
+    )
+
+    # Secuencia monótona del cambio (el token de sincronización es la última entrada leída)
+    seq = Column(Integer, primary_key=True, autoincrement=True)
+    # Transacción que escribió la entrada (PostgreSQL; 0 en SQLite): las entradas
+    # se leen en orden (txid, seq) para respetar el orden de commit
+    txid = Column(BigInteger, nullable=False, server_default="0")
+    # Tabla y fila cambiadas; solo se guarda el último cambio de cada fila
+    table_name = Column(String(50), nullable=False)
+    row_id = Column(Integer, nullable=False)
+    # "upsert" (creada o modificada) o "delete" (tombstone)
+    op = Column(String(10), nullable=False)
+
+    # Timestamps
+    changed_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<ChangeLogEntry(seq={self.seq}, table_name='{self.table_name}', row_id={self.row_id}, op='{self.op}')>"
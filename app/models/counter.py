@@ -0,0 +1,22 @@
+"""
+Modelo de contadores agregados por entidad
+Mantenidos por los listeners de app.services.counter_service
+"""
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+from app.models.database import Base
+
+class EntityCounter(Base):
+    __tablename__ = "entity_counters"
+
+    # Nombre de la tabla, dimensión ("total", "status", "priority,status"...) y valor
+    entity = Column(String(50), primary_key=True)
+    dimension = Column(String(100), primary_key=True)
+    value = Column(String(100), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+    # Timestamps
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<EntityCounter(entity='{self.entity}', dimension='{self.dimension}', value='{self.value}', count={self.count})>"
@@ -1,21 +1,219 @@
 """
 Configuración de la base de datos
-En el prototipo usaremos SQLite para simplicidad
+La URL y el pool de conexiones se leen de variables de entorno.
+Por defecto se usa SQLite; en producción se recomienda PostgreSQL.
 """
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+from app.batch import current_batch
+import logging
 import os
+import time
 
-# Base de datos SQLite para el prototipo
-DATABASE_URL = "sqlite:///./sgcn_sgc.db"
+logger = logging.getLogger(__name__)
 
-engine = create_engine(
-    DATABASE_URL, 
-    connect_args={"check_same_thread": False}  # Solo para SQLite
-)
+# URL de la base de datos (SQLite por defecto para el prototipo)
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./sgcn_sgc.db")
+
+# Configuración del pool de conexiones
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))  # segundos esperando una conexión libre
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # segundos antes de reciclar una conexión
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "True").lower() == "true"
+DB_ECHO = os.getenv("DB_ECHO", "False").lower() == "true"
+
+# Réplica de lectura opcional (p. ej. sqlite:///file:replica.db?mode=ro&uri=true)
+READ_DATABASE_URL = os.getenv("READ_DATABASE_URL", "")
+READ_REPLICA_MAX_LAG = float(os.getenv("READ_REPLICA_MAX_LAG", "10"))  # segundos de retraso tolerados
+READ_REPLICA_LAG_CHECK_INTERVAL = float(os.getenv("READ_REPLICA_LAG_CHECK_INTERVAL", "5"))  # segundos
+
+# Perfil de PRAGMAs aplicado a cada conexión SQLite ("default" o "production")
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "default")
+
+SQLITE_PRAGMA_PROFILES = {
+    # Comportamiento original de SQLite (rollback journal)
+    "default": {},
+    # WAL permite lecturas concurrentes mientras se escribe
+    "production": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT", "5000")),  # milisegundos
+        "mmap_size": 268435456,  # 256 MB
+        "cache_size": -65536,  # 64 MB (valores negativos en KiB)
+        "temp_store": "MEMORY",
+    },
+}
+
+# Drivers asíncronos para el camino de lectura con AsyncSession
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def normalize_database_url(url: str) -> str:
+    """Normalizar la URL de conexión (p. ej. postgres:// usado por algunos proveedores)"""
+    if url.startswith("postgres://"):
+        url = "postgresql://" + url[len("postgres://"):]
+    if url.startswith("postgresql://"):
+        url = "postgresql+psycopg2://" + url[len("postgresql://"):]
+    return url
+
+
+def is_sqlite_memory(url: str) -> bool:
+    """Indica si la URL apunta a una base SQLite en memoria"""
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:")
+
+
+def to_async_url(url: str) -> str:
+    """Convertir la URL de conexión al driver asíncrono equivalente"""
+    parsed = make_url(normalize_database_url(url))
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for backend: {backend}")
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+def build_engine_kwargs(url: str, read_only: bool = False) -> dict:
+    """Construir los argumentos de create_engine según el motor de base de datos"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    kwargs = {"echo": DB_ECHO, "pool_pre_ping": DB_POOL_PRE_PING}
+
+    if backend == "sqlite":
+        kwargs["connect_args"] = {"check_same_thread": False}
+        # SQLite en memoria usa un pool propio de SQLAlchemy
+        if is_sqlite_memory(url):
+            return kwargs
+    elif parsed.get_driver_name() == "asyncpg":
+        server_settings = {"application_name": "sgcn-sgc"}
+        if read_only:
+            server_settings["default_transaction_read_only"] = "on"
+        kwargs["connect_args"] = {"server_settings": server_settings}
+    elif backend == "postgresql":
+        kwargs["connect_args"] = {"application_name": "sgcn-sgc"}
+        if read_only:
+            kwargs["connect_args"]["options"] = "-c default_transaction_read_only=on"
+
+    # SQLAlchemy usa QueuePool (o su variante asíncrona) para estos motores
+    kwargs.update(
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+    )
+    return kwargs
+
+
+def apply_sqlite_pragmas(bind, profile: str, read_only: bool = False):
+    """Registrar un hook que aplica los PRAGMAs del perfil en cada nueva conexión"""
+    if profile not in SQLITE_PRAGMA_PROFILES:
+        raise ValueError(f"Unknown SQLite profile: {profile}")
+    pragmas = dict(SQLITE_PRAGMA_PROFILES[profile])
+    if read_only:
+        # El modo de journal lo decide el primario; la réplica solo lee
+        pragmas.pop("journal_mode", None)
+        pragmas["query_only"] = "ON"
+    if not pragmas:
+        return
+
+    @event.listens_for(bind, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def create_db_engine(url: str = DATABASE_URL, sqlite_profile: str = SQLITE_PROFILE, **overrides):
+    """Crear engine a partir de la configuración"""
+    url = normalize_database_url(url)
+    kwargs = build_engine_kwargs(url)
+    kwargs.update(overrides)
+    bind = create_engine(url, **kwargs)
+    if bind.dialect.name == "sqlite" and not is_sqlite_memory(url):
+        apply_sqlite_pragmas(bind, sqlite_profile)
+    return bind
+
+
+def create_async_db_engine(
+    url: str = DATABASE_URL,
+    sqlite_profile: str = SQLITE_PROFILE,
+    read_only: bool = False,
+    **overrides
+):
+    """Crear AsyncEngine a partir de la configuración"""
+    url = to_async_url(url)
+    kwargs = build_engine_kwargs(url, read_only=read_only)
+    kwargs.update(overrides)
+    bind = create_async_engine(url, **kwargs)
+    if bind.dialect.name == "sqlite" and not is_sqlite_memory(url):
+        apply_sqlite_pragmas(bind.sync_engine, sqlite_profile, read_only=read_only)
+    return bind
+
+
+class ReplicaLagMonitor:
+    """Mide el retraso de la réplica de lectura y decide si puede usarse"""
+
+    def __init__(self, bind, max_lag: float, check_interval: float):
+        self.bind = bind
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.last_lag = None
+        self.last_check = 0.0
+        self.healthy = True
+
+    async def measure_lag(self) -> float:
+        """Retraso de la réplica en segundos (0 si el motor no lo expone)"""
+        if self.bind.dialect.name != "postgresql":
+            return 0.0
+        async with self.bind.connect() as conn:
+            lag = await conn.scalar(text(
+                "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+            ))
+        return float(lag or 0)
+
+    async def is_healthy(self) -> bool:
+        """Indica si el retraso está dentro del límite (medición cacheada)"""
+        now = time.monotonic()
+        if now - self.last_check < self.check_interval:
+            return self.healthy
+        self.last_check = now
+        try:
+            self.last_lag = await self.measure_lag()
+            self.healthy = self.last_lag <= self.max_lag
+        except Exception as e:
+            logger.warning(f"Read replica lag check failed: {str(e)}")
+            self.last_lag = None
+            self.healthy = False
+        if not self.healthy:
+            logger.warning(f"Read replica unavailable or lagging ({self.last_lag}s), using primary")
+        return self.healthy
+
+    def status(self) -> dict:
+        return {
+            "healthy": self.healthy,
+            "last_lag_seconds": self.last_lag,
+            "max_lag_seconds": self.max_lag,
+        }
+
+
+engine = create_db_engine(DATABASE_URL)
+async_engine = create_async_db_engine(DATABASE_URL)
+# Sin réplica configurada, las lecturas usan el primario
+read_engine = create_async_db_engine(READ_DATABASE_URL, read_only=True) if READ_DATABASE_URL else async_engine
+replica_monitor = ReplicaLagMonitor(read_engine, READ_REPLICA_MAX_LAG, READ_REPLICA_LAG_CHECK_INTERVAL)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+ReadSessionLocal = async_sessionmaker(bind=read_engine, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
 
@@ -27,3 +225,48 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    """Dependency para obtener una sesión asíncrona (rutas de solo lectura)"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def dispose_async_engines():
+    """Cerrar las conexiones asíncronas (los hilos de aiosqlite bloquean la salida del proceso)"""
+    if read_engine is not async_engine:
+        await read_engine.dispose()
+    await async_engine.dispose()
+
+async def get_read_db():
+    """Dependency para lecturas: usa la réplica si su retraso está dentro del límite"""
+    # Las subpeticiones de /api/batch comparten la sesión de la petición principal
+    batch = current_batch()
+    if batch is not None:
+        yield batch.db
+        return
+    session_factory = AsyncSessionLocal
+    if read_engine is not async_engine and await replica_monitor.is_healthy():
+        session_factory = ReadSessionLocal
+    async with session_factory() as db:
+        yield db
+
+def get_pool_status(bind=None) -> dict:
+    """Estadísticas del pool de conexiones en tiempo de ejecución"""
+    bind = bind or engine
+    pool = bind.pool
+    status = {
+        "dialect": bind.dialect.name,
+        "driver": bind.dialect.driver,
+        "pool_class": type(pool).__name__,
+    }
+    if bind.dialect.name == "sqlite":
+        status["sqlite_profile"] = SQLITE_PROFILE
+    if isinstance(pool, QueuePool):
+        status.update(
+            pool_size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+            max_overflow=pool._max_overflow,
+            timeout=pool.timeout(),
+        )
+    return status
@@ -1,7 +1,7 @@
 """
 Modelo de Documento para gestión de documentos (RF-01)
 """
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Enum, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Enum, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.models.database import Base
@@ -23,6 +23,14 @@ class DocumentType(str, enum.Enum):
 
 class Document(Base):
     __tablename__ = "documents"
+    __table_args__ = (
+        # Paginación por cursor: ORDER BY created_at, id
+        Index("ix_documents_created_at_id", "created_at", "id"),
+        Index("ix_documents_status_created_at", "status", "created_at"),
+        # Filtros y órdenes de la lista (app/filters.py)
+        Index("ix_documents_document_type_created_at", "document_type", "created_at"),
+        Index("ix_documents_created_by_created_at", "created_by", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(200), nullable=False)
@@ -41,7 +49,7 @@ class Document(Base):
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), index=True)
     reviewed_at = Column(DateTime(timezone=True))
     approved_at = Column(DateTime(timezone=True))
     effective_date = Column(DateTime(timezone=True))
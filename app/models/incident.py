@@ -1,7 +1,7 @@
 """
 Modelo de Incidente para gestión de incidentes (RF-03)
 """
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Enum, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Enum, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.models.database import Base
@@ -29,6 +29,18 @@ class IncidentType(str, enum.Enum):
 
 class Incident(Base):
     __tablename__ = "incidents"
+    __table_args__ = (
+        # Paginación por cursor: ORDER BY created_at, id
+        Index("ix_incidents_created_at_id", "created_at", "id"),
+        Index("ix_incidents_status_created_at", "status", "created_at"),
+        Index("ix_incidents_priority_status", "priority", "status"),
+        # Filtros y órdenes de la lista (app/filters.py)
+        Index("ix_incidents_priority_created_at", "priority", "created_at"),
+        Index("ix_incidents_incident_type_created_at", "incident_type", "created_at"),
+        Index("ix_incidents_assigned_to_created_at", "assigned_to", "created_at"),
+        Index("ix_incidents_reported_by_created_at", "reported_by", "created_at"),
+        Index("ix_incidents_occurred_at_id", "occurred_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(200), nullable=False)
@@ -61,7 +73,7 @@ class Incident(Base):
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), index=True)
     
     # Relaciones
     reporter = relationship("User", foreign_keys=[reported_by])
@@ -1,7 +1,7 @@
 """
 Modelo de KPIs y Métricas (RF-08)
 """
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Enum, ForeignKey, Float
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Enum, ForeignKey, Float, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.models.database import Base
@@ -24,11 +24,19 @@ class KPIMeasurementUnit(str, enum.Enum):
 
 class KPI(Base):
     __tablename__ = "kpis"
+    __table_args__ = (
+        # Paginación por cursor: ORDER BY created_at, id
+        Index("ix_kpis_created_at_id", "created_at", "id"),
+        # Filtros y órdenes de la lista (app/filters.py)
+        Index("ix_kpis_kpi_type_created_at", "kpi_type", "created_at"),
+        Index("ix_kpis_owner_created_at", "owner", "created_at"),
+        Index("ix_kpis_name_id", "name", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(200), nullable=False)
     description = Column(Text)
-    kpi_type = Column(Enum(KPIType), nullable=False)
+    kpi_type = Column(Enum(KPIType), nullable=False, index=True)
     measurement_unit = Column(Enum(KPIMeasurementUnit), nullable=False)
     
     # Valores objetivo
@@ -54,11 +62,15 @@ class KPI(Base):
 
 class KPIMeasurement(Base):
     __tablename__ = "kpi_measurements"
+    __table_args__ = (
+        # Mediciones de un KPI por fecha; el id desempata en la paginación por cursor
+        Index("ix_kpi_measurements_kpi_id_measurement_date_id", "kpi_id", "measurement_date", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     kpi_id = Column(Integer, ForeignKey("kpis.id"))
     measured_value = Column(Float, nullable=False)
-    measurement_date = Column(DateTime(timezone=True), nullable=False)
+    measurement_date = Column(DateTime(timezone=True), nullable=False, index=True)
     
     # Metadatos adicionales
     notes = Column(Text)
@@ -1,7 +1,7 @@
 """
 Modelo de No Conformidad (RF-02)
 """
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Enum, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Enum, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.models.database import Base
@@ -21,6 +21,17 @@ class NonConformitySeverity(str, enum.Enum):
 
 class NonConformity(Base):
     __tablename__ = "non_conformities"
+    __table_args__ = (
+        # Paginación por cursor: ORDER BY created_at, id
+        Index("ix_non_conformities_created_at_id", "created_at", "id"),
+        Index("ix_non_conformities_status_created_at", "status", "created_at"),
+        Index("ix_non_conformities_severity_status", "severity", "status"),
+        # Filtros y órdenes de la lista (app/filters.py)
+        Index("ix_non_conformities_severity_created_at", "severity", "created_at"),
+        Index("ix_non_conformities_assigned_to_created_at", "assigned_to", "created_at"),
+        Index("ix_non_conformities_reported_by_created_at", "reported_by", "created_at"),
+        Index("ix_non_conformities_detected_date_id", "detected_date", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(200), nullable=False)
@@ -47,7 +58,7 @@ class NonConformity(Base):
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), index=True)
     
     # Relaciones
     reporter = relationship("User", foreign_keys=[reported_by])
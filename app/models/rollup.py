@@ -0,0 +1,21 @@
+"""
+Modelo de agregados diarios de actividad
+Mantenidos por los listeners de app.services.rollup_service
+"""
+from sqlalchemy import Column, Integer, String, Date, DateTime
+from sqlalchemy.sql import func
+from app.models.database import Base
+
+class DailyRollup(Base):
+    __tablename__ = "daily_rollups"
+
+    # Métrica ("incidents_opened", "documents_approved"...) y día (UTC)
+    metric = Column(String(50), primary_key=True)
+    day = Column(Date, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+    # Timestamps
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<DailyRollup(metric='{self.metric}', day='{self.day}', count={self.count})>"
@@ -0,0 +1,125 @@
+"""
+Paginación por cursor (keyset)
+Las listas se ordenan por (columna de orden, id) y cada página continúa tras
+la última fila de la anterior, de modo que el coste de una página no depende
+de su profundidad y las inserciones concurrentes no desplazan filas entre
+páginas. El cursor de la página siguiente se devuelve en la cabecera
+X-Next-Cursor (y en Link rel="next"); skip (offset) se mantiene como modo
+heredado.
+"""
+from typing import Optional, Sequence
+from fastapi import HTTPException, Request, Response, status
+from sqlalchemy import DateTime, String, tuple_, type_coerce
+import base64
+import binascii
+import json
+from datetime import datetime
+
+DEFAULT_LIMIT = 100
+
+
+class SortKey:
+    """Orden estable de una lista: columna de orden y, para desempatar, el id"""
+
+    def __init__(self, name: str, column, id_column, descending: bool = True):
+        self.name = name
+        self.column = column
+        self.id_column = id_column
+        self.descending = descending
+
+    @property
+    def param(self) -> str:
+        """Valor de ?sort= (con "-" si es descendente); identifica el orden en el cursor"""
+        return f"-{self.name}" if self.descending else self.name
+
+    def expression(self, dialect: str):
+        """
+        Columna de orden tal como se compara en la base de datos
+        SQLite guarda las fechas como texto, con o sin microsegundos según se
+        escribieran desde Python o con CURRENT_TIMESTAMP; se comparan como texto
+        (el mismo orden que ORDER BY) para no saltar ni repetir filas.
+        """
+        if dialect == "sqlite" and isinstance(self.column.type, DateTime):
+            return type_coerce(self.column, String)
+        return self.column
+
+
+class PageParams:
+    """Parámetros de paginación de una lista"""
+
+    def __init__(self, limit: int, skip: int, cursor: Optional[str]):
+        self.limit = limit
+        self.skip = skip
+        self.cursor = cursor
+
+
+def get_page(limit: int = DEFAULT_LIMIT, skip: int = 0, cursor: str = None) -> PageParams:
+    """Dependency de paginación (?limit=&cursor=, o ?skip= en modo heredado)"""
+    if limit < 0 or skip < 0:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="limit and skip must not be negative")
+    if cursor and skip:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Use either cursor or skip, not both")
+    return PageParams(limit, skip, cursor or None)
+
+
+def encode_cursor(sort: SortKey, value, item_id: int) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps({"k": sort.param, "v": value, "id": item_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(sort: SortKey, cursor: str, dialect: str) -> tuple:
+    """Valores (orden, id) de la última fila de la página anterior"""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        value, item_id = data["v"], int(data["id"])
+        # El cursor de otro orden no identifica una posición en este
+        if data["k"] != sort.param:
+            raise ValueError(data["k"])
+        if isinstance(sort.column.type, DateTime) and dialect != "sqlite" and value is not None:
+            value = datetime.fromisoformat(value)
+    except (ValueError, KeyError, TypeError, binascii.Error):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return value, item_id
+
+
+def dialect_name(db) -> str:
+    return db.bind.dialect.name
+
+
+def paginate(query, sort: SortKey, page: PageParams, db):
+    """
+    Ordenar y limitar una consulta según la página pedida
+    Añade la columna de orden (etiquetada "sort_key") para construir el cursor
+    siguiente y pide una fila más para saber si hay otra página.
+    """
+    dialect = dialect_name(db)
+    key = sort.expression(dialect)
+    query = query.add_columns(key.label("sort_key"))
+    if sort.descending:
+        query = query.order_by(key.desc(), sort.id_column.desc())
+    else:
+        query = query.order_by(key.asc(), sort.id_column.asc())
+    if page.cursor:
+        value, item_id = decode_cursor(sort, page.cursor, dialect)
+        position = tuple_(key, sort.id_column)
+        query = query.where(position < (value, item_id) if sort.descending else position > (value, item_id))
+    elif page.skip:
+        query = query.offset(page.skip)
+    return query.limit(page.limit + 1)
+
+
+def page_items(rows: Sequence, sort: SortKey, page: PageParams, request: Request, response: Response) -> list:
+    """
+    Elementos de la página (filas de paginate) y cabeceras de la siguiente
+    El cursor se construye con la última fila devuelta, también en modo heredado.
+    """
+    items = [row[0] for row in rows[:page.limit]]
+    if len(rows) > page.limit and items:
+        last = rows[page.limit - 1]
+        cursor = encode_cursor(sort, last.sort_key, last[0].id)
+        response.headers["X-Next-Cursor"] = cursor
+        next_url = request.url.remove_query_params("skip").include_query_params(cursor=cursor)
+        response.headers["Link"] = f'<{next_url}>; rel="next"'
+    return items
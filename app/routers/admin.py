@@ -0,0 +1,66 @@
+"""
+Router de administración y diagnóstico
+"""
+from fastapi import APIRouter, Depends
+from app.models.user import User
+from app.models.database import async_engine, read_engine, replica_monitor, get_pool_status
+from app.auth import require_role
+from app.instrumentation import slow_query_log
+from app.cache import response_cache
+from app.routers.dashboard import dashboard_broadcaster
+from app.schemas import MessageResponse
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+@router.get("/slow-queries")
+async def get_slow_queries(
+    limit: int = 20,
+    current_user: User = Depends(require_role("admin"))
+):
+    """Obtener las formas de sentencia más lentas (solo admin)"""
+    return {
+        "threshold_ms": slow_query_log.threshold_ms,
+        "enabled": slow_query_log.enabled,
+        "queries": slow_query_log.top(limit)
+    }
+
+@router.delete("/slow-queries", response_model=MessageResponse)
+async def clear_slow_queries(
+    current_user: User = Depends(require_role("admin"))
+):
+    """Vaciar el registro de consultas lentas (solo admin)"""
+    slow_query_log.clear()
+    return MessageResponse(message="Slow query log cleared")
+
+@router.get("/db")
+async def get_database_stats(
+    current_user: User = Depends(require_role("admin"))
+):
+    """Obtener el estado de los pools de conexiones y de la réplica de lectura (solo admin)"""
+    status = get_pool_status()
+    status["async_pool"] = get_pool_status(async_engine)
+    if read_engine is not async_engine:
+        status["read_replica"] = {**get_pool_status(read_engine), **replica_monitor.status()}
+    return status
+
+@router.get("/cache")
+async def get_cache_stats(
+    current_user: User = Depends(require_role("admin"))
+):
+    """Obtener aciertos, fallos y expulsiones de la caché de respuestas (solo admin)"""
+    return response_cache.stats()
+
+@router.delete("/cache", response_model=MessageResponse)
+async def clear_cache(
+    current_user: User = Depends(require_role("admin"))
+):
+    """Vaciar la caché de respuestas (solo admin)"""
+    response_cache.clear()
+    return MessageResponse(message="Response cache cleared")
+
+@router.get("/streams")
+async def get_stream_stats(
+    current_user: User = Depends(require_role("admin"))
+):
+    """Obtener suscriptores, cálculos y eventos del stream del dashboard (solo admin)"""
+    return {"dashboard": dashboard_broadcaster.stats()}
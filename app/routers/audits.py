@@ -1,18 +1,45 @@
 """
 Router para gestión de auditorías internas (RF-06)
 """
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
-from app.models.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.database import get_db, get_read_db
 from app.models.user import User
-from app.models.audit import Audit
+from app.models.audit import Audit, AuditStatus, AuditType
 from app.schemas import AuditCreate, AuditUpdate, Audit as AuditSchema, MessageResponse
 from app.auth import get_current_active_user, require_role
+from app.cache import cached
+from app.etag import collection_etag, item_etag
+from app.export import export_response, get_export_format
+from app.fieldsets import FieldSet
+from app.filters import DateRangeFilter, ListQuery, ParsedQuery, ValuesFilter
+from app.pagination import PageParams, get_page, paginate, page_items
+from app.serialization import json_list_response
+from app.services.change_service import get_changes, get_limit
+from app.services.stats_service import grouped_stats, get_bucket
 from datetime import datetime
 
 router = APIRouter(prefix="/audits", tags=["audits"])
 
+# Filtros y órdenes de la lista (el orden es estable para la paginación por cursor)
+AUDIT_QUERY = ListQuery(
+    Audit,
+    filters={
+        "status": ValuesFilter(Audit.status, AuditStatus),
+        "audit_type": ValuesFilter(Audit.audit_type, AuditType),
+        "auditor_lead": ValuesFilter(Audit.auditor_lead, int),
+        "created_at": DateRangeFilter(Audit.created_at),
+    },
+    sorts={"created_at": Audit.created_at},
+    default_sort="-created_at",
+    aliases={"status_filter": "status", "type_filter": "audit_type"},
+)
+
+# Campos seleccionables con ?fields= (columnas del esquema de respuesta)
+AUDIT_FIELDS = FieldSet(Audit, AuditSchema)
+
 @router.post("/", response_model=AuditSchema)
 def create_audit(
     audit: AuditCreate,
@@ -39,33 +66,62 @@ def create_audit(
     return db_audit
 
 @router.get("/", response_model=List[AuditSchema])
-def get_audits(
-    skip: int = 0,
-    limit: int = 100,
-    status_filter: str = None,
-    type_filter: str = None,
+async def get_audits(
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(get_page),
+    fields: Optional[str] = None,
+    list_query: ParsedQuery = Depends(AUDIT_QUERY.parse),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Obtener lista de auditorías con filtros opcionales"""
-    query = db.query(Audit)
-    
-    if status_filter:
-        query = query.filter(Audit.status == status_filter)
-    if type_filter:
-        query = query.filter(Audit.audit_type == type_filter)
-    
-    audits = query.offset(skip).limit(limit).all()
-    return audits
+    selected = AUDIT_FIELDS.parse(fields)
+    await list_query.check(db)
+    not_modified = await collection_etag(request, response, db, Audit, list_query.where)
+    if not_modified:
+        return not_modified
+    
+    result = await db.execute(paginate(AUDIT_FIELDS.select(selected).where(*list_query.where), list_query.sort, page, db))
+    audits = page_items(result.all(), list_query.sort, page, request, response)
+    return json_list_response(AUDIT_FIELDS.response_schema(selected), audits, response)
+
+@router.get("/export")
+async def export_audits(
+    format: str = Depends(get_export_format),
+    fields: Optional[str] = None,
+    list_query: ParsedQuery = Depends(AUDIT_QUERY.parse),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Exportar todas las auditorías en streaming (?format=ndjson|csv)"""
+    selected = AUDIT_FIELDS.parse(fields)
+    query = AUDIT_FIELDS.select(selected).where(*list_query.where).order_by(Audit.id)
+    return export_response(db, query, AUDIT_FIELDS.response_schema(selected), format, "audits")
+
+@router.get("/changes")
+async def get_audits_changes(
+    since: Optional[str] = None,
+    limit: int = Depends(get_limit),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Cambios de las auditorías desde el token ?since= (altas y modificaciones, y tombstones de los borrados)"""
+    return await get_changes(db, Audit, AuditSchema, since, limit)
 
 @router.get("/{audit_id}", response_model=AuditSchema)
-def get_audit(
+async def get_audit(
     audit_id: int,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Obtener auditoría por ID"""
-    audit = db.query(Audit).filter(Audit.id == audit_id).first()
+    not_modified = await item_etag(request, response, db, Audit, audit_id)
+    if not_modified:
+        return not_modified
+    audit = await db.get(Audit, audit_id)
     if not audit:
         raise HTTPException(status_code=404, detail="Audit not found")
     return audit
@@ -91,7 +147,7 @@ def update_audit(
     if not can_edit:
         raise HTTPException(status_code=403, detail="Not enough permissions")
     
-    update_data = audit_update.dict(exclude_unset=True)
+    update_data = audit_update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(audit, field, value)
     
@@ -175,36 +231,23 @@ def cancel_audit(
     return audit
 
 @router.get("/stats/summary")
-def get_audit_stats(
+@cached(ttl=60, tags=(Audit.__tablename__,))
+async def get_audit_stats(
+    bucket: Optional[str] = Depends(get_bucket),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Obtener estadísticas de auditorías"""
-    total_audits = db.query(Audit).count()
-    planned_audits = db.query(Audit).filter(Audit.status == "planned").count()
-    in_progress_audits = db.query(Audit).filter(Audit.status == "in_progress").count()
-    completed_audits = db.query(Audit).filter(Audit.status == "completed").count()
-    cancelled_audits = db.query(Audit).filter(Audit.status == "cancelled").count()
-    
-    # Auditorías por tipo
-    internal_audits = db.query(Audit).filter(Audit.audit_type == "internal").count()
-    external_audits = db.query(Audit).filter(Audit.audit_type == "external").count()
-    follow_up_audits = db.query(Audit).filter(Audit.audit_type == "follow_up").count()
-    special_audits = db.query(Audit).filter(Audit.audit_type == "special").count()
-    
-    return {
-        "total_audits": total_audits,
-        "by_status": {
-            "planned": planned_audits,
-            "in_progress": in_progress_audits,
-            "completed": completed_audits,
-            "cancelled": cancelled_audits
-        },
-        "by_type": {
-            "internal": internal_audits,
-            "external": external_audits,
-            "follow_up": follow_up_audits,
-            "special": special_audits
-        }
+    """Obtener estadísticas de auditorías (por periodo con ?bucket=day|week|month)"""
+    dimensions = ("status", "audit_type")
+    stats = await grouped_stats(db, Audit, dimensions)
+    response = {
+        "total_audits": stats["total"],
+        "by_status": stats["status"],
+        "by_type": stats["audit_type"]
     }
-
+    if bucket:
+        response["by_period"] = {
+            "bucket": bucket,
+            **await grouped_stats(db, Audit, dimensions, bucket=bucket, date_column="planned_start_date")
+        }
+    return response
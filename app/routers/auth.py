@@ -74,7 +74,7 @@ def login_user(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = D
     return {
         "access_token": access_token,
         "token_type": "bearer",
-        "user": UserSchema.from_orm(user)
+        "user": UserSchema.model_validate(user)
     }
 
 @router.get("/me", response_model=UserSchema)
@@ -0,0 +1,132 @@
+"""
+Router para peticiones agrupadas
+Ejecuta varias peticiones GET de la API en una sola llamada HTTP: el usuario
+se autentica una vez y todas las subpeticiones comparten la sesión de lectura.
+"""
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.exceptions import HTTPException as StarletteHTTPException
+from app.models.database import get_read_db
+from app.models.user import User
+from app.schemas import BatchRequest, BatchRequestItem
+from app.auth import get_current_active_user
+from app.batch import batch_scope
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["batch"])
+
+BATCH_MAX_REQUESTS = int(os.getenv("BATCH_MAX_REQUESTS", "20"))
+
+# Rutas que no pueden agruparse (recursión y respuestas que no terminan)
+BATCH_EXCLUDED_PATHS = ("/api/batch", "/api/dashboard/stream")
+# Exportaciones en streaming: su cuerpo no cabe en una respuesta agrupada
+BATCH_EXCLUDED_SUFFIXES = ("/export",)
+
+# Cabeceras que una subpetición puede enviar y recibir
+FORWARDED_REQUEST_HEADERS = ("if-none-match",)
+RETURNED_RESPONSE_HEADERS = ("etag", "x-next-cursor")
+
+
+def validate_item(item: BatchRequestItem):
+    path = item.path.split("?", 1)[0]
+    if not path.startswith("/api/"):
+        raise HTTPException(status_code=400, detail=f"Invalid batch path: {item.path}")
+    path = path.rstrip("/")
+    if path in BATCH_EXCLUDED_PATHS or path.endswith(BATCH_EXCLUDED_SUFFIXES):
+        raise HTTPException(status_code=400, detail=f"Path cannot be batched: {item.path}")
+
+
+async def run_subrequest(request: Request, item: BatchRequestItem):
+    """Ejecutar una petición GET a través del router y devolver (estado, cabeceras, cuerpo)"""
+    path, _, query = item.path.partition("?")
+    headers = [(b"accept", b"application/json")]
+    if "authorization" in request.headers:
+        headers.append((b"authorization", request.headers["authorization"].encode()))
+    headers += [
+        (name.lower().encode(), value.encode())
+        for name, value in item.headers.items() if name.lower() in FORWARDED_REQUEST_HEADERS
+    ]
+    scope = {
+        **request.scope,
+        "method": "GET",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "headers": headers,
+        "path_params": {},
+    }
+    scope.pop("route", None)
+    scope.pop("endpoint", None)
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    response = {"status": 500, "headers": [], "body": b""}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = message.get("headers", [])
+        elif message["type"] == "http.response.body":
+            response["body"] += message.get("body", b"")
+
+    try:
+        await request.app.router(scope, receive, send)
+    except StarletteHTTPException as e:
+        # 404 y 405 del propio router (fuera de las rutas con manejador de excepciones)
+        return e.status_code, {}, json.dumps({"detail": e.detail}).encode()
+    except Exception:
+        logger.exception(f"Batch sub-request failed: GET {item.path}")
+        return 500, {}, json.dumps({"detail": "Internal Server Error"}).encode()
+
+    returned = {}
+    content_type = ""
+    for name, value in response["headers"]:
+        name = name.decode().lower()
+        if name in RETURNED_RESPONSE_HEADERS:
+            returned[name] = value.decode()
+        if name == "content-type":
+            content_type = value.decode()
+    body = response["body"]
+    if not body:
+        body = b"null"
+    elif "json" not in content_type:
+        body = json.dumps(body.decode(errors="replace")).encode()
+    return response["status"], returned, body
+
+
+@router.post("/batch")
+async def batch(
+    batch_request: BatchRequest,
+    request: Request,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Ejecutar varias peticiones GET en una sola llamada
+    Devuelve {"responses": [{"id", "status", "headers", "body"}]} en el orden recibido.
+    """
+    if len(batch_request.requests) > BATCH_MAX_REQUESTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many batched requests (max {BATCH_MAX_REQUESTS})"
+        )
+    for item in batch_request.requests:
+        validate_item(item)
+
+    # Una AsyncSession no admite sentencias simultáneas: las subpeticiones se ejecutan en orden
+    results = []
+    with batch_scope(current_user, db):
+        for item in batch_request.requests:
+            results.append((item, await run_subrequest(request, item)))
+
+    # Los cuerpos JSON se incrustan tal cual, sin decodificarlos y volver a codificarlos
+    parts = []
+    for item, (status_code, headers, body) in results:
+        meta = json.dumps({"id": item.id, "status": status_code, "headers": headers})
+        parts.append(meta[:-1].encode() + b',"body":' + body + b"}")
+    return Response(content=b'{"responses":[' + b",".join(parts) + b"]}", media_type="application/json")
@@ -1,19 +1,30 @@
 """
 Router para continuidad del negocio (RF-04, RF-05)
 """
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import select, func
 from sqlalchemy.orm import Session
-from app.models.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.database import get_db, get_read_db
 from app.models.user import User
 from app.models.business_continuity import BusinessContinuityPlan, EmergencySimulation
 from app.schemas import MessageResponse
 from app.auth import get_current_active_user, require_role
+from app.cache import cached
+from app.etag import collection_etag, item_etag
+from app.pagination import PageParams, SortKey, get_page, paginate, page_items
+from app.services.stats_service import grouped_stats, get_bucket
+from app.services.change_service import get_changes, get_limit
 from datetime import datetime
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field
 
 router = APIRouter(prefix="/business-continuity", tags=["business-continuity"])
 
+# Orden estable de las listas (paginación por cursor)
+PLAN_SORT = SortKey("created_at", BusinessContinuityPlan.created_at, BusinessContinuityPlan.id)
+SIMULATION_SORT = SortKey("created_at", EmergencySimulation.created_at, EmergencySimulation.id)
+
 # Esquemas para continuidad del negocio
 class BusinessContinuityPlanBase(BaseModel):
     title: str
@@ -57,6 +68,37 @@ class EmergencySimulationUpdate(BaseModel):
     duration_hours: int = None
     status: str = None
 
+# Filas de /changes: los mismos campos que el detalle del plan y la lista de simulaciones
+class BusinessContinuityPlanChange(BaseModel):
+    id: int
+    title: str
+    description: Optional[str] = None
+    scope: Optional[str] = None
+    objectives: Optional[str] = None
+    status: Optional[str] = None
+    rto_hours: Optional[int] = Field(None, validation_alias="recovery_time_objective")
+    rpo_hours: Optional[int] = Field(None, validation_alias="recovery_point_objective")
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    last_tested: Optional[datetime] = None
+    next_review: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+class EmergencySimulationChange(BaseModel):
+    id: int
+    title: str
+    description: Optional[str] = None
+    status: Optional[str] = None
+    scenario: Optional[str] = None
+    planned_date: Optional[datetime] = None
+    actual_date: Optional[datetime] = None
+    duration_hours: Optional[int] = None
+    success_rate: Optional[int] = None
+    created_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
 # Rutas para Planes de Continuidad
 @router.post("/plans/", response_model=dict)
 def create_business_continuity_plan(
@@ -89,14 +131,20 @@ def create_business_continuity_plan(
     }
 
 @router.get("/plans/", response_model=List[dict])
-def get_business_continuity_plans(
-    skip: int = 0,
-    limit: int = 100,
+async def get_business_continuity_plans(
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(get_page),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Obtener planes de continuidad del negocio"""
-    plans = db.query(BusinessContinuityPlan).offset(skip).limit(limit).all()
+    not_modified = await collection_etag(request, response, db, BusinessContinuityPlan)
+    if not_modified:
+        return not_modified
+    
+    result = await db.execute(paginate(select(BusinessContinuityPlan), PLAN_SORT, page, db))
+    plans = page_items(result.all(), PLAN_SORT, page, request, response)
     
     return [
         {
@@ -111,14 +159,29 @@ def get_business_continuity_plans(
         } for plan in plans
     ]
 
+@router.get("/plans/changes")
+async def get_business_continuity_plans_changes(
+    since: Optional[str] = None,
+    limit: int = Depends(get_limit),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Cambios de los planes de continuidad desde el token ?since= (altas y modificaciones)"""
+    return await get_changes(db, BusinessContinuityPlan, BusinessContinuityPlanChange, since, limit)
+
 @router.get("/plans/{plan_id}", response_model=dict)
-def get_business_continuity_plan(
+async def get_business_continuity_plan(
     plan_id: int,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Obtener plan de continuidad por ID"""
-    plan = db.query(BusinessContinuityPlan).filter(BusinessContinuityPlan.id == plan_id).first()
+    not_modified = await item_etag(request, response, db, BusinessContinuityPlan, plan_id)
+    if not_modified:
+        return not_modified
+    plan = await db.get(BusinessContinuityPlan, plan_id)
     if not plan:
         raise HTTPException(status_code=404, detail="Business continuity plan not found")
     
@@ -158,7 +221,7 @@ def update_business_continuity_plan(
     if not can_edit:
         raise HTTPException(status_code=403, detail="Not enough permissions")
     
-    update_data = plan_update.dict(exclude_unset=True)
+    update_data = plan_update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(plan, field, value)
     
@@ -207,20 +270,25 @@ def create_emergency_simulation(
     }
 
 @router.get("/simulations/", response_model=List[dict])
-def get_emergency_simulations(
-    skip: int = 0,
-    limit: int = 100,
+async def get_emergency_simulations(
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(get_page),
     status_filter: str = None,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Obtener simulaciones de emergencia"""
-    query = db.query(EmergencySimulation)
-    
+    filters = []
     if status_filter:
-        query = query.filter(EmergencySimulation.status == status_filter)
+        filters.append(EmergencySimulation.status == status_filter)
     
-    simulations = query.offset(skip).limit(limit).all()
+    not_modified = await collection_etag(request, response, db, EmergencySimulation, filters)
+    if not_modified:
+        return not_modified
+    
+    result = await db.execute(paginate(select(EmergencySimulation).where(*filters), SIMULATION_SORT, page, db))
+    simulations = page_items(result.all(), SIMULATION_SORT, page, request, response)
     
     return [
         {
@@ -237,6 +305,16 @@ def get_emergency_simulations(
         } for sim in simulations
     ]
 
+@router.get("/simulations/changes")
+async def get_emergency_simulations_changes(
+    since: Optional[str] = None,
+    limit: int = Depends(get_limit),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Cambios de las simulaciones de emergencia desde el token ?since= (altas y modificaciones)"""
+    return await get_changes(db, EmergencySimulation, EmergencySimulationChange, since, limit)
+
 @router.post("/simulations/{simulation_id}/start", response_model=dict)
 def start_emergency_simulation(
     simulation_id: int,
@@ -300,36 +378,39 @@ def complete_emergency_simulation(
     }
 
 @router.get("/stats/summary")
-def get_business_continuity_stats(
+@cached(ttl=60, tags=(BusinessContinuityPlan.__tablename__, EmergencySimulation.__tablename__))
+async def get_business_continuity_stats(
+    bucket: Optional[str] = Depends(get_bucket),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Obtener estadísticas de continuidad del negocio"""
-    # Planes de continuidad
-    total_plans = db.query(BusinessContinuityPlan).count()
-    active_plans = db.query(BusinessContinuityPlan).filter(BusinessContinuityPlan.status == "active").count()
-    tested_plans = db.query(BusinessContinuityPlan).filter(BusinessContinuityPlan.status == "tested").count()
-    
-    # Simulaciones
-    total_simulations = db.query(EmergencySimulation).count()
-    planned_simulations = db.query(EmergencySimulation).filter(EmergencySimulation.status == "planned").count()
-    completed_simulations = db.query(EmergencySimulation).filter(EmergencySimulation.status == "completed").count()
+    """Obtener estadísticas de continuidad del negocio (simulaciones por periodo con ?bucket=day|week|month)"""
+    plans = await grouped_stats(db, BusinessContinuityPlan, ("status",))
+    simulations = await grouped_stats(db, EmergencySimulation, ("status",))
     
     # Promedio de éxito de simulaciones
-    completed_sims = db.query(EmergencySimulation).filter(EmergencySimulation.status == "completed").all()
-    avg_success_rate = sum(sim.success_rate for sim in completed_sims) / len(completed_sims) if completed_sims else 0
+    avg_success_rate = await db.scalar(
+        select(func.avg(EmergencySimulation.success_rate)).where(EmergencySimulation.status == "completed")
+    ) or 0
     
-    return {
+    response = {
         "plans": {
-            "total": total_plans,
-            "active": active_plans,
-            "tested": tested_plans
+            "total": plans["total"],
+            "active": plans["status"]["active"],
+            "tested": plans["status"]["tested"],
+            "by_status": plans["status"]
         },
         "simulations": {
-            "total": total_simulations,
-            "planned": planned_simulations,
-            "completed": completed_simulations,
+            "total": simulations["total"],
+            "planned": simulations["status"]["planned"],
+            "completed": simulations["status"]["completed"],
+            "by_status": simulations["status"],
             "average_success_rate": round(avg_success_rate, 2)
         }
     }
-
+    if bucket:
+        response["by_period"] = {
+            "bucket": bucket,
+            **await grouped_stats(db, EmergencySimulation, ("status",), bucket=bucket, date_column="planned_date")
+        }
+    return response
@@ -1,9 +1,12 @@
 """
 Router para dashboard y estadísticas generales
 """
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from app.models.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, func, literal, cast, String, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.database import get_read_db
 from app.models.user import User
 from app.models.document import Document
 from app.models.incident import Incident
@@ -11,177 +14,159 @@ from app.models.non_conformity import NonConformity
 from app.models.audit import Audit
 from app.models.kpi import KPI
 from app.schemas import DashboardStats
-from app.auth import get_current_active_user
-from datetime import datetime, timedelta
+from app.auth import get_current_active_user, get_stream_user
+from app.cache import cached, on_tables_written
+from app.services.counter_service import get_counts
+from app.services.alert_service import alert_evaluator, compute_alerts
+from app.services.stream_service import Broadcaster
+from app.services.stats_service import get_bucket
+from app.services.rollup_service import ROLLUP_SOURCE_TABLES, get_trends
+from typing import Optional
+from datetime import date, datetime, timedelta
+import os
 
 router = APIRouter(prefix="/dashboard", tags=["dashboard"])
 
-@router.get("/stats", response_model=DashboardStats)
-def get_dashboard_stats(
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
-):
-    """Obtener estadísticas del dashboard"""
-    
-    # Documentos
-    total_documents = db.query(Document).count()
-    pending_documents = db.query(Document).filter(
-        Document.status.in_(["draft", "pending_review"])
-    ).count()
-    
-    # Incidentes
-    total_incidents = db.query(Incident).count()
-    open_incidents = db.query(Incident).filter(
-        Incident.status.in_(["open", "in_progress"])
-    ).count()
-    
-    # No conformidades
-    total_non_conformities = db.query(NonConformity).count()
-    open_non_conformities = db.query(NonConformity).filter(
-        NonConformity.status.in_(["open", "in_progress"])
-    ).count()
-    
-    # Auditorías
-    total_audits = db.query(Audit).count()
-    planned_audits = db.query(Audit).filter(Audit.status == "planned").count()
-    
-    # KPIs
-    total_kpis = db.query(KPI).count()
-    
-    # Actividades recientes (últimos 7 días)
+# Tablas cuyas escrituras invalidan las respuestas cacheadas del dashboard
+DASHBOARD_TAGS = (
+    Document.__tablename__, Incident.__tablename__, NonConformity.__tablename__,
+    Audit.__tablename__, KPI.__tablename__, User.__tablename__,
+)
+
+# Intervalo por defecto y máximo de /trends (días)
+TRENDS_DEFAULT_DAYS = 365
+TRENDS_MAX_DAYS = int(os.getenv("TRENDS_MAX_DAYS", "1096"))
+
+# Fuentes de la actividad reciente: (tipo, modelo, campo de detalle, usuario)
+ACTIVITY_SOURCES = [
+    ("document", Document, "status", Document.created_by),
+    ("incident", Incident, "priority", Incident.reported_by),
+    ("non_conformity", NonConformity, "severity", NonConformity.reported_by),
+]
+ACTIVITY_DETAILS = {activity_type: (model, detail) for activity_type, model, detail, _ in ACTIVITY_SOURCES}
+
+def recent_activity_query(since: datetime, per_type: int = 5, limit: int = 10):
+    """Actividad reciente de todas las fuentes con UNION ALL, ordenada y limitada en SQL"""
+    branches = []
+    for activity_type, model, detail, user_column in ACTIVITY_SOURCES:
+        # Cada rama usa el índice de created_at y aporta como máximo per_type filas
+        branch = select(
+            literal(activity_type).label("type"),
+            model.title.label("title"),
+            model.created_at.label("date"),
+            cast(getattr(model, detail), String).label("detail"),
+            func.coalesce(User.full_name, "Unknown").label("user"),
+        ).outerjoin(User, User.id == user_column).where(
+            model.created_at >= since
+        ).order_by(model.created_at.desc()).limit(per_type).subquery()
+        branches.append(select(branch))
+    activities = union_all(*branches).subquery()
+    return select(activities).order_by(activities.c.date.desc()).limit(limit)
+
+def activity_to_dict(row) -> dict:
+    """Convertir una fila de actividad al formato del dashboard"""
+    model, detail = ACTIVITY_DETAILS[row.type]
+    enum_class = getattr(model, detail).type.enum_class
+    return {
+        "type": row.type,
+        "title": row.title,
+        "date": row.date.isoformat(),
+        detail: enum_class[row.detail].value if row.detail else None,
+        "user": row.user
+    }
+
+async def compute_dashboard_stats(db: AsyncSession) -> DashboardStats:
+    """Estadísticas del dashboard: contadores y actividad reciente"""
+    # Contadores mantenidos de forma incremental (una sola consulta)
+    counts = await get_counts(db, Document, Incident, NonConformity, Audit, KPI)
+    documents = counts["documents"]
+    incidents = counts["incidents"]
+    non_conformities = counts["non_conformities"]
+    audits = counts["audits"]
+    
+    # Actividades recientes (últimos 7 días) en una sola consulta
     seven_days_ago = datetime.utcnow() - timedelta(days=7)
-    
-    recent_activities = []
-    
-    # Documentos recientes
-    recent_docs = db.query(Document).filter(
-        Document.created_at >= seven_days_ago
-    ).order_by(Document.created_at.desc()).limit(5).all()
-    
-    for doc in recent_docs:
-        recent_activities.append({
-            "type": "document",
-            "title": doc.title,
-            "date": doc.created_at.isoformat(),
-            "status": doc.status,
-            "user": doc.creator.full_name if doc.creator else "Unknown"
-        })
-    
-    # Incidentes recientes
-    recent_incidents = db.query(Incident).filter(
-        Incident.created_at >= seven_days_ago
-    ).order_by(Incident.created_at.desc()).limit(5).all()
-    
-    for incident in recent_incidents:
-        recent_activities.append({
-            "type": "incident",
-            "title": incident.title,
-            "date": incident.created_at.isoformat(),
-            "priority": incident.priority,
-            "user": incident.reporter.full_name if incident.reporter else "Unknown"
-        })
-    
-    # No conformidades recientes
-    recent_nc = db.query(NonConformity).filter(
-        NonConformity.created_at >= seven_days_ago
-    ).order_by(NonConformity.created_at.desc()).limit(5).all()
-    
-    for nc in recent_nc:
-        recent_activities.append({
-            "type": "non_conformity",
-            "title": nc.title,
-            "date": nc.created_at.isoformat(),
-            "severity": nc.severity,
-            "user": nc.reporter.full_name if nc.reporter else "Unknown"
-        })
-    
-    # Ordenar actividades por fecha
-    recent_activities.sort(key=lambda x: x["date"], reverse=True)
-    recent_activities = recent_activities[:10]  # Top 10 actividades
+    result = await db.execute(recent_activity_query(seven_days_ago))
+    recent_activities = [activity_to_dict(row) for row in result]
     
     return DashboardStats(
-        total_documents=total_documents,
-        pending_documents=pending_documents,
-        total_incidents=total_incidents,
-        open_incidents=open_incidents,
-        total_non_conformities=total_non_conformities,
-        open_non_conformities=open_non_conformities,
-        total_audits=total_audits,
-        planned_audits=planned_audits,
-        total_kpis=total_kpis,
+        total_documents=documents["total"],
+        pending_documents=documents["status"]["draft"] + documents["status"]["pending_review"],
+        total_incidents=incidents["total"],
+        open_incidents=incidents["status"]["open"] + incidents["status"]["in_progress"],
+        total_non_conformities=non_conformities["total"],
+        open_non_conformities=non_conformities["status"]["open"] + non_conformities["status"]["in_progress"],
+        total_audits=audits["total"],
+        planned_audits=audits["status"]["planned"],
+        total_kpis=counts["kpis"]["total"],
         recent_activities=recent_activities
     )
 
-@router.get("/alerts")
-def get_dashboard_alerts(
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
-):
-    """Obtener alertas para el dashboard"""
-    alerts = []
-    
-    # Incidentes críticos abiertos
-    critical_incidents = db.query(Incident).filter(
-        Incident.priority == "critical",
-        Incident.status.in_(["open", "in_progress"])
-    ).count()
-    
-    if critical_incidents > 0:
-        alerts.append({
-            "type": "critical",
-            "title": f"{critical_incidents} Incidente(s) Crítico(s) Abierto(s)",
-            "message": "Hay incidentes críticos que requieren atención inmediata",
-            "count": critical_incidents
-        })
-    
-    # No conformidades críticas abiertas
-    critical_nc = db.query(NonConformity).filter(
-        NonConformity.severity == "critical",
-        NonConformity.status.in_(["open", "in_progress"])
-    ).count()
-    
-    if critical_nc > 0:
-        alerts.append({
-            "type": "critical",
-            "title": f"{critical_nc} No Conformidad(es) Crítica(s) Abierta(s)",
-            "message": "Hay no conformidades críticas que requieren acción inmediata",
-            "count": critical_nc
-        })
-    
-    # Documentos pendientes de revisión
-    pending_review = db.query(Document).filter(
-        Document.status == "pending_review"
-    ).count()
-    
-    if pending_review > 0:
-        alerts.append({
-            "type": "warning",
-            "title": f"{pending_review} Documento(s) Pendiente(s) de Revisión",
-            "message": "Hay documentos que requieren revisión y aprobación",
-            "count": pending_review
-        })
-    
-    # Auditorías próximas a vencer (próximos 7 días)
-    seven_days_from_now = datetime.utcnow() + timedelta(days=7)
-    upcoming_audits = db.query(Audit).filter(
-        Audit.status == "planned",
-        Audit.planned_start_date <= seven_days_from_now,
-        Audit.planned_start_date >= datetime.utcnow()
-    ).count()
-    
-    if upcoming_audits > 0:
-        alerts.append({
-            "type": "info",
-            "title": f"{upcoming_audits} Auditoría(s) Próxima(s)",
-            "message": "Hay auditorías programadas para los próximos 7 días",
-            "count": upcoming_audits
-        })
-    
+async def compute_dashboard_state(db: AsyncSession) -> dict:
+    """Estado difundido por /dashboard/stream: estadísticas y alertas"""
+    alerts = await compute_alerts(db)
+    # La marca de tiempo va en cada evento; dentro del estado haría cambiar todos los deltas
+    alerts.pop("generated_at")
     return {
+        "stats": jsonable_encoder(await compute_dashboard_stats(db)),
         "alerts": alerts,
-        "total_alerts": len(alerts),
-        "critical_count": len([a for a in alerts if a["type"] == "critical"]),
-        "warning_count": len([a for a in alerts if a["type"] == "warning"]),
-        "info_count": len([a for a in alerts if a["type"] == "info"])
     }
 
+# Un único cálculo por cambio, compartido por todas las conexiones abiertas
+dashboard_broadcaster = Broadcaster(compute_dashboard_state, DASHBOARD_TAGS)
+on_tables_written(dashboard_broadcaster.mark_dirty)
+
+@router.get("/stats", response_model=DashboardStats)
+@cached(ttl=30, tags=DASHBOARD_TAGS)
+async def get_dashboard_stats(
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Obtener estadísticas del dashboard"""
+    return await compute_dashboard_stats(db)
+
+@router.get("/alerts")
+async def get_dashboard_alerts(
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Obtener alertas para el dashboard (precalculadas; generated_at indica cuándo)"""
+    return await alert_evaluator.get(db)
+
+@router.get("/trends")
+@cached(ttl=60, tags=ROLLUP_SOURCE_TABLES)
+async def get_dashboard_trends(
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    bucket: Optional[str] = Depends(get_bucket),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Tendencias de actividad por periodo (?from=YYYY-MM-DD&to=YYYY-MM-DD&bucket=day|week|month)
+    Incidentes abiertos y cerrados, no conformidades registradas y documentos
+    aprobados; se leen de los agregados diarios. Por defecto, los últimos 12 meses por día.
+    """
+    date_to = date_to or datetime.utcnow().date()
+    date_from = date_from or date_to - timedelta(days=TRENDS_DEFAULT_DAYS)
+    if date_from > date_to:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="'from' must not be after 'to'")
+    if (date_to - date_from).days > TRENDS_MAX_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Date range too large (max {TRENDS_MAX_DAYS} days)"
+        )
+    return await get_trends(db, date_from, date_to, bucket or "day")
+
+@router.get("/stream")
+async def stream_dashboard(current_user: User = Depends(get_stream_user)):
+    """
+    Estadísticas y alertas en vivo (Server-Sent Events)
+    Envía un evento "snapshot" con el estado completo y después eventos "delta"
+    solo con los campos que cambian.
+    """
+    return StreamingResponse(
+        dashboard_broadcaster.stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
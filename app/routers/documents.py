@@ -1,23 +1,46 @@
 """
 Router para gestión de documentos (RF-01)
 """
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, UploadFile, File
 from sqlalchemy.orm import Session
-from app.models.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.database import get_db, get_read_db
 from app.models.user import User
-from app.models.document import Document
+from app.models.document import Document, DocumentStatus, DocumentType
 from app.schemas import DocumentCreate, DocumentUpdate, Document as DocumentSchema, MessageResponse
 from app.auth import get_current_active_user, require_role
+from app.etag import collection_etag, item_etag
+from app.export import export_response, get_export_format
+from app.fieldsets import FieldSet
+from app.filters import DateRangeFilter, ListQuery, ParsedQuery, ValuesFilter
+from app.pagination import PageParams, get_page, paginate, page_items
+from app.serialization import json_list_response
+from app.services.change_service import get_changes, get_limit
 import os
 import uuid
 from datetime import datetime
 
 router = APIRouter(prefix="/documents", tags=["documents"])
 
+# Filtros y órdenes de la lista (el orden es estable para la paginación por cursor)
+DOCUMENT_QUERY = ListQuery(
+    Document,
+    filters={
+        "status": ValuesFilter(Document.status, DocumentStatus),
+        "document_type": ValuesFilter(Document.document_type, DocumentType),
+        "created_by": ValuesFilter(Document.created_by, int),
+        "created_at": DateRangeFilter(Document.created_at),
+    },
+    sorts={"created_at": Document.created_at},
+    default_sort="-created_at",
+)
+
+# Campos seleccionables con ?fields= (columnas del esquema de respuesta)
+DOCUMENT_FIELDS = FieldSet(Document, DocumentSchema)
+
 # Directorio para almacenar documentos
 UPLOAD_DIR = "uploads/documents"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 @router.post("/", response_model=DocumentSchema)
 def create_document(
@@ -42,24 +65,62 @@ def create_document(
     return db_document
 
 @router.get("/", response_model=List[DocumentSchema])
-def get_documents(
-    skip: int = 0,
-    limit: int = 100,
+async def get_documents(
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(get_page),
+    fields: Optional[str] = None,
+    list_query: ParsedQuery = Depends(DOCUMENT_QUERY.parse),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Obtener lista de documentos"""
-    documents = db.query(Document).offset(skip).limit(limit).all()
-    return documents
+    selected = DOCUMENT_FIELDS.parse(fields)
+    await list_query.check(db)
+    not_modified = await collection_etag(request, response, db, Document, list_query.where)
+    if not_modified:
+        return not_modified
+    
+    result = await db.execute(paginate(DOCUMENT_FIELDS.select(selected).where(*list_query.where), list_query.sort, page, db))
+    documents = page_items(result.all(), list_query.sort, page, request, response)
+    return json_list_response(DOCUMENT_FIELDS.response_schema(selected), documents, response)
+
+@router.get("/export")
+async def export_documents(
+    format: str = Depends(get_export_format),
+    fields: Optional[str] = None,
+    list_query: ParsedQuery = Depends(DOCUMENT_QUERY.parse),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Exportar todos los documentos en streaming (?format=ndjson|csv)"""
+    selected = DOCUMENT_FIELDS.parse(fields)
+    query = DOCUMENT_FIELDS.select(selected).where(*list_query.where).order_by(Document.id)
+    return export_response(db, query, DOCUMENT_FIELDS.response_schema(selected), format, "documents")
+
+@router.get("/changes")
+async def get_documents_changes(
+    since: Optional[str] = None,
+    limit: int = Depends(get_limit),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Cambios de los documentos desde el token ?since= (altas y modificaciones, y tombstones de los borrados)"""
+    return await get_changes(db, Document, DocumentSchema, since, limit)
 
 @router.get("/{document_id}", response_model=DocumentSchema)
-def get_document(
+async def get_document(
     document_id: int,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Obtener documento por ID"""
-    document = db.query(Document).filter(Document.id == document_id).first()
+    not_modified = await item_etag(request, response, db, Document, document_id)
+    if not_modified:
+        return not_modified
+    document = await db.get(Document, document_id)
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
     return document
@@ -80,7 +141,7 @@ def update_document(
     if document.created_by != current_user.id and current_user.role.value != "admin":
         raise HTTPException(status_code=403, detail="Not enough permissions")
     
-    update_data = document_update.dict(exclude_unset=True)
+    update_data = document_update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(document, field, value)
     
@@ -127,7 +188,8 @@ def upload_document_file(
     unique_filename = f"{uuid.uuid4()}{file_extension}"
     file_path = os.path.join(UPLOAD_DIR, unique_filename)
     
-    # Guardar archivo
+    # Guardar archivo (el directorio se crea en la primera subida)
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
     with open(file_path, "wb") as buffer:
         content = file.file.read()
         buffer.write(content)
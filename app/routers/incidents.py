@@ -1,18 +1,48 @@
 """
 Router para gestión de incidentes (RF-03)
 """
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
-from app.models.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.database import get_db, get_read_db
 from app.models.user import User
-from app.models.incident import Incident
+from app.models.incident import Incident, IncidentStatus, IncidentPriority, IncidentType
 from app.schemas import IncidentCreate, IncidentUpdate, Incident as IncidentSchema, MessageResponse
 from app.auth import get_current_active_user
+from app.cache import cached
+from app.etag import collection_etag, item_etag
+from app.export import export_response, get_export_format
+from app.fieldsets import FieldSet
+from app.filters import DateRangeFilter, ListQuery, ParsedQuery, ValuesFilter
+from app.pagination import PageParams, get_page, paginate, page_items
+from app.serialization import json_list_response
+from app.services.change_service import get_changes, get_limit
+from app.services.stats_service import grouped_stats, get_bucket
 from datetime import datetime
 
 router = APIRouter(prefix="/incidents", tags=["incidents"])
 
+# Filtros y órdenes de la lista (el orden es estable para la paginación por cursor)
+INCIDENT_QUERY = ListQuery(
+    Incident,
+    filters={
+        "status": ValuesFilter(Incident.status, IncidentStatus),
+        "priority": ValuesFilter(Incident.priority, IncidentPriority),
+        "incident_type": ValuesFilter(Incident.incident_type, IncidentType),
+        "assigned_to": ValuesFilter(Incident.assigned_to, int),
+        "reported_by": ValuesFilter(Incident.reported_by, int),
+        "created_at": DateRangeFilter(Incident.created_at),
+        "occurred_at": DateRangeFilter(Incident.occurred_at),
+    },
+    sorts={"created_at": Incident.created_at, "occurred_at": Incident.occurred_at},
+    default_sort="-created_at",
+    aliases={"status_filter": "status", "priority_filter": "priority"},
+)
+
+# Campos seleccionables con ?fields= (columnas del esquema de respuesta)
+INCIDENT_FIELDS = FieldSet(Incident, IncidentSchema)
+
 @router.post("/", response_model=IncidentSchema)
 def create_incident(
     incident: IncidentCreate,
@@ -39,33 +69,62 @@ def create_incident(
     return db_incident
 
 @router.get("/", response_model=List[IncidentSchema])
-def get_incidents(
-    skip: int = 0,
-    limit: int = 100,
-    status_filter: str = None,
-    priority_filter: str = None,
+async def get_incidents(
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(get_page),
+    fields: Optional[str] = None,
+    list_query: ParsedQuery = Depends(INCIDENT_QUERY.parse),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Obtener lista de incidentes con filtros opcionales"""
-    query = db.query(Incident)
-    
-    if status_filter:
-        query = query.filter(Incident.status == status_filter)
-    if priority_filter:
-        query = query.filter(Incident.priority == priority_filter)
+    selected = INCIDENT_FIELDS.parse(fields)
+    await list_query.check(db)
+    not_modified = await collection_etag(request, response, db, Incident, list_query.where)
+    if not_modified:
+        return not_modified
     
-    incidents = query.offset(skip).limit(limit).all()
-    return incidents
+    result = await db.execute(paginate(INCIDENT_FIELDS.select(selected).where(*list_query.where), list_query.sort, page, db))
+    incidents = page_items(result.all(), list_query.sort, page, request, response)
+    return json_list_response(INCIDENT_FIELDS.response_schema(selected), incidents, response)
+
+@router.get("/export")
+async def export_incidents(
+    format: str = Depends(get_export_format),
+    fields: Optional[str] = None,
+    list_query: ParsedQuery = Depends(INCIDENT_QUERY.parse),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Exportar todos los incidentes en streaming (?format=ndjson|csv)"""
+    selected = INCIDENT_FIELDS.parse(fields)
+    query = INCIDENT_FIELDS.select(selected).where(*list_query.where).order_by(Incident.id)
+    return export_response(db, query, INCIDENT_FIELDS.response_schema(selected), format, "incidents")
+
+@router.get("/changes")
+async def get_incidents_changes(
+    since: Optional[str] = None,
+    limit: int = Depends(get_limit),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Cambios de los incidentes desde el token ?since= (altas y modificaciones, y tombstones de los borrados)"""
+    return await get_changes(db, Incident, IncidentSchema, since, limit)
 
 @router.get("/{incident_id}", response_model=IncidentSchema)
-def get_incident(
+async def get_incident(
     incident_id: int,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Obtener incidente por ID"""
-    incident = db.query(Incident).filter(Incident.id == incident_id).first()
+    not_modified = await item_etag(request, response, db, Incident, incident_id)
+    if not_modified:
+        return not_modified
+    incident = await db.get(Incident, incident_id)
     if not incident:
         raise HTTPException(status_code=404, detail="Incident not found")
     return incident
@@ -92,7 +151,7 @@ def update_incident(
     if not can_edit:
         raise HTTPException(status_code=403, detail="Not enough permissions")
     
-    update_data = incident_update.dict(exclude_unset=True)
+    update_data = incident_update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(incident, field, value)
     
@@ -181,36 +240,20 @@ def close_incident(
     return incident
 
 @router.get("/stats/summary")
-def get_incident_stats(
+@cached(ttl=60, tags=(Incident.__tablename__,))
+async def get_incident_stats(
+    bucket: Optional[str] = Depends(get_bucket),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Obtener estadísticas de incidentes"""
-    total_incidents = db.query(Incident).count()
-    open_incidents = db.query(Incident).filter(Incident.status == "open").count()
-    in_progress_incidents = db.query(Incident).filter(Incident.status == "in_progress").count()
-    resolved_incidents = db.query(Incident).filter(Incident.status == "resolved").count()
-    closed_incidents = db.query(Incident).filter(Incident.status == "closed").count()
-    
-    # Incidentes por prioridad
-    critical_incidents = db.query(Incident).filter(Incident.priority == "critical").count()
-    high_incidents = db.query(Incident).filter(Incident.priority == "high").count()
-    medium_incidents = db.query(Incident).filter(Incident.priority == "medium").count()
-    low_incidents = db.query(Incident).filter(Incident.priority == "low").count()
-    
-    return {
-        "total_incidents": total_incidents,
-        "by_status": {
-            "open": open_incidents,
-            "in_progress": in_progress_incidents,
-            "resolved": resolved_incidents,
-            "closed": closed_incidents
-        },
-        "by_priority": {
-            "critical": critical_incidents,
-            "high": high_incidents,
-            "medium": medium_incidents,
-            "low": low_incidents
-        }
+    """Obtener estadísticas de incidentes (por periodo con ?bucket=day|week|month)"""
+    dimensions = ("status", "priority")
+    stats = await grouped_stats(db, Incident, dimensions)
+    response = {
+        "total_incidents": stats["total"],
+        "by_status": stats["status"],
+        "by_priority": stats["priority"]
     }
-
+    if bucket:
+        response["by_period"] = {"bucket": bucket, **await grouped_stats(db, Incident, dimensions, bucket=bucket)}
+    return response
@@ -1,18 +1,56 @@
 """
 Router para gestión de KPIs y métricas (RF-08)
 """
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from app.models.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.database import get_db, get_read_db
 from app.models.user import User
-from app.models.kpi import KPI, KPIMeasurement
+from app.models.kpi import KPI, KPIMeasurement, KPIType
 from app.schemas import KPICreate, KPIUpdate, KPI as KPISchema, KPIMeasurementCreate, KPIMeasurement as KPIMeasurementSchema, MessageResponse
 from app.auth import get_current_active_user, require_role
+from app.cache import cached
+from app.etag import collection_etag, item_etag
+from app.export import export_response, get_export_format
+from app.fieldsets import FieldSet
+from app.filters import DateRangeFilter, ListQuery, ParsedQuery, ValuesFilter
+from app.pagination import PageParams, get_page, paginate, page_items
+from app.serialization import json_list_response
+from app.services.change_service import DELETE, get_changes, get_limit, record_changes
+from app.services.stats_service import grouped_stats, get_bucket
 from datetime import datetime, timedelta
 
 router = APIRouter(prefix="/kpis", tags=["kpis"])
 
+# Filtros y órdenes de las listas (el orden es estable para la paginación por cursor)
+KPI_QUERY = ListQuery(
+    KPI,
+    filters={
+        "kpi_type": ValuesFilter(KPI.kpi_type, KPIType),
+        "owner": ValuesFilter(KPI.owner, int),
+        "created_at": DateRangeFilter(KPI.created_at),
+    },
+    sorts={"created_at": KPI.created_at, "name": KPI.name},
+    default_sort="-created_at",
+    aliases={"type_filter": "kpi_type"},
+)
+MEASUREMENT_QUERY = ListQuery(
+    KPIMeasurement,
+    filters={
+        "kpi_id": ValuesFilter(KPIMeasurement.kpi_id, int),
+        "measurement_date": DateRangeFilter(KPIMeasurement.measurement_date),
+    },
+    sorts={"measurement_date": KPIMeasurement.measurement_date},
+    default_sort="-measurement_date",
+    path_filters={"kpi_id": KPIMeasurement.kpi_id},
+)
+
+# Campos seleccionables con ?fields= (columnas del esquema de respuesta)
+KPI_FIELDS = FieldSet(KPI, KPISchema)
+MEASUREMENT_FIELDS = FieldSet(KPIMeasurement, KPIMeasurementSchema)
+
 @router.post("/", response_model=KPISchema)
 def create_kpi(
     kpi: KPICreate,
@@ -39,30 +77,49 @@ def create_kpi(
     return db_kpi
 
 @router.get("/", response_model=List[KPISchema])
-def get_kpis(
-    skip: int = 0,
-    limit: int = 100,
-    type_filter: str = None,
+async def get_kpis(
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(get_page),
+    fields: Optional[str] = None,
+    list_query: ParsedQuery = Depends(KPI_QUERY.parse),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Obtener lista de KPIs con filtros opcionales"""
-    query = db.query(KPI)
-    
-    if type_filter:
-        query = query.filter(KPI.kpi_type == type_filter)
+    selected = KPI_FIELDS.parse(fields)
+    await list_query.check(db)
+    not_modified = await collection_etag(request, response, db, KPI, list_query.where)
+    if not_modified:
+        return not_modified
     
-    kpis = query.offset(skip).limit(limit).all()
-    return kpis
+    result = await db.execute(paginate(KPI_FIELDS.select(selected).where(*list_query.where), list_query.sort, page, db))
+    kpis = page_items(result.all(), list_query.sort, page, request, response)
+    return json_list_response(KPI_FIELDS.response_schema(selected), kpis, response)
+
+@router.get("/changes")
+async def get_kpis_changes(
+    since: Optional[str] = None,
+    limit: int = Depends(get_limit),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Cambios de los KPIs desde el token ?since= (altas y modificaciones, y tombstones de los borrados)"""
+    return await get_changes(db, KPI, KPISchema, since, limit)
 
 @router.get("/{kpi_id}", response_model=KPISchema)
-def get_kpi(
+async def get_kpi(
     kpi_id: int,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Obtener KPI por ID"""
-    kpi = db.query(KPI).filter(KPI.id == kpi_id).first()
+    not_modified = await item_etag(request, response, db, KPI, kpi_id)
+    if not_modified:
+        return not_modified
+    kpi = await db.get(KPI, kpi_id)
     if not kpi:
         raise HTTPException(status_code=404, detail="KPI not found")
     return kpi
@@ -88,7 +145,7 @@ def update_kpi(
     if not can_edit:
         raise HTTPException(status_code=403, detail="Not enough permissions")
     
-    update_data = kpi_update.dict(exclude_unset=True)
+    update_data = kpi_update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(kpi, field, value)
     
@@ -109,8 +166,12 @@ def delete_kpi(
     if not kpi:
         raise HTTPException(status_code=404, detail="KPI not found")
     
-    # Eliminar mediciones asociadas
-    db.query(KPIMeasurement).filter(KPIMeasurement.kpi_id == kpi_id).delete()
+    # Eliminar mediciones asociadas (el borrado masivo no pasa por los listeners:
+    # se registran aquí sus tombstones para la sincronización)
+    measurements = db.query(KPIMeasurement).filter(KPIMeasurement.kpi_id == kpi_id)
+    measurement_ids = [measurement_id for (measurement_id,) in measurements.with_entities(KPIMeasurement.id)]
+    measurements.delete()
+    record_changes(db.connection(), KPIMeasurement.__tablename__, measurement_ids, DELETE)
     
     db.delete(kpi)
     db.commit()
@@ -145,42 +206,76 @@ def add_measurement(
     return db_measurement
 
 @router.get("/{kpi_id}/measurements", response_model=List[KPIMeasurementSchema])
-def get_measurements(
+async def get_measurements(
     kpi_id: int,
-    skip: int = 0,
-    limit: int = 100,
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(get_page),
+    fields: Optional[str] = None,
+    list_query: ParsedQuery = Depends(MEASUREMENT_QUERY.parse),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Obtener mediciones de un KPI"""
-    kpi = db.query(KPI).filter(KPI.id == kpi_id).first()
+    selected = MEASUREMENT_FIELDS.parse(fields)
+    kpi = await db.get(KPI, kpi_id)
     if not kpi:
         raise HTTPException(status_code=404, detail="KPI not found")
     
-    measurements = db.query(KPIMeasurement).filter(
-        KPIMeasurement.kpi_id == kpi_id
-    ).order_by(KPIMeasurement.measurement_date.desc()).offset(skip).limit(limit).all()
+    await list_query.check(db)
+    not_modified = await collection_etag(request, response, db, KPIMeasurement, list_query.where)
+    if not_modified:
+        return not_modified
     
-    return measurements
+    result = await db.execute(paginate(MEASUREMENT_FIELDS.select(selected).where(*list_query.where), list_query.sort, page, db))
+    measurements = page_items(result.all(), list_query.sort, page, request, response)
+    return json_list_response(MEASUREMENT_FIELDS.response_schema(selected), measurements, response)
+
+@router.get("/measurements/export")
+async def export_measurements(
+    format: str = Depends(get_export_format),
+    fields: Optional[str] = None,
+    list_query: ParsedQuery = Depends(MEASUREMENT_QUERY.parse),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Exportar todas las mediciones de KPIs (o las de ?kpi_id=) en streaming (?format=ndjson|csv)"""
+    selected = MEASUREMENT_FIELDS.parse(fields)
+    query = MEASUREMENT_FIELDS.select(selected).where(*list_query.where).order_by(KPIMeasurement.id)
+    return export_response(db, query, MEASUREMENT_FIELDS.response_schema(selected), format, "kpi_measurements")
+
+@router.get("/measurements/changes")
+async def get_measurements_changes(
+    since: Optional[str] = None,
+    limit: int = Depends(get_limit),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Cambios de las mediciones de KPIs desde el token ?since= (altas y modificaciones, y tombstones de los borrados)"""
+    return await get_changes(db, KPIMeasurement, KPIMeasurementSchema, since, limit)
 
 @router.get("/{kpi_id}/dashboard")
-def get_kpi_dashboard(
+@cached(ttl=60, tags=(KPI.__tablename__, KPIMeasurement.__tablename__))
+async def get_kpi_dashboard(
     kpi_id: int,
     days: int = 30,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Obtener datos del dashboard para un KPI"""
-    kpi = db.query(KPI).filter(KPI.id == kpi_id).first()
+    kpi = await db.get(KPI, kpi_id)
     if not kpi:
         raise HTTPException(status_code=404, detail="KPI not found")
     
     # Obtener mediciones de los últimos N días
     start_date = datetime.utcnow() - timedelta(days=days)
-    measurements = db.query(KPIMeasurement).filter(
-        KPIMeasurement.kpi_id == kpi_id,
-        KPIMeasurement.measurement_date >= start_date
-    ).order_by(KPIMeasurement.measurement_date.asc()).all()
+    result = await db.execute(
+        select(KPIMeasurement).where(
+            KPIMeasurement.kpi_id == kpi_id,
+            KPIMeasurement.measurement_date >= start_date
+        ).order_by(KPIMeasurement.measurement_date.asc())
+    )
+    measurements = result.scalars().all()
     
     # Calcular estadísticas
     values = [m.measured_value for m in measurements]
@@ -209,39 +304,31 @@ def get_kpi_dashboard(
     return stats
 
 @router.get("/stats/summary")
-def get_kpi_stats(
+@cached(ttl=60, tags=(KPI.__tablename__, KPIMeasurement.__tablename__))
+async def get_kpi_stats(
+    bucket: Optional[str] = Depends(get_bucket),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Obtener estadísticas generales de KPIs"""
-    total_kpis = db.query(KPI).count()
-    
-    # KPIs por tipo
-    quality_kpis = db.query(KPI).filter(KPI.kpi_type == "quality").count()
-    continuity_kpis = db.query(KPI).filter(KPI.kpi_type == "continuity").count()
-    performance_kpis = db.query(KPI).filter(KPI.kpi_type == "performance").count()
-    compliance_kpis = db.query(KPI).filter(KPI.kpi_type == "compliance").count()
-    customer_kpis = db.query(KPI).filter(KPI.kpi_type == "customer").count()
-    
-    # Total de mediciones
-    total_measurements = db.query(KPIMeasurement).count()
+    """Obtener estadísticas generales de KPIs (mediciones por periodo con ?bucket=day|week|month)"""
+    stats = await grouped_stats(db, KPI, ("kpi_type",))
     
-    # Mediciones de los últimos 30 días
+    # Mediciones totales y de los últimos 30 días
     thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-    recent_measurements = db.query(KPIMeasurement).filter(
-        KPIMeasurement.measurement_date >= thirty_days_ago
-    ).count()
-    
-    return {
-        "total_kpis": total_kpis,
-        "by_type": {
-            "quality": quality_kpis,
-            "continuity": continuity_kpis,
-            "performance": performance_kpis,
-            "compliance": compliance_kpis,
-            "customer": customer_kpis
-        },
-        "total_measurements": total_measurements,
-        "recent_measurements_30d": recent_measurements
+    measurements = await grouped_stats(db, KPIMeasurement)
+    recent_measurements = await grouped_stats(
+        db, KPIMeasurement, where=[KPIMeasurement.measurement_date >= thirty_days_ago]
+    )
+    
+    response = {
+        "total_kpis": stats["total"],
+        "by_type": stats["kpi_type"],
+        "total_measurements": measurements["total"],
+        "recent_measurements_30d": recent_measurements["total"]
     }
-
+    if bucket:
+        response["by_period"] = {
+            "bucket": bucket,
+            **await grouped_stats(db, KPIMeasurement, ("kpi_id",), bucket=bucket, date_column="measurement_date")
+        }
+    return response
@@ -1,18 +1,47 @@
 """
 Router para gestión de no conformidades (RF-02)
 """
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
-from app.models.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.database import get_db, get_read_db
 from app.models.user import User
-from app.models.non_conformity import NonConformity
+from app.models.non_conformity import NonConformity, NonConformityStatus, NonConformitySeverity
 from app.schemas import NonConformityCreate, NonConformityUpdate, NonConformity as NonConformitySchema, MessageResponse
 from app.auth import get_current_active_user
+from app.cache import cached
+from app.etag import collection_etag, item_etag
+from app.export import export_response, get_export_format
+from app.fieldsets import FieldSet
+from app.filters import DateRangeFilter, ListQuery, ParsedQuery, ValuesFilter
+from app.pagination import PageParams, get_page, paginate, page_items
+from app.serialization import json_list_response
+from app.services.change_service import get_changes, get_limit
+from app.services.stats_service import grouped_stats, get_bucket
 from datetime import datetime
 
 router = APIRouter(prefix="/non-conformities", tags=["non-conformities"])
 
+# Filtros y órdenes de la lista (el orden es estable para la paginación por cursor)
+NON_CONFORMITY_QUERY = ListQuery(
+    NonConformity,
+    filters={
+        "status": ValuesFilter(NonConformity.status, NonConformityStatus),
+        "severity": ValuesFilter(NonConformity.severity, NonConformitySeverity),
+        "assigned_to": ValuesFilter(NonConformity.assigned_to, int),
+        "reported_by": ValuesFilter(NonConformity.reported_by, int),
+        "created_at": DateRangeFilter(NonConformity.created_at),
+        "detected_date": DateRangeFilter(NonConformity.detected_date),
+    },
+    sorts={"created_at": NonConformity.created_at, "detected_date": NonConformity.detected_date},
+    default_sort="-created_at",
+    aliases={"status_filter": "status", "severity_filter": "severity"},
+)
+
+# Campos seleccionables con ?fields= (columnas del esquema de respuesta)
+NON_CONFORMITY_FIELDS = FieldSet(NonConformity, NonConformitySchema)
+
 @router.post("/", response_model=NonConformitySchema)
 def create_non_conformity(
     non_conformity: NonConformityCreate,
@@ -37,33 +66,62 @@ def create_non_conformity(
     return db_non_conformity
 
 @router.get("/", response_model=List[NonConformitySchema])
-def get_non_conformities(
-    skip: int = 0,
-    limit: int = 100,
-    status_filter: str = None,
-    severity_filter: str = None,
+async def get_non_conformities(
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(get_page),
+    fields: Optional[str] = None,
+    list_query: ParsedQuery = Depends(NON_CONFORMITY_QUERY.parse),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Obtener lista de no conformidades con filtros opcionales"""
-    query = db.query(NonConformity)
-    
-    if status_filter:
-        query = query.filter(NonConformity.status == status_filter)
-    if severity_filter:
-        query = query.filter(NonConformity.severity == severity_filter)
-    
-    non_conformities = query.offset(skip).limit(limit).all()
-    return non_conformities
+    selected = NON_CONFORMITY_FIELDS.parse(fields)
+    await list_query.check(db)
+    not_modified = await collection_etag(request, response, db, NonConformity, list_query.where)
+    if not_modified:
+        return not_modified
+    
+    result = await db.execute(paginate(NON_CONFORMITY_FIELDS.select(selected).where(*list_query.where), list_query.sort, page, db))
+    non_conformities = page_items(result.all(), list_query.sort, page, request, response)
+    return json_list_response(NON_CONFORMITY_FIELDS.response_schema(selected), non_conformities, response)
+
+@router.get("/export")
+async def export_non_conformities(
+    format: str = Depends(get_export_format),
+    fields: Optional[str] = None,
+    list_query: ParsedQuery = Depends(NON_CONFORMITY_QUERY.parse),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Exportar todas las no conformidades en streaming (?format=ndjson|csv)"""
+    selected = NON_CONFORMITY_FIELDS.parse(fields)
+    query = NON_CONFORMITY_FIELDS.select(selected).where(*list_query.where).order_by(NonConformity.id)
+    return export_response(db, query, NON_CONFORMITY_FIELDS.response_schema(selected), format, "non-conformities")
+
+@router.get("/changes")
+async def get_non_conformities_changes(
+    since: Optional[str] = None,
+    limit: int = Depends(get_limit),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Cambios de las no conformidades desde el token ?since= (altas y modificaciones, y tombstones de los borrados)"""
+    return await get_changes(db, NonConformity, NonConformitySchema, since, limit)
 
 @router.get("/{non_conformity_id}", response_model=NonConformitySchema)
-def get_non_conformity(
+async def get_non_conformity(
     non_conformity_id: int,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Obtener no conformidad por ID"""
-    non_conformity = db.query(NonConformity).filter(NonConformity.id == non_conformity_id).first()
+    not_modified = await item_etag(request, response, db, NonConformity, non_conformity_id)
+    if not_modified:
+        return not_modified
+    non_conformity = await db.get(NonConformity, non_conformity_id)
     if not non_conformity:
         raise HTTPException(status_code=404, detail="Non-conformity not found")
     return non_conformity
@@ -90,7 +148,7 @@ def update_non_conformity(
     if not can_edit:
         raise HTTPException(status_code=403, detail="Not enough permissions")
     
-    update_data = non_conformity_update.dict(exclude_unset=True)
+    update_data = non_conformity_update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(non_conformity, field, value)
     
@@ -154,34 +212,20 @@ def close_non_conformity(
     return non_conformity
 
 @router.get("/stats/summary")
-def get_non_conformity_stats(
+@cached(ttl=60, tags=(NonConformity.__tablename__,))
+async def get_non_conformity_stats(
+    bucket: Optional[str] = Depends(get_bucket),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Obtener estadísticas de no conformidades"""
-    total_nc = db.query(NonConformity).count()
-    open_nc = db.query(NonConformity).filter(NonConformity.status == "open").count()
-    in_progress_nc = db.query(NonConformity).filter(NonConformity.status == "in_progress").count()
-    closed_nc = db.query(NonConformity).filter(NonConformity.status == "closed").count()
-    
-    # No conformidades por severidad
-    critical_nc = db.query(NonConformity).filter(NonConformity.severity == "critical").count()
-    high_nc = db.query(NonConformity).filter(NonConformity.severity == "high").count()
-    medium_nc = db.query(NonConformity).filter(NonConformity.severity == "medium").count()
-    low_nc = db.query(NonConformity).filter(NonConformity.severity == "low").count()
-    
-    return {
-        "total_non_conformities": total_nc,
-        "by_status": {
-            "open": open_nc,
-            "in_progress": in_progress_nc,
-            "closed": closed_nc
-        },
-        "by_severity": {
-            "critical": critical_nc,
-            "high": high_nc,
-            "medium": medium_nc,
-            "low": low_nc
-        }
+    """Obtener estadísticas de no conformidades (por periodo con ?bucket=day|week|month)"""
+    dimensions = ("status", "severity")
+    stats = await grouped_stats(db, NonConformity, dimensions)
+    response = {
+        "total_non_conformities": stats["total"],
+        "by_status": stats["status"],
+        "by_severity": stats["severity"]
     }
-
+    if bucket:
+        response["by_period"] = {"bucket": bucket, **await grouped_stats(db, NonConformity, dimensions, bucket=bucket)}
+    return response
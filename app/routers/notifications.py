@@ -4,12 +4,14 @@ Router para notificaciones y alertas (RF-10)
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from app.models.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.database import get_db, get_read_db
 from app.models.user import User
 from app.models.notification import Notification, NotificationType, NotificationChannel
 from app.schemas import MessageResponse
 from app.auth import get_current_active_user
 from app.services.notification_service import NotificationService
+from app.services.stats_service import grouped_stats
 from datetime import datetime
 
 router = APIRouter(prefix="/notifications", tags=["notifications"])
@@ -83,44 +85,20 @@ def mark_all_notifications_as_read(
     return MessageResponse(message=f"Marked {len(notifications)} notifications as read")
 
 @router.get("/stats")
-def get_notification_stats(
+async def get_notification_stats(
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Obtener estadísticas de notificaciones"""
-    total_notifications = db.query(Notification).filter(
-        Notification.user_id == current_user.id
-    ).count()
-    
-    unread_notifications = db.query(Notification).filter(
-        Notification.user_id == current_user.id,
-        Notification.status != "read"
-    ).count()
-    
-    # Notificaciones por tipo
-    critical_count = db.query(Notification).filter(
-        Notification.user_id == current_user.id,
-        Notification.notification_type == "critical"
-    ).count()
-    
-    warning_count = db.query(Notification).filter(
-        Notification.user_id == current_user.id,
-        Notification.notification_type == "warning"
-    ).count()
-    
-    info_count = db.query(Notification).filter(
-        Notification.user_id == current_user.id,
-        Notification.notification_type == "info"
-    ).count()
+    stats = await grouped_stats(
+        db, Notification, ("notification_type", "status"), where=[Notification.user_id == current_user.id]
+    )
     
     return {
-        "total_notifications": total_notifications,
-        "unread_notifications": unread_notifications,
-        "by_type": {
-            "critical": critical_count,
-            "warning": warning_count,
-            "info": info_count
-        }
+        "total_notifications": stats["total"],
+        "unread_notifications": stats["total"] - stats["status"]["read"],
+        "by_type": stats["notification_type"],
+        "by_status": stats["status"]
     }
 
 @router.post("/test")
@@ -1,8 +1,8 @@
 """
 Esquemas Pydantic para validación de datos
 """
-from pydantic import BaseModel, EmailStr
-from typing import Optional, List
+from pydantic import BaseModel, ConfigDict, EmailStr
+from typing import Optional, List, Dict
 from datetime import datetime
 from enum import Enum
 
@@ -50,8 +50,7 @@ class User(UserBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Esquemas de Documento
 class DocumentBase(BaseModel):
@@ -81,8 +80,7 @@ class Document(DocumentBase):
     effective_date: Optional[datetime] = None
     expiry_date: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Esquemas de No Conformidad
 class NonConformitySeverity(str, Enum):
@@ -130,8 +128,7 @@ class NonConformity(NonConformityBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Esquemas de Incidente
 class IncidentPriority(str, Enum):
@@ -192,8 +189,7 @@ class Incident(IncidentBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Esquemas de Auditoría
 class AuditStatus(str, Enum):
@@ -242,8 +238,7 @@ class Audit(AuditBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Esquemas de KPI
 class KPIType(str, Enum):
@@ -289,8 +284,7 @@ class KPI(KPIBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class KPIMeasurementBase(BaseModel):
     measured_value: float
@@ -306,8 +300,7 @@ class KPIMeasurement(KPIMeasurementBase):
     kpi_id: int
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Esquemas de respuesta
 class MessageResponse(BaseModel):
@@ -326,3 +319,11 @@ class DashboardStats(BaseModel):
     total_kpis: int
     recent_activities: List[dict] = []
 
+# Esquemas para peticiones agrupadas (/api/batch)
+class BatchRequestItem(BaseModel):
+    id: str
+    path: str  # ruta GET completa, p. ej. /api/incidents/?limit=20
+    headers: Dict[str, str] = {}
+
+class BatchRequest(BaseModel):
+    requests: List[BatchRequestItem]
@@ -0,0 +1,53 @@
+"""
+Serialización rápida de respuestas
+Los TypeAdapters se crean una vez por tipo y se reutilizan: validan los
+objetos ORM contra el esquema (from_attributes) una sola vez y generan el
+JSON directamente con pydantic-core, sin dicts intermedios ni jsonable_encoder.
+"""
+from functools import lru_cache
+from typing import List, Sequence
+from fastapi import Response
+from pydantic import TypeAdapter
+
+# Filas validadas a la vez al serializar listas (acota la memoria de los modelos intermedios)
+SERIALIZATION_CHUNK = 1000
+
+
+@lru_cache(maxsize=None)
+def type_adapter(schema) -> TypeAdapter:
+    """TypeAdapter cacheado de un tipo (p. ej. List[IncidentSchema])"""
+    return TypeAdapter(schema)
+
+
+def dump_json(schema, value) -> bytes:
+    """Validar `value` (objetos ORM o dicts) contra `schema` y codificarlo como JSON"""
+    adapter = type_adapter(schema)
+    return adapter.dump_json(adapter.validate_python(value, from_attributes=True))
+
+
+def dump_json_list(schema, items: Sequence, chunk: int = SERIALIZATION_CHUNK) -> bytes:
+    """Codificar una lista de `schema` por bloques; el resultado es el mismo que con dump_json"""
+    parts = []
+    for start in range(0, len(items), chunk):
+        # Cada bloque se codifica como "[...]": se quitan los corchetes para unirlos
+        part = dump_json(List[schema], items[start:start + chunk])[1:-1]
+        if part:
+            parts.append(part)
+    return b"[" + b",".join(parts) + b"]"
+
+
+def raw_json_response(body: bytes, response: Response = None) -> Response:
+    """
+    Respuesta con un cuerpo JSON ya codificado
+    FastAPI no vuelve a validar una Response contra response_model; las cabeceras
+    fijadas en el parámetro `response` del endpoint (ETag, Cache-Control) se conservan.
+    """
+    result = Response(body, media_type="application/json")
+    if response is not None:
+        result.raw_headers.extend(response.headers.raw)
+    return result
+
+
+def json_list_response(schema, items: Sequence, response: Response = None) -> Response:
+    """Lista de objetos ORM serializada con el esquema de cada elemento"""
+    return raw_json_response(dump_json_list(schema, items), response)
@@ -0,0 +1,190 @@
+"""
+Evaluador de alertas del dashboard
+Calcula el conjunto de alertas en segundo plano, cada ALERTS_REFRESH_INTERVAL
+segundos y poco después de cada escritura en las tablas que lo afectan, y lo
+mantiene en memoria para servir /api/dashboard/alerts sin consultar la base
+de datos.
+
+Cada worker tiene su evaluador. Con CACHE_BACKEND=sqlite o redis las
+escrituras de los demás workers llegan por el canal de invalidaciones del
+almacén y también provocan un recálculo; con memory no hay difusión, así que
+con varios workers las alertas pueden tardar hasta ALERTS_REFRESH_INTERVAL
+segundos en reflejar una escritura atendida por otro worker.
+"""
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import select, func
+from app.cache import on_tables_written, response_cache
+from app.models.database import AsyncSessionLocal
+from app.models.document import Document
+from app.models.incident import Incident
+from app.models.non_conformity import NonConformity
+from app.models.audit import Audit
+from app.services.counter_service import get_counts
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Recalcular al menos con esta cadencia (la ventana de auditorías próximas avanza con el tiempo)
+ALERTS_REFRESH_INTERVAL = float(os.getenv("ALERTS_REFRESH_INTERVAL", "60"))
+# Espera tras una escritura para agrupar ráfagas en un solo recálculo
+ALERTS_DEBOUNCE = float(os.getenv("ALERTS_DEBOUNCE", "0.5"))
+
+# Tablas cuyas escrituras cambian las alertas
+ALERT_TABLES = {
+    Document.__tablename__, Incident.__tablename__, NonConformity.__tablename__, Audit.__tablename__,
+}
+
+
+def upcoming_audits_query(now: datetime):
+    """Auditorías planificadas para los próximos 7 días"""
+    return select(func.count(Audit.id)).where(
+        Audit.status == "planned",
+        Audit.planned_start_date >= now,
+        Audit.planned_start_date <= now + timedelta(days=7)
+    )
+
+
+def build_alerts(counts: dict, upcoming_audits: int) -> dict:
+    """Construir las alertas a partir de los contadores y las auditorías próximas"""
+    alerts = []
+
+    # Incidentes críticos abiertos
+    by_priority_status = counts["incidents"]["priority,status"]
+    critical_incidents = by_priority_status["critical,open"] + by_priority_status["critical,in_progress"]
+
+    if critical_incidents > 0:
+        alerts.append({
+            "type": "critical",
+            "title": f"{critical_incidents} Incidente(s) Crítico(s) Abierto(s)",
+            "message": "Hay incidentes críticos que requieren atención inmediata",
+            "count": critical_incidents
+        })
+
+    # No conformidades críticas abiertas
+    by_severity_status = counts["non_conformities"]["severity,status"]
+    critical_nc = by_severity_status["critical,open"] + by_severity_status["critical,in_progress"]
+
+    if critical_nc > 0:
+        alerts.append({
+            "type": "critical",
+            "title": f"{critical_nc} No Conformidad(es) Crítica(s) Abierta(s)",
+            "message": "Hay no conformidades críticas que requieren acción inmediata",
+            "count": critical_nc
+        })
+
+    # Documentos pendientes de revisión
+    pending_review = counts["documents"]["status"]["pending_review"]
+
+    if pending_review > 0:
+        alerts.append({
+            "type": "warning",
+            "title": f"{pending_review} Documento(s) Pendiente(s) de Revisión",
+            "message": "Hay documentos que requieren revisión y aprobación",
+            "count": pending_review
+        })
+
+    # Auditorías próximas a vencer (próximos 7 días)
+    if upcoming_audits > 0:
+        alerts.append({
+            "type": "info",
+            "title": f"{upcoming_audits} Auditoría(s) Próxima(s)",
+            "message": "Hay auditorías programadas para los próximos 7 días",
+            "count": upcoming_audits
+        })
+
+    return {
+        "alerts": alerts,
+        "total_alerts": len(alerts),
+        "critical_count": len([a for a in alerts if a["type"] == "critical"]),
+        "warning_count": len([a for a in alerts if a["type"] == "warning"]),
+        "info_count": len([a for a in alerts if a["type"] == "info"])
+    }
+
+
+async def compute_alerts(db) -> dict:
+    """Evaluar las alertas (contadores y auditorías próximas) con su marca de tiempo"""
+    counts = await get_counts(db, Document, Incident, NonConformity)
+    now = datetime.utcnow()
+    upcoming_audits = await db.scalar(upcoming_audits_query(now))
+    return {**build_alerts(counts, upcoming_audits), "generated_at": now.isoformat()}
+
+
+class AlertEvaluator:
+    """Mantiene en memoria el último conjunto de alertas calculado"""
+
+    def __init__(self, interval: float, debounce: float):
+        self.interval = interval
+        self.debounce = debounce
+        self.snapshot: Optional[dict] = None
+        self.refreshes = 0
+        self._loop = None
+        self._wake = None
+        self._task = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def mark_dirty(self, tables):
+        """Pedir un recálculo (se puede llamar desde cualquier hilo)"""
+        if self._loop is not None and ALERT_TABLES.intersection(tables):
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def refresh(self) -> dict:
+        # Sesión sobre la base de datos principal: una réplica podría no tener aún la escritura
+        async with AsyncSessionLocal() as db:
+            self.snapshot = await compute_alerts(db)
+        self.refreshes += 1
+        return self.snapshot
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+                await asyncio.sleep(self.debounce)
+            except asyncio.TimeoutError:
+                pass
+            # Las escrituras durante el recálculo vuelven a activar el evento
+            self._wake.clear()
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("Alert evaluation failed")
+
+    async def start(self):
+        """Calcular las alertas y lanzar el recálculo periódico en el bucle actual"""
+        if response_cache.backend.name == "memory" and int(os.getenv("WEB_CONCURRENCY", "1")) > 1:
+            logger.warning(
+                f"CACHE_BACKEND=memory with several workers: writes handled by other workers reach "
+                f"the dashboard alerts only after up to {self.interval:.0f}s (use sqlite or redis)"
+            )
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        try:
+            await self.refresh()
+        except Exception:
+            logger.exception("Initial alert evaluation failed")
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        self._loop = None
+
+    async def get(self, db) -> dict:
+        """Último conjunto de alertas; sin evaluador en marcha se calcula en el momento"""
+        if self.running and self.snapshot is not None:
+            return self.snapshot
+        return await compute_alerts(db)
+
+
+alert_evaluator = AlertEvaluator(ALERTS_REFRESH_INTERVAL, ALERTS_DEBOUNCE)
+on_tables_written(alert_evaluator.mark_dirty)
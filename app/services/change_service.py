@@ -0,0 +1,195 @@
+"""
+Servicio de cambios para la sincronización incremental
+Registra en change_log, en la misma transacción que cada escritura ORM, la
+última operación de cada fila (upsert o delete) con una secuencia monótona.
+GET /api/{entidad}/changes?since=<token> lee solo las entradas posteriores al
+token por el índice (table_name, seq), así que el coste de sincronizar es
+proporcional a los cambios y no al tamaño de la tabla.
+
+Cada fila conserva solo su última entrada: un cliente que sincroniza tarde
+recibe el estado final de la fila una sola vez, y las filas borradas quedan
+como tombstone.
+
+El token no puede saltar un cambio que aún no se ha confirmado:
+- SQLite serializa las escrituras, así que el orden de la secuencia es el
+  orden de commit.
+- En PostgreSQL una transacción puede confirmar una secuencia mayor antes que
+  otra en curso confirme una menor. Cada entrada guarda el txid de su
+  transacción, las entradas se recorren en orden (txid, seq) y solo se
+  entregan las de transacciones anteriores al xmin de la instantánea (todas
+  terminadas); las transacciones en curso o posteriores tienen un txid mayor
+  y quedan detrás del token.
+El registro y las filas se leen en una sola consulta, con una única instantánea.
+
+Las escrituras que no pasan por el ORM no quedan registradas (los borrados
+masivos deben llamar a record_changes); para registrar de nuevo todas las filas:
+    python -m app.services.change_service
+"""
+from typing import Iterable, Optional
+from fastapi import HTTPException, status
+from sqlalchemy import event, delete, func, insert, literal, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.database import engine
+from app.models.change_log import ChangeLogEntry
+from app.models.incident import Incident
+from app.models.non_conformity import NonConformity
+from app.models.document import Document
+from app.models.audit import Audit
+from app.models.kpi import KPI, KPIMeasurement
+from app.models.business_continuity import BusinessContinuityPlan, EmergencySimulation
+from app.serialization import type_adapter
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Cambios por respuesta (por defecto y máximo de ?limit=)
+CHANGES_LIMIT = int(os.getenv("CHANGES_LIMIT", "500"))
+CHANGES_MAX_LIMIT = int(os.getenv("CHANGES_MAX_LIMIT", "5000"))
+
+CHANGE_TRACKED_MODELS = (
+    Incident, NonConformity, Document, Audit, KPI, KPIMeasurement, BusinessContinuityPlan, EmergencySimulation
+)
+
+UPSERT = "upsert"
+DELETE = "delete"
+
+
+def current_txid(dialect_name: str):
+    """txid de la transacción que escribe (0 en SQLite, donde el orden de la secuencia basta)"""
+    # txid_current() y txid_snapshot_xmin() usan el mismo txid de 64 bits
+    return func.txid_current() if dialect_name == "postgresql" else literal(0)
+
+
+def record_changes(connection, table_name: str, row_ids: Iterable[int], op: str):
+    """Registrar la operación de unas filas sustituyendo su entrada anterior"""
+    row_ids = list(row_ids)
+    if not row_ids:
+        return
+    table = ChangeLogEntry.__table__
+    connection.execute(delete(table).where(table.c.table_name == table_name, table.c.row_id.in_(row_ids)))
+    connection.execute(
+        insert(table).values(txid=current_txid(connection.dialect.name)),
+        [{"table_name": table_name, "row_id": row_id, "op": op} for row_id in row_ids],
+    )
+
+
+def register_listeners(model):
+    """Registrar los listeners de inserción, actualización y borrado de un modelo"""
+    table_name = model.__tablename__
+
+    @event.listens_for(model, "after_insert")
+    def after_insert(mapper, connection, target):
+        record_changes(connection, table_name, [target.id], UPSERT)
+
+    @event.listens_for(model, "after_update")
+    def after_update(mapper, connection, target):
+        record_changes(connection, table_name, [target.id], UPSERT)
+
+    @event.listens_for(model, "after_delete")
+    def after_delete(mapper, connection, target):
+        record_changes(connection, table_name, [target.id], DELETE)
+
+
+for _model in CHANGE_TRACKED_MODELS:
+    register_listeners(_model)
+
+
+def parse_token(since: Optional[str]) -> tuple:
+    """(txid, seq) del token (sin token: desde el principio)"""
+    if not since:
+        return 0, 0
+    try:
+        position = tuple(int(part) for part in since.split("."))
+    except ValueError:
+        position = ()
+    # En SQLite el token es solo la secuencia
+    if len(position) == 1:
+        position = (0, *position)
+    if len(position) != 2 or min(position) < 0:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid change token: {since}")
+    return position
+
+
+def format_token(txid: int, seq: int) -> str:
+    return f"{txid}.{seq}" if txid else str(seq)
+
+
+def get_limit(limit: int = CHANGES_LIMIT) -> int:
+    """Dependency del número de cambios por respuesta (?limit=)"""
+    if not 1 <= limit <= CHANGES_MAX_LIMIT:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"limit must be between 1 and {CHANGES_MAX_LIMIT}"
+        )
+    return limit
+
+
+async def get_changes(db: AsyncSession, model, schema, since: Optional[str], limit: int) -> dict:
+    """
+    Cambios de un modelo posteriores al token, en orden de commit
+    Las filas modificadas se devuelven con `schema`; las borradas, como tombstone
+    ({"op": "delete", "id": ...}). Con has_more el cliente repite con el nuevo token.
+    """
+    after = parse_token(since)
+    connection = await db.connection()
+    # El registro y las filas en la misma consulta (misma instantánea)
+    query = (
+        select(ChangeLogEntry.txid, ChangeLogEntry.seq, ChangeLogEntry.row_id, ChangeLogEntry.op, model)
+        .outerjoin(model, model.id == ChangeLogEntry.row_id)
+        .where(
+            ChangeLogEntry.table_name == model.__tablename__,
+            tuple_(ChangeLogEntry.txid, ChangeLogEntry.seq) > tuple_(*after),
+        )
+        .order_by(ChangeLogEntry.txid, ChangeLogEntry.seq)
+        .limit(limit + 1)
+    )
+    if connection.dialect.name == "postgresql":
+        # Solo transacciones terminadas: las que siguen en curso quedan detrás del token
+        query = query.where(ChangeLogEntry.txid < func.txid_snapshot_xmin(func.txid_current_snapshot()))
+    entries = (await db.execute(query)).all()
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    adapter = type_adapter(schema)
+    changes = []
+    for txid, seq, row_id, op, row in entries:
+        if op != UPSERT or row is None:
+            changes.append({"seq": seq, "op": DELETE, "id": row_id})
+            continue
+        data = adapter.dump_python(adapter.validate_python(row, from_attributes=True), mode="json")
+        changes.append({"seq": seq, "op": UPSERT, "id": row_id, "data": data})
+    return {
+        "changes": changes,
+        "token": format_token(*(entries[-1][:2] if entries else after)),
+        "has_more": has_more,
+    }
+
+
+def backfill(bind=None) -> int:
+    """Registrar todas las filas actuales como upsert (se conservan los tombstones)"""
+    bind = bind or engine
+    table = ChangeLogEntry.__table__
+    total = 0
+    # Las escrituras concurrentes durante la reconstrucción pueden perderse;
+    # ejecutar con poco tráfico
+    with bind.begin() as connection:
+        for model in CHANGE_TRACKED_MODELS:
+            table_name = model.__tablename__
+            connection.execute(delete(table).where(
+                table.c.table_name == table_name,
+                (table.c.op == UPSERT) | table.c.row_id.in_(select(model.id)),
+            ))
+            rows = select(
+                literal(table_name), model.id, literal(UPSERT), current_txid(connection.dialect.name)
+            ).order_by(model.id)
+            total += connection.execute(
+                insert(table).from_select(["table_name", "row_id", "op", "txid"], rows)
+            ).rowcount
+    logger.info(f"Change log backfilled with {total} rows")
+    return total
+
+
+if __name__ == "__main__":
+    total = backfill()
+    print(f"✅ Registro de cambios reconstruido ({total} filas)")
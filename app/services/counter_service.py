@@ -0,0 +1,238 @@
+"""
+Servicio de contadores incrementales
+Mantiene la tabla entity_counters en la misma transacción que cada escritura
+ORM, de modo que las estadísticas se leen sin recorrer las tablas.
+
+Las escrituras que no pasan por el ORM (inserciones masivas, SQL directo)
+no actualizan los contadores; para reconstruirlos y medir la desviación:
+    python -m app.services.counter_service [--check]
+"""
+from collections import Counter
+from itertools import product
+from typing import Dict, List
+from sqlalchemy import event, func, inspect, select, delete, insert, update
+from sqlalchemy.dialects import postgresql, sqlite
+from app.models.database import engine
+from app.models import user, document, non_conformity, incident, audit, business_continuity, notification, kpi, change_control
+from app.models.counter import EntityCounter
+from app.models.incident import Incident
+from app.models.non_conformity import NonConformity
+from app.models.document import Document
+from app.models.audit import Audit
+from app.models.kpi import KPI
+from app.models.business_continuity import BusinessContinuityPlan, EmergencySimulation
+import logging
+import sys
+
+logger = logging.getLogger(__name__)
+
+# Dimensiones contadas por modelo (una tupla es una combinación de columnas)
+COUNTED_MODELS = {
+    Incident: ("status", "priority", ("priority", "status")),
+    NonConformity: ("status", "severity", ("severity", "status")),
+    Document: ("status",),
+    Audit: ("status", "audit_type"),
+    KPI: ("kpi_type",),
+    BusinessContinuityPlan: ("status",),
+    EmergencySimulation: ("status",),
+}
+
+TOTAL_DIMENSION = "total"
+TOTAL_VALUE = "all"
+NULL_VALUE = "none"
+
+UPSERT_DIALECTS = {
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
+
+
+def dimension_columns(dimension) -> tuple:
+    return dimension if isinstance(dimension, tuple) else (dimension,)
+
+
+def dimension_name(dimension) -> str:
+    """Nombre almacenado de una dimensión ("status" o "priority,status")"""
+    return ",".join(dimension_columns(dimension))
+
+
+def normalize_value(value) -> str:
+    """Valor almacenado de un campo (los enums se guardan por su valor)"""
+    if value is None:
+        return NULL_VALUE
+    return str(getattr(value, "value", value))
+
+
+def counter_keys(model, values: dict) -> list:
+    """Claves (dimensión, valor) que cuentan una fila con los valores dados"""
+    keys = [(TOTAL_DIMENSION, TOTAL_VALUE)]
+    for dimension in COUNTED_MODELS[model]:
+        columns = dimension_columns(dimension)
+        keys.append((dimension_name(dimension), ",".join(normalize_value(values[c]) for c in columns)))
+    return keys
+
+
+def counted_columns(model) -> set:
+    return {column for dimension in COUNTED_MODELS[model] for column in dimension_columns(dimension)}
+
+
+def current_values(model, target) -> dict:
+    return {column: getattr(target, column) for column in counted_columns(model)}
+
+
+def previous_values(model, target) -> dict:
+    """Valores antes del flush en curso (historial de atributos)"""
+    state = inspect(target)
+    values = {}
+    for column in counted_columns(model):
+        history = state.attrs[column].history
+        values[column] = history.deleted[0] if history.deleted else getattr(target, column)
+    return values
+
+
+def apply_deltas(connection, entity: str, deltas: Counter):
+    """Sumar los incrementos a los contadores dentro de la transacción actual"""
+    table = EntityCounter.__table__
+    upsert = UPSERT_DIALECTS.get(connection.dialect.name)
+    for (dimension, value), delta in deltas.items():
+        if delta == 0:
+            continue
+        key = {"entity": entity, "dimension": dimension, "value": value}
+        if upsert is not None:
+            stmt = upsert(table).values(**key, count=delta)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c.entity, table.c.dimension, table.c.value],
+                set_={"count": table.c.count + stmt.excluded.count, "updated_at": func.now()},
+            )
+            connection.execute(stmt)
+            continue
+        updated = connection.execute(
+            update(table).where(
+                table.c.entity == entity, table.c.dimension == dimension, table.c.value == value
+            ).values(count=table.c.count + delta, updated_at=func.now())
+        ).rowcount
+        if not updated:
+            connection.execute(insert(table).values(**key, count=delta))
+
+
+def register_listeners(model):
+    """Registrar los listeners de inserción, actualización y borrado de un modelo"""
+    entity = model.__tablename__
+
+    # Cargar el valor anterior al asignar, para poder descontarlo en after_update
+    for column in counted_columns(model):
+        event.listen(getattr(model, column), "set", lambda *args: None, active_history=True)
+
+    @event.listens_for(model, "after_insert")
+    def after_insert(mapper, connection, target):
+        apply_deltas(connection, entity, Counter(counter_keys(model, current_values(model, target))))
+
+    @event.listens_for(model, "after_update")
+    def after_update(mapper, connection, target):
+        deltas = Counter(counter_keys(model, current_values(model, target)))
+        deltas.subtract(counter_keys(model, previous_values(model, target)))
+        apply_deltas(connection, entity, deltas)
+
+    @event.listens_for(model, "after_delete")
+    def after_delete(mapper, connection, target):
+        deltas = Counter()
+        deltas.subtract(counter_keys(model, previous_values(model, target)))
+        apply_deltas(connection, entity, deltas)
+
+
+for _model in COUNTED_MODELS:
+    register_listeners(_model)
+
+
+def empty_counts(model) -> dict:
+    """Contadores a cero para todos los miembros de los enums de cada dimensión"""
+    counts = {TOTAL_DIMENSION: 0}
+    for dimension in COUNTED_MODELS[model]:
+        members = [
+            [member.value for member in getattr(model, column).type.enum_class]
+            for column in dimension_columns(dimension)
+        ]
+        counts[dimension_name(dimension)] = {",".join(combo): 0 for combo in product(*members)}
+    return counts
+
+
+def counters_query(*models):
+    """Consulta de los contadores almacenados para varias entidades"""
+    return select(EntityCounter).where(EntityCounter.entity.in_([m.__tablename__ for m in models]))
+
+
+def build_counts(models, rows) -> Dict[str, dict]:
+    """Agrupar filas de contadores: {tabla: {"total": n, dimensión: {valor: n}}}"""
+    result = {model.__tablename__: empty_counts(model) for model in models}
+    for row in rows:
+        counts = result[row.entity]
+        if row.dimension == TOTAL_DIMENSION:
+            counts[TOTAL_DIMENSION] = row.count
+        elif row.dimension in counts:
+            counts[row.dimension][row.value] = row.count
+    return result
+
+
+async def get_counts(db, *models) -> Dict[str, dict]:
+    """Leer los contadores de varias entidades en una sola consulta (AsyncSession)"""
+    result = await db.execute(counters_query(*models))
+    return build_counts(models, result.scalars().all())
+
+
+def compute_counts(connection, model) -> Counter:
+    """Recontar una entidad desde su tabla (una consulta GROUP BY por dimensión)"""
+    counts = Counter({(TOTAL_DIMENSION, TOTAL_VALUE): connection.scalar(select(func.count()).select_from(model))})
+    for dimension in COUNTED_MODELS[model]:
+        columns = [getattr(model, column) for column in dimension_columns(dimension)]
+        for row in connection.execute(select(*columns, func.count()).group_by(*columns)):
+            value = ",".join(normalize_value(v) for v in row[:-1])
+            counts[(dimension_name(dimension), value)] = row[-1]
+    return counts
+
+
+def reconcile(bind=None, fix: bool = True) -> List[dict]:
+    """Reconstruir los contadores desde cero y devolver la desviación encontrada"""
+    bind = bind or engine
+    table = EntityCounter.__table__
+    drift = []
+    # Las escrituras concurrentes durante la reconstrucción pueden perderse;
+    # ejecutar con poco tráfico o repetir con --check para confirmar
+    with (bind.begin() if fix else bind.connect()) as connection:
+        for model in COUNTED_MODELS:
+            entity = model.__tablename__
+            actual = compute_counts(connection, model)
+            stored = Counter({
+                (row.dimension, row.value): row.count
+                for row in connection.execute(select(table).where(table.c.entity == entity))
+            })
+            for dimension, value in sorted(set(actual) | set(stored)):
+                if actual[(dimension, value)] != stored[(dimension, value)]:
+                    drift.append({
+                        "entity": entity,
+                        "dimension": dimension,
+                        "value": value,
+                        "stored": stored[(dimension, value)],
+                        "actual": actual[(dimension, value)],
+                    })
+            if fix:
+                connection.execute(delete(table).where(table.c.entity == entity))
+                rows = [
+                    {"entity": entity, "dimension": dimension, "value": value, "count": count}
+                    for (dimension, value), count in actual.items() if count
+                ]
+                if rows:
+                    connection.execute(insert(table), rows)
+    if drift:
+        logger.warning(f"Counter drift found in {len(drift)} counters")
+    return drift
+
+
+if __name__ == "__main__":
+    check_only = "--check" in sys.argv[1:]
+    drift = reconcile(fix=not check_only)
+    for entry in drift:
+        print(f"   - {entry['entity']}.{entry['dimension']}={entry['value']}: almacenado {entry['stored']}, real {entry['actual']}")
+    if check_only:
+        print(f"{'❌' if drift else '✅'} Contadores con desviación: {len(drift)}")
+        sys.exit(1 if drift else 0)
+    print(f"✅ Contadores reconstruidos (desviación corregida en {len(drift)} contadores)")
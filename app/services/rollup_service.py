@@ -0,0 +1,223 @@
+"""
+Servicio de agregados diarios de actividad
+Mantiene la tabla daily_rollups (conteos por métrica y día) en la misma
+transacción que cada escritura ORM, de modo que las tendencias del dashboard
+se leen sin recorrer las tablas de origen.
+
+Las escrituras que no pasan por el ORM no actualizan los agregados; para
+reconstruirlos desde las tablas y medir la desviación:
+    python -m app.services.rollup_service [--check]
+"""
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from typing import List
+from sqlalchemy import event, func, inspect, select, delete, insert, update
+from app.models.database import engine
+from app.models.rollup import DailyRollup
+from app.models.incident import Incident
+from app.models.non_conformity import NonConformity
+from app.models.document import Document
+from app.services.counter_service import UPSERT_DIALECTS
+from app.services.stats_service import day_bucket
+import logging
+import sys
+
+logger = logging.getLogger(__name__)
+
+# Métricas diarias: nombre -> (modelo, columna de fecha que sitúa la fila en un día)
+ROLLUP_METRICS = {
+    "incidents_opened": (Incident, "created_at"),
+    "incidents_closed": (Incident, "closed_at"),
+    "non_conformities_raised": (NonConformity, "created_at"),
+    "documents_approved": (Document, "approved_at"),
+}
+
+# Tablas de origen (sus escrituras invalidan las tendencias cacheadas)
+ROLLUP_SOURCE_TABLES = tuple(sorted({model.__tablename__ for model, _ in ROLLUP_METRICS.values()}))
+
+
+def to_day(value):
+    """Día UTC de una fecha u hora (None si no hay valor)"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        return value.date()
+    return value
+
+
+def apply_deltas(connection, deltas: Counter):
+    """Sumar los incrementos a los agregados dentro de la transacción actual"""
+    table = DailyRollup.__table__
+    upsert = UPSERT_DIALECTS.get(connection.dialect.name)
+    for (metric, day), delta in deltas.items():
+        if delta == 0:
+            continue
+        if upsert is not None:
+            stmt = upsert(table).values(metric=metric, day=day, count=delta)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c.metric, table.c.day],
+                set_={"count": table.c.count + stmt.excluded.count, "updated_at": func.now()},
+            )
+            connection.execute(stmt)
+            continue
+        updated = connection.execute(
+            update(table).where(table.c.metric == metric, table.c.day == day)
+            .values(count=table.c.count + delta, updated_at=func.now())
+        ).rowcount
+        if not updated:
+            connection.execute(insert(table).values(metric=metric, day=day, count=delta))
+
+
+def register_listeners(model, metrics: dict):
+    """Registrar los listeners de un modelo para sus métricas ({métrica: columna})"""
+
+    # Cargar el valor anterior al asignar, para poder descontarlo en after_update
+    for column in set(metrics.values()):
+        event.listen(getattr(model, column), "set", lambda *args: None, active_history=True)
+
+    @event.listens_for(model, "after_insert")
+    def after_insert(mapper, connection, target):
+        values = inspect(target).dict
+        deltas = Counter()
+        for metric, column in metrics.items():
+            # Sin valor en memoria: created_at lo rellena la base de datos con la hora actual
+            value = values.get(column)
+            if value is None and column == "created_at":
+                value = datetime.utcnow()
+            if value is not None:
+                deltas[(metric, to_day(value))] += 1
+        apply_deltas(connection, deltas)
+
+    @event.listens_for(model, "after_update")
+    def after_update(mapper, connection, target):
+        state = inspect(target)
+        deltas = Counter()
+        for metric, column in metrics.items():
+            history = state.attrs[column].history
+            if not history.has_changes():
+                continue
+            old = to_day(history.deleted[0]) if history.deleted else None
+            new = to_day(history.added[0]) if history.added else None
+            if old == new:
+                continue
+            if old is not None:
+                deltas[(metric, old)] -= 1
+            if new is not None:
+                deltas[(metric, new)] += 1
+        apply_deltas(connection, deltas)
+
+    @event.listens_for(model, "after_delete")
+    def after_delete(mapper, connection, target):
+        state = inspect(target)
+        deltas = Counter()
+        for metric, column in metrics.items():
+            history = state.attrs[column].history
+            day = to_day(history.deleted[0] if history.deleted else getattr(target, column))
+            if day is not None:
+                deltas[(metric, day)] -= 1
+        apply_deltas(connection, deltas)
+
+
+for _model in {model for model, _ in ROLLUP_METRICS.values()}:
+    register_listeners(_model, {
+        metric: column for metric, (model, column) in ROLLUP_METRICS.items() if model is _model
+    })
+
+
+def bucket_start(day: date, bucket: str) -> date:
+    """Inicio del periodo de un día (el mismo día, el lunes de la semana o el día 1 del mes)"""
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+
+def bucket_starts(start: date, end: date, bucket: str) -> List[date]:
+    """Periodos que cubren el intervalo [start, end]"""
+    starts = []
+    current = bucket_start(start, bucket)
+    while current <= end:
+        starts.append(current)
+        if bucket == "week":
+            current += timedelta(days=7)
+        elif bucket == "month":
+            current = (current.replace(day=28) + timedelta(days=4)).replace(day=1)
+        else:
+            current += timedelta(days=1)
+    return starts
+
+
+def rollups_query(start: date, end: date):
+    """Agregados de todas las métricas entre dos días (incluidos)"""
+    return select(DailyRollup.metric, DailyRollup.day, DailyRollup.count).where(
+        DailyRollup.metric.in_(list(ROLLUP_METRICS)),
+        DailyRollup.day >= start,
+        DailyRollup.day <= end,
+    )
+
+
+async def get_trends(db, start: date, end: date, bucket: str = "day") -> dict:
+    """Series por periodo de cada métrica, leídas solo de los agregados (AsyncSession)"""
+    series = {period: dict.fromkeys(ROLLUP_METRICS, 0) for period in bucket_starts(start, end, bucket)}
+    result = await db.execute(rollups_query(start, end))
+    for metric, day, count in result.all():
+        series[bucket_start(to_day(day), bucket)][metric] += count
+    return {
+        "from": start,
+        "to": end,
+        "bucket": bucket,
+        "metrics": list(ROLLUP_METRICS),
+        "series": [{"period": period, **counts} for period, counts in series.items()],
+        "totals": {metric: sum(counts[metric] for counts in series.values()) for metric in ROLLUP_METRICS},
+    }
+
+
+def compute_rollups(connection, metric: str) -> Counter:
+    """Recalcular una métrica desde su tabla (una consulta GROUP BY por día)"""
+    model, column = ROLLUP_METRICS[metric]
+    day = day_bucket(getattr(model, column))
+    query = select(day, func.count()).where(getattr(model, column).isnot(None)).group_by(day)
+    return Counter({(metric, to_day(value)): count for value, count in connection.execute(query)})
+
+
+def backfill(bind=None, fix: bool = True) -> List[dict]:
+    """Reconstruir los agregados desde las tablas de origen y devolver la desviación encontrada"""
+    bind = bind or engine
+    table = DailyRollup.__table__
+    drift = []
+    # Las escrituras concurrentes durante la reconstrucción pueden perderse;
+    # ejecutar con poco tráfico o repetir con --check para confirmar
+    with (bind.begin() if fix else bind.connect()) as connection:
+        for metric in ROLLUP_METRICS:
+            actual = compute_rollups(connection, metric)
+            stored = Counter({
+                (metric, to_day(row.day)): row.count
+                for row in connection.execute(select(table).where(table.c.metric == metric))
+            })
+            for key in sorted(set(actual) | set(stored)):
+                if actual[key] != stored[key]:
+                    drift.append({"metric": metric, "day": key[1], "stored": stored[key], "actual": actual[key]})
+            if fix:
+                connection.execute(delete(table).where(table.c.metric == metric))
+                rows = [{"metric": metric, "day": day, "count": count} for (_, day), count in actual.items() if count]
+                if rows:
+                    connection.execute(insert(table), rows)
+    if drift:
+        logger.warning(f"Rollup drift found in {len(drift)} days")
+    return drift
+
+
+if __name__ == "__main__":
+    check_only = "--check" in sys.argv[1:]
+    drift = backfill(fix=not check_only)
+    for entry in drift:
+        print(f"   - {entry['metric']} {entry['day']}: almacenado {entry['stored']}, real {entry['actual']}")
+    if check_only:
+        print(f"{'❌' if drift else '✅'} Días con desviación: {len(drift)}")
+        sys.exit(1 if drift else 0)
+    print(f"✅ Agregados diarios reconstruidos (desviación corregida en {len(drift)} días)")
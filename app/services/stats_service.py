@@ -0,0 +1,165 @@
+"""
+Motor de estadísticas agrupadas
+Cuenta las filas de un modelo por dimensiones (estado, prioridad, tipo,
+responsable...) con una consulta GROUP BY por dimensión y, opcionalmente,
+por periodo (día, semana o mes). Los enums se devuelven con todos sus
+miembros, aunque su conteo sea cero.
+"""
+from itertools import product
+from typing import Optional, Sequence
+from fastapi import HTTPException, status
+from sqlalchemy import select, func, String
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+from app.services.counter_service import (
+    COUNTED_MODELS, TOTAL_DIMENSION, NULL_VALUE, dimension_columns, dimension_name, normalize_value, get_counts
+)
+
+BUCKETS = ("day", "week", "month")
+
+
+class day_bucket(FunctionElement):
+    """Día de una fecha (YYYY-MM-DD)"""
+    type = String()
+    name = "day_bucket"
+    inherit_cache = True
+
+
+class week_bucket(FunctionElement):
+    """Lunes de la semana de una fecha (YYYY-MM-DD)"""
+    type = String()
+    name = "week_bucket"
+    inherit_cache = True
+
+
+class month_bucket(FunctionElement):
+    """Primer día del mes de una fecha (YYYY-MM-DD)"""
+    type = String()
+    name = "month_bucket"
+    inherit_cache = True
+
+
+# SQLite (y dialectos sin implementación propia)
+@compiles(day_bucket)
+def _sqlite_day_bucket(element, compiler, **kw):
+    return "date(%s)" % compiler.process(element.clauses, **kw)
+
+
+@compiles(week_bucket)
+def _sqlite_week_bucket(element, compiler, **kw):
+    return "date(%s, 'weekday 0', '-6 days')" % compiler.process(element.clauses, **kw)
+
+
+@compiles(month_bucket)
+def _sqlite_month_bucket(element, compiler, **kw):
+    return "date(%s, 'start of month')" % compiler.process(element.clauses, **kw)
+
+
+# PostgreSQL
+@compiles(day_bucket, "postgresql")
+def _pg_day_bucket(element, compiler, **kw):
+    return "to_char(date_trunc('day', %s), 'YYYY-MM-DD')" % compiler.process(element.clauses, **kw)
+
+
+@compiles(week_bucket, "postgresql")
+def _pg_week_bucket(element, compiler, **kw):
+    return "to_char(date_trunc('week', %s), 'YYYY-MM-DD')" % compiler.process(element.clauses, **kw)
+
+
+@compiles(month_bucket, "postgresql")
+def _pg_month_bucket(element, compiler, **kw):
+    return "to_char(date_trunc('month', %s), 'YYYY-MM-DD')" % compiler.process(element.clauses, **kw)
+
+
+BUCKET_FUNCTIONS = {
+    "day": day_bucket,
+    "week": week_bucket,
+    "month": month_bucket,
+}
+
+
+def get_bucket(bucket: str = None) -> Optional[str]:
+    """Dependency para validar el parámetro bucket (day, week o month)"""
+    if bucket is not None and bucket not in BUCKETS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid bucket: {bucket}. Use one of: {', '.join(BUCKETS)}"
+        )
+    return bucket
+
+
+def empty_dimension(model, dimension) -> dict:
+    """Conteos a cero para cada combinación de miembros de enum (vacío si no es enum)"""
+    members = []
+    for column in dimension_columns(dimension):
+        enum_class = getattr(getattr(model, column).type, "enum_class", None)
+        if enum_class is None:
+            return {}
+        members.append([member.value for member in enum_class])
+    return {",".join(combo): 0 for combo in product(*members)}
+
+
+def uses_counters(model, dimensions, bucket, where) -> bool:
+    """Indica si la consulta puede responderse con la tabla de contadores"""
+    if bucket or where or model not in COUNTED_MODELS:
+        return False
+    counted = {dimension_name(d) for d in COUNTED_MODELS[model]}
+    return all(dimension_name(d) in counted for d in dimensions)
+
+
+def grouped_stats_query(model, dimension, bucket: str = None, date_column: str = "created_at", where=()):
+    """Consulta GROUP BY de una dimensión (y del periodo, si se indica)"""
+    keys = [getattr(model, column) for column in dimension_columns(dimension)]
+    if bucket:
+        keys.insert(0, BUCKET_FUNCTIONS[bucket](getattr(model, date_column)).label("bucket"))
+    return select(*keys, func.count().label("count")).select_from(model).where(*where).group_by(*keys)
+
+
+async def grouped_stats(
+    db,
+    model,
+    dimensions: Sequence = (),
+    bucket: str = None,
+    date_column: str = "created_at",
+    where: Sequence = ()
+) -> dict:
+    """
+    Conteos de un modelo por dimensión: {"total": n, dimensión: {valor: n}}
+    Con bucket, cada dimensión se desglosa por periodo: {dimensión: {periodo: {valor: n}}}
+    Una dimensión puede ser una columna ("status") o una combinación (("priority", "status")).
+    """
+    if bucket is not None and bucket not in BUCKETS:
+        raise ValueError(f"Unknown bucket: {bucket}")
+
+    # Sin filtros ni periodo se usan los contadores incrementales
+    if uses_counters(model, dimensions, bucket, where):
+        counts = (await get_counts(db, model))[model.__tablename__]
+        return {
+            TOTAL_DIMENSION: counts[TOTAL_DIMENSION],
+            **{dimension_name(d): counts[dimension_name(d)] for d in dimensions}
+        }
+
+    result = {TOTAL_DIMENSION: None}
+    for dimension in dimensions:
+        rows = (await db.execute(grouped_stats_query(model, dimension, bucket, date_column, where))).all()
+        total = 0
+        if bucket:
+            series = {}
+            for row in rows:
+                period = row[0] or NULL_VALUE
+                value = ",".join(normalize_value(v) for v in row[1:-1])
+                series.setdefault(period, empty_dimension(model, dimension))[value] = row[-1]
+                total += row[-1]
+            counts = dict(sorted(series.items()))
+        else:
+            counts = empty_dimension(model, dimension)
+            for row in rows:
+                counts[",".join(normalize_value(v) for v in row[:-1])] = row[-1]
+                total += row[-1]
+        result[dimension_name(dimension)] = counts
+        # Cada GROUP BY cubre todas las filas, así que su suma es el total
+        result[TOTAL_DIMENSION] = total
+
+    if result[TOTAL_DIMENSION] is None:
+        result[TOTAL_DIMENSION] = await db.scalar(select(func.count()).select_from(model).where(*where))
+    return result
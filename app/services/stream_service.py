@@ -0,0 +1,202 @@
+"""
+Difusión de estado por Server-Sent Events
+Un Broadcaster calcula un estado compartido (p. ej. estadísticas y alertas del
+dashboard) una sola vez por cambio y reparte el resultado, ya codificado, a
+todos los suscriptores. Cada suscriptor recibe primero el estado completo
+(evento "snapshot") y después solo las secciones y campos que cambian
+(evento "delta").
+"""
+from datetime import datetime
+from typing import Awaitable, Callable, Iterable, Optional
+from app.models.database import AsyncSessionLocal
+import asyncio
+import contextvars
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Recalcular al menos con esta cadencia aunque no haya escrituras (segundos)
+STREAM_REFRESH_INTERVAL = float(os.getenv("STREAM_REFRESH_INTERVAL", "60"))
+# Espera tras una escritura para agrupar ráfagas en un solo recálculo (segundos)
+STREAM_DEBOUNCE = float(os.getenv("STREAM_DEBOUNCE", "0.5"))
+# Comentario periódico para que proxies y balanceadores no cierren la conexión (segundos)
+STREAM_HEARTBEAT = float(os.getenv("STREAM_HEARTBEAT", "15"))
+# Duración máxima de una conexión; el cliente se reconecta (y revalida su token)
+STREAM_MAX_DURATION = float(os.getenv("STREAM_MAX_DURATION", "600"))
+# Eventos pendientes por suscriptor antes de sustituirlos por un snapshot
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "8"))
+
+HEARTBEAT = b": ping\n\n"
+# Espera antes de reconectar que se indica a los clientes EventSource (milisegundos)
+RETRY = b"retry: 3000\n\n"
+
+
+def encode_event(event: str, event_id: int, data: dict) -> bytes:
+    """Codificar un evento SSE"""
+    payload = json.dumps(data, default=str, separators=(",", ":"))
+    return f"id: {event_id}\nevent: {event}\ndata: {payload}\n\n".encode()
+
+
+def diff_state(previous: dict, current: dict) -> dict:
+    """Secciones del estado que cambian; en las secciones dict, solo los campos cambiados"""
+    delta = {}
+    for section, value in current.items():
+        old = previous.get(section)
+        if value == old:
+            continue
+        if isinstance(value, dict) and isinstance(old, dict):
+            delta[section] = {key: item for key, item in value.items() if old.get(key) != item}
+        else:
+            delta[section] = value
+    return delta
+
+
+class Broadcaster:
+    """Estado compartido recalculado al escribir en sus tablas y difundido a los suscriptores"""
+
+    def __init__(
+        self,
+        compute: Callable[..., Awaitable[dict]],
+        tables: Iterable[str],
+        interval: float = STREAM_REFRESH_INTERVAL,
+        debounce: float = STREAM_DEBOUNCE,
+        queue_size: int = STREAM_QUEUE_SIZE,
+    ):
+        self.compute = compute
+        self.tables = set(tables)
+        self.interval = interval
+        self.debounce = debounce
+        self.queue_size = queue_size
+        self.state: Optional[dict] = None
+        self.version = 0
+        self.generated_at: Optional[str] = None
+        self.subscribers = set()
+        self.computations = 0
+        self.events = 0
+        self.resyncs = 0
+        self._loop = None
+        self._wake = None
+        self._task = None
+        self._ready = None
+        self._lock = None
+
+    def mark_dirty(self, tables):
+        """Pedir un recálculo (se puede llamar desde cualquier hilo)"""
+        if self._loop is not None and self.tables.intersection(tables):
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def snapshot_event(self) -> bytes:
+        return encode_event("snapshot", self.version, {"generated_at": self.generated_at, **self.state})
+
+    async def refresh(self):
+        """Recalcular el estado y difundir los cambios"""
+        async with self._lock:
+            # Sesión sobre la base de datos principal: una réplica podría no tener aún la escritura
+            async with AsyncSessionLocal() as db:
+                state = await self.compute(db)
+            self.computations += 1
+            self.generated_at = datetime.utcnow().isoformat()
+            if self.state is None:
+                self.state = state
+                return
+            delta = diff_state(self.state, state)
+            self.state = state
+            if delta:
+                self.version += 1
+                self.publish(encode_event("delta", self.version, {"generated_at": self.generated_at, **delta}))
+
+    def publish(self, event: bytes):
+        """Encolar un evento ya codificado para todos los suscriptores"""
+        self.events += 1
+        for queue in self.subscribers:
+            if queue.full():
+                # Cliente lento: descartar lo pendiente y enviarle el estado completo
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(self.snapshot_event())
+                self.resyncs += 1
+            else:
+                queue.put_nowait(event)
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+                await asyncio.sleep(self.debounce)
+            except asyncio.TimeoutError:
+                pass
+            # Las escrituras durante el recálculo vuelven a activar el evento
+            self._wake.clear()
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("Broadcast refresh failed")
+
+    def _start(self):
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._lock = asyncio.Lock()
+        # Contexto vacío: las consultas del recálculo no deben contarse en la petición que lo arranca
+        self._task = asyncio.create_task(self._run(), context=contextvars.Context())
+        # Sin suscriptores no se recalculaba: el estado guardado puede estar desfasado
+        self._ready = asyncio.create_task(self.refresh(), context=contextvars.Context())
+
+    def _stop(self):
+        if self._task is not None:
+            self._task.cancel()
+        self._task = None
+        self._loop = None
+
+    async def subscribe(self) -> asyncio.Queue:
+        """Añadir un suscriptor; su cola empieza con el estado completo"""
+        if self._task is None:
+            self._start()
+        elif self._ready.done() and (self._ready.cancelled() or self._ready.exception()):
+            self._ready = asyncio.create_task(self.refresh(), context=contextvars.Context())
+        try:
+            # Los suscriptores que llegan a la vez esperan el mismo cálculo
+            await asyncio.shield(self._ready)
+        except Exception:
+            if not self.subscribers:
+                self._stop()
+            raise
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        queue.put_nowait(self.snapshot_event())
+        self.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        """Quitar un suscriptor; con el último se detiene el recálculo"""
+        self.subscribers.discard(queue)
+        if not self.subscribers:
+            self._stop()
+
+    async def stream(self, max_duration: float = STREAM_MAX_DURATION, heartbeat: float = STREAM_HEARTBEAT):
+        """Generador de eventos SSE para una conexión"""
+        queue = await self.subscribe()
+        try:
+            yield RETRY
+            deadline = asyncio.get_running_loop().time() + max_duration
+            while True:
+                remaining = deadline - asyncio.get_running_loop().time()
+                if remaining <= 0:
+                    break
+                try:
+                    yield await asyncio.wait_for(queue.get(), timeout=min(heartbeat, remaining))
+                except asyncio.TimeoutError:
+                    yield HEARTBEAT
+        finally:
+            self.unsubscribe(queue)
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self.subscribers),
+            "running": self._task is not None,
+            "version": self.version,
+            "generated_at": self.generated_at,
+            "computations": self.computations,
+            "events": self.events,
+            "resyncs": self.resyncs,
+        }
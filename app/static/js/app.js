@@ -75,6 +75,7 @@ class SGCNApp {
                 localStorage.setItem('token', this.token);
                 localStorage.setItem('user', JSON.stringify(this.user));
                 this.showApp();
+                this.loadDashboard();
                 this.showNotification('Login exitoso', 'success');
             } else {
                 const error = await response.json();
@@ -86,6 +87,7 @@ class SGCNApp {
     }
 
     logout() {
+        this.stopDashboardStream();
         this.token = null;
         this.user = null;
         localStorage.removeItem('token');
@@ -129,23 +131,104 @@ class SGCNApp {
         }
     }
 
-    async loadDashboard() {
+    loadDashboard() {
         if (!this.token) return;
 
-        try {
-            const response = await fetch('/api/dashboard/stats', {
-                headers: {
-                    'Authorization': `Bearer ${this.token}`
+        // Las estadísticas llegan por el stream: una sola conexión para toda la sesión
+        if (this.dashboardStream) {
+            if (this.dashboardState) this.renderDashboard(this.dashboardState.stats);
+            return;
+        }
+        this.startDashboardStream();
+    }
+
+    async startDashboardStream() {
+        // fetch en lugar de EventSource para poder enviar la cabecera Authorization
+        const controller = new AbortController();
+        this.dashboardStream = controller;
+        let retryDelay = 1000;
+
+        while (this.dashboardStream === controller) {
+            try {
+                const response = await fetch('/api/dashboard/stream', {
+                    headers: {
+                        'Authorization': `Bearer ${this.token}`
+                    },
+                    signal: controller.signal
+                });
+
+                if (response.status === 401) {
+                    this.logout();
+                    return;
+                }
+                if (!response.ok) {
+                    throw new Error(`Error ${response.status}: ${response.statusText}`);
                 }
-            });
 
-            if (response.ok) {
-                const data = await response.json();
-                this.renderDashboard(data);
+                retryDelay = 1000;
+                await this.readDashboardStream(response.body);
+            } catch (error) {
+                if (controller.signal.aborted) return;
+                console.error('Error in dashboard stream:', error);
             }
-        } catch (error) {
-            console.error('Error loading dashboard:', error);
+
+            // El servidor cierra la conexión periódicamente: reconectar
+            await new Promise(resolve => setTimeout(resolve, retryDelay));
+            retryDelay = Math.min(retryDelay * 2, 30000);
+        }
+    }
+
+    stopDashboardStream() {
+        if (this.dashboardStream) {
+            this.dashboardStream.abort();
+            this.dashboardStream = null;
+        }
+        this.dashboardState = null;
+    }
+
+    async readDashboardStream(body) {
+        const reader = body.pipeThrough(new TextDecoderStream()).getReader();
+        let buffer = '';
+
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) return;
+
+            buffer += value;
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                this.handleDashboardEvent(buffer.slice(0, boundary));
+                buffer = buffer.slice(boundary + 2);
+            }
+        }
+    }
+
+    handleDashboardEvent(block) {
+        let event = 'message';
+        const data = [];
+        block.split('\n').forEach(line => {
+            if (line.startsWith('event:')) event = line.slice(6).trim();
+            if (line.startsWith('data:')) data.push(line.slice(5).trim());
+        });
+
+        // Los heartbeats y la indicación de reintento no llevan datos
+        if (data.length === 0) return;
+        const payload = JSON.parse(data.join('\n'));
+
+        if (event === 'snapshot') {
+            this.dashboardState = payload;
+        } else if (event === 'delta' && this.dashboardState) {
+            // Un delta solo trae los campos que cambian de cada sección
+            Object.entries(payload).forEach(([section, value]) => {
+                const current = this.dashboardState[section];
+                const isObject = item => item && typeof item === 'object' && !Array.isArray(item);
+                this.dashboardState[section] = isObject(current) && isObject(value) ? { ...current, ...value } : value;
+            });
+        } else {
+            return;
         }
+
+        this.renderDashboard(this.dashboardState.stats);
     }
 
     renderDashboard(data) {
@@ -276,7 +359,7 @@ class SGCNApp {
     }
 
     async loadDocuments() {
-        const response = await this.apiCall('/documents/');
+        const response = await this.apiCall('/documents/?fields=title,document_type,version,status,created_at');
         const content = document.getElementById('mainContent');
         
         content.innerHTML = `
@@ -325,7 +408,7 @@ class SGCNApp {
     }
 
     async loadIncidents() {
-        const response = await this.apiCall('/incidents/');
+        const response = await this.apiCall('/incidents/?fields=title,incident_type,priority,status,created_at');
         const content = document.getElementById('mainContent');
         
         content.innerHTML = `
@@ -374,7 +457,7 @@ class SGCNApp {
     }
 
     async loadNonConformities() {
-        const response = await this.apiCall('/non-conformities/');
+        const response = await this.apiCall('/non-conformities/?fields=title,severity,status,location,created_at');
         const content = document.getElementById('mainContent');
         
         content.innerHTML = `
@@ -423,7 +506,7 @@ class SGCNApp {
     }
 
     async loadAudits() {
-        const response = await this.apiCall('/audits/');
+        const response = await this.apiCall('/audits/?fields=title,audit_type,status,planned_start_date,findings_count');
         const content = document.getElementById('mainContent');
         
         content.innerHTML = `
@@ -509,8 +592,10 @@ class SGCNApp {
     }
 
     async loadBusinessContinuity() {
-        const plansResponse = await this.apiCall('/business-continuity/plans/');
-        const simulationsResponse = await this.apiCall('/business-continuity/simulations/');
+        const [plansResponse, simulationsResponse] = await this.apiBatch([
+            '/business-continuity/plans/',
+            '/business-continuity/simulations/'
+        ]);
         const content = document.getElementById('mainContent');
         
         content.innerHTML = `
@@ -603,6 +688,28 @@ class SGCNApp {
         return await response.json();
     }
 
+    // Varias peticiones GET en una sola llamada a /api/batch; devuelve los cuerpos en el mismo orden.
+    // Toda vista que necesite más de un recurso debe cargarlos con apiBatch (una sola petición por vista)
+    async apiBatch(endpoints) {
+        const data = await this.apiCall('/batch', {
+            method: 'POST',
+            body: JSON.stringify({
+                requests: endpoints.map((endpoint, index) => ({ id: String(index), path: `${this.apiBase}${endpoint}` }))
+            })
+        });
+
+        return data.responses.map(item => {
+            if (item.status === 401) {
+                this.logout();
+                throw new Error('No autorizado');
+            }
+            if (item.status >= 400) {
+                throw new Error(`Error ${item.status}: ${endpoints[Number(item.id)]}`);
+            }
+            return item.body;
+        });
+    }
+
     showNotification(message, type = 'info') {
         // Create notification element
         const notification = document.createElement('div');
@@ -0,0 +1,11 @@
+"""
+Estadísticas comunes de los benchmarks
+"""
+import statistics
+
+
+def p95(timings) -> float:
+    """Percentil 95 interpolado entre las muestras (con una sola muestra, esa muestra)"""
+    if len(timings) < 2:
+        return timings[0]
+    return statistics.quantiles(timings, n=20, method="inclusive")[18]
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Coherencia de la caché con varios workers de uvicorn
+
+Arranca la aplicación con --workers N y el almacén de caché indicado sobre una
+SQLite temporal. Llena las cachés de todos los workers (estadísticas del
+dashboard y alertas), registra un incidente crítico a través de uno de ellos
+y mide cuánto tardan todas las respuestas, atienda el worker que atienda, en
+reflejar el cambio.
+
+Con --backend memory cada worker conserva su copia hasta que caduca; con
+sqlite o redis la invalidación llega a todos. Para redis sin --redis-url se
+usa como sustituto local un servidor fakeredis (pip install fakeredis).
+
+Uso:
+    python benchmarks/cache_workers.py --backend sqlite --workers 4
+    python benchmarks/cache_workers.py --backend redis --redis-url redis://localhost:6379/0
+"""
+import sys
+import os
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+import argparse
+import subprocess
+import tempfile
+import threading
+import time
+
+import httpx
+
+from benchmarks.dashboard_stream import free_port, seed_admin
+
+
+def start_redis_stand_in() -> str:
+    """Servidor compatible con el protocolo de Redis en un hilo (fakeredis)"""
+    from fakeredis import TcpFakeServer
+    port = free_port()
+    server = TcpFakeServer(("127.0.0.1", port), server_type="redis")
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"redis://127.0.0.1:{port}/0"
+
+
+def fresh(client: httpx.Client, headers: dict, expected: int) -> bool:
+    """Indica si las respuestas de las estadísticas y de las alertas reflejan el cambio"""
+    stats = client.get("/api/dashboard/stats", headers=headers).json()
+    alerts = client.get("/api/dashboard/alerts", headers=headers).json()
+    critical = any("Crítico" in alert["title"] for alert in alerts["alerts"])
+    return stats["total_incidents"] == expected and critical
+
+
+def run_benchmark(base_url: str, samples: int, timeout: float):
+    with httpx.Client(base_url=base_url, timeout=30) as client:
+        token = client.post("/api/auth/login", data={"username": "bench", "password": "bench"}).json()["access_token"]
+        auth = {"Authorization": f"Bearer {token}"}
+
+        def sample(expected: int) -> bool:
+            # Conexión nueva en cada muestra para repartirlas entre los workers
+            with httpx.Client(base_url=base_url, timeout=30) as one_shot:
+                return fresh(one_shot, auth, expected)
+
+        for _ in range(samples):
+            sample(0)  # llenar las cachés de todos los workers
+        incident = {
+            "title": "Incidente", "description": "Benchmark", "incident_type": "other", "priority": "critical",
+            "occurred_at": "2026-01-01T00:00:00", "detected_at": "2026-01-01T00:00:00",
+        }
+        client.post("/api/incidents/", headers=auth, json=incident).raise_for_status()
+        written = time.perf_counter()
+
+        # Muestrear hasta obtener `samples` respuestas actualizadas seguidas
+        stale, last_stale, streak = 0, None, 0
+        while streak < samples and time.perf_counter() - written < timeout:
+            if sample(1):
+                streak += 1
+            else:
+                stale += 1
+                streak = 0
+                last_stale = time.perf_counter() - written
+        cache = client.get("/api/admin/cache", headers=auth).json()
+    return stale, last_stale, streak, cache
+    
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=("memory", "sqlite", "redis"), default="sqlite")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--samples", type=int, default=40, help="Respuestas actualizadas seguidas que se exigen")
+    parser.add_argument("--timeout", type=float, default=10, help="Espera máxima a que todos los workers coincidan (segundos)")
+    parser.add_argument("--redis-url", default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        env = dict(os.environ)
+        env["DATABASE_URL"] = f"sqlite:///{os.path.join(tmpdir, 'workers.db')}"
+        env["CACHE_BACKEND"] = args.backend
+        env["CACHE_SQLITE_PATH"] = os.path.join(tmpdir, "cache.db")
+        env["CACHE_REDIS_PREFIX"] = f"bench:{os.getpid()}:"
+        env.setdefault("SQLITE_PROFILE", "production")
+        env.setdefault("SLOW_QUERY_THRESHOLD_MS", "0")
+        if args.backend == "redis":
+            env["CACHE_REDIS_URL"] = args.redis_url or start_redis_stand_in()
+        subprocess.run([sys.executable, "-m", "app.migrate"], cwd=ROOT, env=env, capture_output=True, check=True)
+        seed_admin(env["DATABASE_URL"])
+
+        port = free_port()
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+             "--workers", str(args.workers), "--log-level", "warning"],
+            cwd=ROOT, env=env,
+        )
+        try:
+            base_url = f"http://127.0.0.1:{port}"
+            for _ in range(100):
+                try:
+                    httpx.get(f"{base_url}/health")
+                    break
+                except httpx.TransportError:
+                    time.sleep(0.1)
+            time.sleep(1)  # dar tiempo a que arranquen todos los workers
+            stale, last_stale, streak, cache = run_benchmark(base_url, args.samples, args.timeout)
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    print(f"Almacén: {args.backend}, workers: {args.workers}")
+    print(f"respuestas desactualizadas tras la escritura: {stale}")
+    if last_stale is not None:
+        print(f"última respuesta desactualizada a los {last_stale * 1000:.0f} ms")
+    if streak < args.samples:
+        print(f"❌ tras {args.timeout:.0f} s los workers seguían sirviendo datos desactualizados")
+    else:
+        print(f"✅ {args.samples} respuestas seguidas actualizadas")
+    print(f"caché del worker consultado: aciertos={cache['hits']} fallos={cache['misses']} "
+          f"invalidaciones recibidas de otros workers={cache['received']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la sincronización incremental (GET /api/incidents/changes)
+
+Carga N incidentes, registra todas las filas en change_log (como la primera
+migración) y deja un cliente sincronizado con el último token. Después, para
+cada volumen de cambios, modifica y borra incidentes por el ORM y mide:
+- la sincronización incremental desde el token (todas las páginas de ?limit=)
+- volver a descargar la tabla completa (GET /api/incidents/export)
+La primera debe crecer con los cambios y no con el tamaño de la tabla.
+
+Uso:
+    python benchmarks/changes.py --rows 300000 --changes 10,100,1000
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import random
+import tempfile
+import time
+
+from benchmarks.pagination import seed
+
+
+def sync(client, headers, token: str, limit: int) -> tuple:
+    """Leer todas las páginas de cambios desde `token`: (nuevo token, cambios, tombstones, peticiones)"""
+    changes = tombstones = requests = 0
+    while True:
+        response = client.get(f"/api/incidents/changes?since={token}&limit={limit}", headers=headers)
+        response.raise_for_status()
+        body = response.json()
+        requests += 1
+        changes += len(body["changes"])
+        tombstones += sum(1 for change in body["changes"] if change["op"] == "delete")
+        token = body["token"]
+        if not body["has_more"]:
+            return token, changes, tombstones, requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=300000, help="Incidentes a cargar")
+    parser.add_argument("--changes", default="10,100,1000", help="Volúmenes de cambios a sincronizar")
+    parser.add_argument("--limit", type=int, default=500, help="Cambios por petición")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        # La aplicación lee la configuración al importarse
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+        os.environ.setdefault("SLOW_QUERY_THRESHOLD_MS", "0")
+        os.environ["CACHE_ENABLED"] = "False"
+        from fastapi.testclient import TestClient
+        from app.main import app
+        from app.migrate import migrate
+        from app.models.database import engine, SessionLocal
+        from app.models.incident import Incident, IncidentStatus
+        from app.services.change_service import backfill
+
+        migrate(engine)
+        start = time.perf_counter()
+        seed(engine, args.rows)
+        # La carga masiva no pasa por el ORM: registrar las filas como la primera migración
+        backfill(engine)
+        print(f"{args.rows:,} incidentes cargados y registrados en {time.perf_counter() - start:.1f} s\n")
+
+        rnd = random.Random(42)
+        alive = list(range(1, args.rows + 1))
+        with TestClient(app) as client:
+            token = client.post("/api/auth/login", data={"username": "bench", "password": "bench"}).json()["access_token"]
+            headers = {"Authorization": f"Bearer {token}"}
+
+            start = time.perf_counter()
+            sync_token, changes, _, requests = sync(client, headers, "", args.limit)
+            print(f"Sincronización inicial: {changes:,} cambios en {requests} peticiones, "
+                  f"{time.perf_counter() - start:.1f} s (token {sync_token})\n")
+
+            for volume in (int(value) for value in args.changes.split(",")):
+                # 90 % modificaciones y 10 % borrados, por el ORM (los listeners registran los cambios)
+                rnd.shuffle(alive)
+                touched, alive = alive[:volume], alive[volume:]
+                deleted = touched[:volume // 10]
+                with SessionLocal() as db:
+                    for incident in db.query(Incident).filter(Incident.id.in_(touched)):
+                        if incident.id in deleted:
+                            db.delete(incident)
+                        else:
+                            incident.status = IncidentStatus.CLOSED
+                    db.commit()
+                alive += [incident_id for incident_id in touched if incident_id not in deleted]
+
+                start = time.perf_counter()
+                sync_token, changes, tombstones, requests = sync(client, headers, sync_token, args.limit)
+                incremental = (time.perf_counter() - start) * 1000
+                start = time.perf_counter()
+                size = len(client.get("/api/incidents/export", headers=headers).content)
+                full = (time.perf_counter() - start) * 1000
+                print(f"{volume:>6,} cambios: incremental {incremental:8.1f} ms ({changes:,} cambios, "
+                      f"{tombstones:,} tombstones, {requests} peticiones)  "
+                      f"tabla completa {full:8.1f} ms ({size / 1024 / 1024:.0f} MiB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark de arranque en frío de un worker
+
+Mide, en procesos nuevos, el tiempo de importar app.main y el de completar
+el arranque (lifespan) hasta poder atender la primera petición. También mide
+por separado la comprobación del esquema (create_all), que los workers ya no
+ejecutan al importar la aplicación.
+
+Uso:
+    python benchmarks/cold_start.py --runs 10
+"""
+import sys
+import os
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+import argparse
+import json
+import statistics
+import subprocess
+import tempfile
+
+# Código ejecutado en cada proceso hijo
+WORKER = """
+import json, time
+start = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(app.main.app) as client:
+    ready = time.perf_counter()
+    client.get("/health")
+    served = time.perf_counter()
+from app.models.database import Base, create_db_engine
+bind = create_db_engine()
+checked = time.perf_counter()
+Base.metadata.create_all(bind=bind)
+schema_ms = (time.perf_counter() - checked) * 1000
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "startup_ms": (ready - imported) * 1000,
+    "first_request_ms": (served - start) * 1000,
+    "schema_check_ms": schema_ms,
+}))
+"""
+
+
+def run_worker(env: dict) -> dict:
+    """Arrancar un proceso nuevo y devolver sus tiempos"""
+    output = subprocess.run(
+        [sys.executable, "-c", WORKER], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--database-url", default=None, help="Base de datos a usar (por defecto una SQLite temporal migrada)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        env = dict(os.environ)
+        env["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(tmpdir, 'cold_start.db')}"
+        # El esquema se crea antes de medir, como en un despliegue
+        subprocess.run([sys.executable, "-m", "app.migrate"], cwd=ROOT, env=env, capture_output=True, check=True)
+
+        results = [run_worker(env) for _ in range(args.runs)]
+
+    print(f"Ejecuciones: {args.runs}")
+    for key in ("import_ms", "startup_ms", "first_request_ms", "schema_check_ms"):
+        values = [r[key] for r in results]
+        print(f"{key:<18} mediana={statistics.median(values):8.1f} ms  min={min(values):8.1f} ms  max={max(values):8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
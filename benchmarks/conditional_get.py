@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark de peticiones GET condicionales (ETag / If-None-Match)
+
+Compara, para listas y detalle de incidentes, la respuesta completa con la
+revalidación de un cliente que ya tiene la última versión (304 Not Modified):
+bytes transferidos, tiempo por petición y CPU consumida por el proceso.
+
+Uso:
+    python benchmarks/conditional_get.py --rows 10000 --repeat 200
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from benchmarks._stats import p95
+
+
+def seed(bind, rows: int):
+    """Cargar `rows` incidentes y un usuario administrador"""
+    from sqlalchemy import insert
+    from app.auth import get_password_hash
+    from app.models.user import User, UserRole
+    from app.models.incident import Incident, IncidentType, IncidentPriority, IncidentStatus
+
+    now = datetime.utcnow()
+    rnd = random.Random(42)
+    with bind.begin() as conn:
+        conn.execute(insert(User).values(
+            username="bench", email="bench@example.com", full_name="Benchmark",
+            hashed_password=get_password_hash("bench"), role=UserRole.ADMIN, is_active=True,
+        ))
+        conn.execute(insert(Incident), [
+            {
+                "title": f"Incidente {i}",
+                "description": "Benchmark " * 20,
+                "incident_type": rnd.choice(list(IncidentType)),
+                "priority": rnd.choice(list(IncidentPriority)),
+                "status": rnd.choice(list(IncidentStatus)),
+                "impact_description": "Impacto " * 10,
+                "affected_systems": "erp, correo",
+                "occurred_at": now,
+                "detected_at": now,
+                "created_at": now - timedelta(minutes=i),
+            } for i in range(rows)
+        ])
+
+
+def measure(client, url: str, headers: dict, repeat: int):
+    """Tiempos (ms), CPU (ms) y bytes por petición"""
+    timings = []
+    cpu_start = time.process_time()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(url, headers=headers)
+        timings.append((time.perf_counter() - start) * 1000)
+    cpu_ms = (time.process_time() - cpu_start) * 1000 / repeat
+    return timings, cpu_ms, len(response.content), response.status_code
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000, help="Incidentes en la base de datos")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        # La aplicación lee la configuración al importarse
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+        os.environ.setdefault("SLOW_QUERY_THRESHOLD_MS", "0")
+        from fastapi.testclient import TestClient
+        from app.main import app
+        from app.migrate import migrate
+        from app.models.database import engine
+
+        migrate()
+        print(f"Cargando {args.rows} incidentes...")
+        seed(engine, args.rows)
+
+        urls = ["/api/incidents/?limit=100", "/api/incidents/?limit=1000", "/api/incidents/1"]
+        results = []
+        with TestClient(app) as client:
+            token = client.post("/api/auth/login", data={"username": "bench", "password": "bench"}).json()["access_token"]
+            auth = {"Authorization": f"Bearer {token}"}
+            for url in urls:
+                etag = client.get(url, headers=auth).headers["ETag"]
+                full = measure(client, url, auth, args.repeat)
+                conditional = measure(client, url, {**auth, "If-None-Match": etag}, args.repeat)
+                if full[3] != 200 or conditional[3] != 304:
+                    raise SystemExit(f"Respuestas inesperadas en {url}: {full[3]} / {conditional[3]}")
+                results.append((url, full, conditional))
+        engine.dispose()
+
+    print(f"Incidentes: {args.rows}, repeticiones: {args.repeat}")
+    for url, full, conditional in results:
+        print(url)
+        for name, (timings, cpu_ms, size, status_code) in (("200 completa", full), ("304 condicional", conditional)):
+            print(
+                f"  {name:<16} bytes={size:>8}  mediana={statistics.median(timings):7.2f} ms  "
+                f"p95={p95(timings):7.2f} ms  cpu={cpu_ms:7.2f} ms"
+            )
+        print(
+            f"  ahorro: {full[2] - conditional[2]} bytes por petición, "
+            f"{statistics.median(full[0]) / statistics.median(conditional[0]):.1f}x más rápida, "
+            f"{full[1] / conditional[1]:.1f}x menos CPU"
+        )
+
+
+if __name__ == "__main__":
+    main()
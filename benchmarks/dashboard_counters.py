@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Benchmark de los contadores del dashboard
+
+Compara las 13 sentencias COUNT(*) que usaban /api/dashboard/stats y
+/api/dashboard/alerts con dos alternativas de una sola sentencia
+(agregación condicional por tabla con SUM(CASE ...) y subconsultas
+escalares) y con la tabla de contadores incrementales que usa el dashboard.
+Comprueba que todas devuelven los mismos valores.
+
+Uso:
+    python benchmarks/dashboard_counters.py --rows 100000 --repeat 20
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, func, case, true, insert
+
+from app.models.database import Base, create_db_engine
+from app.models import user, document, non_conformity, incident, audit, business_continuity, notification, kpi, change_control
+from app.models.document import Document, DocumentType, DocumentStatus
+from app.models.incident import Incident, IncidentType, IncidentPriority, IncidentStatus
+from app.models.non_conformity import NonConformity, NonConformitySeverity, NonConformityStatus
+from app.models.audit import Audit, AuditType, AuditStatus
+from app.models.kpi import KPI, KPIType, KPIMeasurementUnit
+from app.services.alert_service import upcoming_audits_query
+from app.services.counter_service import counters_query, build_counts, reconcile
+from benchmarks._stats import p95
+
+
+def seed(bind, rows: int):
+    """Cargar `rows` filas en cada tabla del dashboard"""
+    now = datetime.utcnow()
+    rnd = random.Random(42)
+    with bind.begin() as conn:
+        conn.execute(insert(Document), [
+            {
+                "title": f"Documento {i}",
+                "document_type": rnd.choice(list(DocumentType)),
+                "status": rnd.choice(list(DocumentStatus)),
+                "created_at": now - timedelta(minutes=i),
+            } for i in range(rows)
+        ])
+        conn.execute(insert(Incident), [
+            {
+                "title": f"Incidente {i}",
+                "description": "Benchmark",
+                "incident_type": rnd.choice(list(IncidentType)),
+                "priority": rnd.choice(list(IncidentPriority)),
+                "status": rnd.choice(list(IncidentStatus)),
+                "occurred_at": now,
+                "detected_at": now,
+                "created_at": now - timedelta(minutes=i),
+            } for i in range(rows)
+        ])
+        conn.execute(insert(NonConformity), [
+            {
+                "title": f"No conformidad {i}",
+                "description": "Benchmark",
+                "severity": rnd.choice(list(NonConformitySeverity)),
+                "status": rnd.choice(list(NonConformityStatus)),
+                "detected_date": now,
+                "created_at": now - timedelta(minutes=i),
+            } for i in range(rows)
+        ])
+        conn.execute(insert(Audit), [
+            {
+                "title": f"Auditoría {i}",
+                "audit_type": rnd.choice(list(AuditType)),
+                "status": rnd.choice(list(AuditStatus)),
+                "planned_start_date": now + timedelta(hours=rnd.randint(-2000, 2000)),
+            } for i in range(rows)
+        ])
+        conn.execute(insert(KPI), [
+            {
+                "name": f"KPI {i}",
+                "kpi_type": rnd.choice(list(KPIType)),
+                "measurement_unit": rnd.choice(list(KPIMeasurementUnit)),
+            } for i in range(rows)
+        ])
+
+
+def dashboard_counter_queries(now: datetime) -> dict:
+    """Una consulta COUNT por contador del dashboard"""
+    open_statuses = ["open", "in_progress"]
+    return {
+        "total_documents": select(func.count(Document.id)),
+        "pending_documents": select(func.count(Document.id)).where(Document.status.in_(["draft", "pending_review"])),
+        "pending_review_documents": select(func.count(Document.id)).where(Document.status == "pending_review"),
+        "total_incidents": select(func.count(Incident.id)),
+        "open_incidents": select(func.count(Incident.id)).where(Incident.status.in_(open_statuses)),
+        "critical_incidents": select(func.count(Incident.id)).where(
+            Incident.priority == "critical", Incident.status.in_(open_statuses)
+        ),
+        "total_non_conformities": select(func.count(NonConformity.id)),
+        "open_non_conformities": select(func.count(NonConformity.id)).where(NonConformity.status.in_(open_statuses)),
+        "critical_non_conformities": select(func.count(NonConformity.id)).where(
+            NonConformity.severity == "critical", NonConformity.status.in_(open_statuses)
+        ),
+        "total_audits": select(func.count(Audit.id)),
+        "planned_audits": select(func.count(Audit.id)).where(Audit.status == "planned"),
+        "upcoming_audits": select(func.count(Audit.id)).where(
+            Audit.status == "planned",
+            Audit.planned_start_date >= now,
+            Audit.planned_start_date <= now + timedelta(days=7)
+        ),
+        "total_kpis": select(func.count(KPI.id)),
+    }
+
+
+def dashboard_counters_query(now: datetime):
+    """Una subconsulta escalar por contador, combinadas en una sentencia"""
+    return select(*[
+        query.scalar_subquery().label(name) for name, query in dashboard_counter_queries(now).items()
+    ])
+
+
+def count_where(condition):
+    """Conteo condicional: SUM(CASE WHEN condición THEN 1 ELSE 0 END)"""
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+def conditional_aggregation_query(now: datetime):
+    """Un agregado SUM(CASE ...) por tabla, combinados en una sentencia"""
+    open_statuses = ["open", "in_progress"]
+    documents = select(
+        func.count(Document.id).label("total_documents"),
+        count_where(Document.status.in_(["draft", "pending_review"])).label("pending_documents"),
+        count_where(Document.status == "pending_review").label("pending_review_documents"),
+    ).subquery()
+    incidents = select(
+        func.count(Incident.id).label("total_incidents"),
+        count_where(Incident.status.in_(open_statuses)).label("open_incidents"),
+        count_where((Incident.priority == "critical") & Incident.status.in_(open_statuses)).label("critical_incidents"),
+    ).subquery()
+    non_conformities = select(
+        func.count(NonConformity.id).label("total_non_conformities"),
+        count_where(NonConformity.status.in_(open_statuses)).label("open_non_conformities"),
+        count_where(
+            (NonConformity.severity == "critical") & NonConformity.status.in_(open_statuses)
+        ).label("critical_non_conformities"),
+    ).subquery()
+    audits = select(
+        func.count(Audit.id).label("total_audits"),
+        count_where(Audit.status == "planned").label("planned_audits"),
+        count_where(
+            (Audit.status == "planned")
+            & (Audit.planned_start_date >= now)
+            & (Audit.planned_start_date <= now + timedelta(days=7))
+        ).label("upcoming_audits"),
+    ).subquery()
+    kpis = select(func.count(KPI.id).label("total_kpis")).subquery()
+    return select(documents, incidents, non_conformities, audits, kpis).select_from(
+        documents.join(incidents, true()).join(non_conformities, true()).join(audits, true()).join(kpis, true())
+    )
+
+
+def legacy_counters(conn, now: datetime) -> dict:
+    """Una sentencia COUNT(*) por contador (implementación anterior)"""
+    return {name: conn.scalar(query) for name, query in dashboard_counter_queries(now).items()}
+
+
+def conditional_aggregation_counters(conn, now: datetime) -> dict:
+    """Una sentencia con SUM(CASE ...) por tabla"""
+    return dict(conn.execute(conditional_aggregation_query(now)).one()._mapping)
+
+
+def single_statement_counters(conn, now: datetime) -> dict:
+    """Una sentencia con una subconsulta escalar por contador"""
+    return dict(conn.execute(dashboard_counters_query(now)).one()._mapping)
+
+
+def entity_counter_counters(conn, now: datetime) -> dict:
+    """Tabla de contadores incrementales más la consulta de auditorías próximas (dashboard)"""
+    models = (Document, Incident, NonConformity, Audit, KPI)
+    counts = build_counts(models, conn.execute(counters_query(*models)))
+    documents, incidents, non_conformities, audits = (
+        counts["documents"], counts["incidents"], counts["non_conformities"], counts["audits"]
+    )
+    return {
+        "total_documents": documents["total"],
+        "pending_documents": documents["status"]["draft"] + documents["status"]["pending_review"],
+        "pending_review_documents": documents["status"]["pending_review"],
+        "total_incidents": incidents["total"],
+        "open_incidents": incidents["status"]["open"] + incidents["status"]["in_progress"],
+        "critical_incidents": (
+            incidents["priority,status"]["critical,open"] + incidents["priority,status"]["critical,in_progress"]
+        ),
+        "total_non_conformities": non_conformities["total"],
+        "open_non_conformities": non_conformities["status"]["open"] + non_conformities["status"]["in_progress"],
+        "critical_non_conformities": (
+            non_conformities["severity,status"]["critical,open"]
+            + non_conformities["severity,status"]["critical,in_progress"]
+        ),
+        "total_audits": audits["total"],
+        "planned_audits": audits["status"]["planned"],
+        "upcoming_audits": conn.scalar(upcoming_audits_query(now)),
+        "total_kpis": counts["kpis"]["total"],
+    }
+
+
+def measure(fn, bind, now: datetime, repeat: int):
+    """Ejecutar `fn` `repeat` veces y devolver (tiempos en ms, último resultado)"""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        with bind.connect() as conn:
+            start = time.perf_counter()
+            result = fn(conn, now)
+            timings.append((time.perf_counter() - start) * 1000)
+    return timings, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000, help="Filas por tabla")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--profile", default="production", help="Perfil de SQLite")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        bind = create_db_engine(f"sqlite:///{os.path.join(tmpdir, 'bench.db')}", sqlite_profile=args.profile)
+        Base.metadata.create_all(bind=bind)
+        print(f"Cargando {args.rows} filas por tabla...")
+        seed(bind, args.rows)
+        # La carga masiva no pasa por el ORM: poblar los contadores
+        reconcile(bind)
+
+        now = datetime.utcnow()
+        variants = [
+            ("13 x COUNT(*)", 13, legacy_counters),
+            ("SUM(CASE)", 1, conditional_aggregation_counters),
+            ("subconsultas", 1, single_statement_counters),
+            ("contadores", 2, entity_counter_counters),
+        ]
+        results = [(name, statements, *measure(fn, bind, now, args.repeat)) for name, statements, fn in variants]
+        bind.dispose()
+
+    expected = results[0][3]
+    for name, _, _, counters in results[1:]:
+        if counters != expected:
+            raise SystemExit(f"Resultados distintos:\n  COUNT(*): {expected}\n  {name}: {counters}")
+
+    print(f"Filas por tabla: {args.rows}, repeticiones: {args.repeat}")
+    for name, statements, timings, _ in results:
+        print(
+            f"{name:<14} sentencias={statements:>2}  mediana={statistics.median(timings):8.1f} ms  "
+            f"p95={p95(timings):8.1f} ms"
+        )
+    print(f"Contadores: {expected}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Prueba de carga del stream del dashboard (Server-Sent Events)
+
+Arranca la aplicación con uvicorn sobre una SQLite temporal, abre cientos de
+suscriptores a /api/dashboard/stream y registra ráfagas de incidentes. Mide el
+tiempo hasta recibir el snapshot inicial y la latencia hasta que todos los
+suscriptores reciben el delta, y comprueba que cada cambio se calcula una sola
+vez para todos (contadores de /api/admin/streams).
+
+Uso:
+    python benchmarks/dashboard_stream.py --subscribers 500 --bursts 5
+"""
+import sys
+import os
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+import argparse
+import asyncio
+import json
+import socket
+import statistics
+import subprocess
+import tempfile
+import time
+
+import httpx
+
+from benchmarks._stats import p95
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def seed_admin(url: str):
+    """Crear el usuario administrador con el que se conectan los suscriptores"""
+    from sqlalchemy import insert
+    from app.auth import get_password_hash
+    from app.models.database import create_db_engine
+    from app.models.user import User, UserRole
+
+    bind = create_db_engine(url)
+    with bind.begin() as conn:
+        conn.execute(insert(User).values(
+            username="bench", email="bench@example.com", full_name="Benchmark",
+            hashed_password=get_password_hash("bench"), role=UserRole.ADMIN, is_active=True,
+        ))
+    bind.dispose()
+
+
+class Subscriber:
+    """Conexión SSE que registra cuándo recibe cada evento"""
+
+    def __init__(self):
+        self.snapshot_at = None
+        self.total_incidents = None
+        self.updates = {}  # total_incidents -> instante de recepción
+        self.error = None
+
+    async def run(self, client: httpx.AsyncClient, headers: dict):
+        try:
+            async with client.stream("GET", "/api/dashboard/stream", headers=headers) as response:
+                event = None
+                async for line in response.aiter_lines():
+                    if line.startswith("event:"):
+                        event = line[6:].strip()
+                    elif line.startswith("data:"):
+                        self.handle(event, json.loads(line[5:]))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.error = repr(e)
+
+    def handle(self, event: str, data: dict):
+        now = time.perf_counter()
+        if event == "snapshot":
+            self.snapshot_at = now
+        total = data.get("stats", {}).get("total_incidents")
+        if total is not None:
+            self.total_incidents = total
+            self.updates.setdefault(total, now)
+
+
+async def wait_for(condition, timeout: float):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            return False
+        await asyncio.sleep(0.01)
+    return True
+
+
+async def run_benchmark(base_url: str, subscribers: int, bursts: int, writes: int, timeout: float):
+    limits = httpx.Limits(max_connections=subscribers + 10, max_keepalive_connections=subscribers + 10)
+    async with httpx.AsyncClient(base_url=base_url, timeout=None, limits=limits) as client:
+        token = (await client.post("/api/auth/login", data={"username": "bench", "password": "bench"})).json()["access_token"]
+        auth = {"Authorization": f"Bearer {token}"}
+
+        # Conectar todos los suscriptores a la vez
+        clients = [Subscriber() for _ in range(subscribers)]
+        start = time.perf_counter()
+        tasks = [asyncio.create_task(s.run(client, auth)) for s in clients]
+        if not await wait_for(lambda: all(s.snapshot_at for s in clients), timeout):
+            errors = [s.error for s in clients if s.error]
+            raise SystemExit(f"Solo {sum(1 for s in clients if s.snapshot_at)} suscriptores recibieron el snapshot {errors[:3]}")
+        connect_ms = [(s.snapshot_at - start) * 1000 for s in clients]
+        before = (await client.get("/api/admin/streams", headers=auth)).json()["dashboard"]
+
+        # Ráfagas de escrituras: cada una debe llegar a todos con un solo cálculo
+        fanout_ms = []
+        incident = {
+            "title": "Incidente", "description": "Benchmark", "incident_type": "other", "priority": "critical",
+            "occurred_at": "2026-01-01T00:00:00", "detected_at": "2026-01-01T00:00:00",
+        }
+        for _ in range(bursts):
+            for _ in range(writes):
+                response = await client.post("/api/incidents/", headers=auth, json=incident)
+                response.raise_for_status()
+            written = time.perf_counter()
+            expected = clients[0].total_incidents + writes
+            if not await wait_for(lambda: all(expected in s.updates for s in clients), timeout):
+                raise SystemExit(f"Solo {sum(1 for s in clients if expected in s.updates)} suscriptores recibieron el delta")
+            fanout_ms.extend((s.updates[expected] - written) * 1000 for s in clients)
+        after = (await client.get("/api/admin/streams", headers=auth)).json()["dashboard"]
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await asyncio.sleep(0.5)
+        closed = (await client.get("/api/admin/streams", headers=auth)).json()["dashboard"]
+
+    return connect_ms, fanout_ms, before, after, closed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--subscribers", type=int, default=500)
+    parser.add_argument("--bursts", type=int, default=5, help="Ráfagas de escrituras")
+    parser.add_argument("--writes", type=int, default=3, help="Incidentes por ráfaga")
+    parser.add_argument("--timeout", type=float, default=30, help="Espera máxima por paso (segundos)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        env = dict(os.environ)
+        env["DATABASE_URL"] = f"sqlite:///{os.path.join(tmpdir, 'stream.db')}"
+        env.setdefault("SQLITE_PROFILE", "production")
+        env.setdefault("SLOW_QUERY_THRESHOLD_MS", "0")
+        subprocess.run([sys.executable, "-m", "app.migrate"], cwd=ROOT, env=env, capture_output=True, check=True)
+        seed_admin(env["DATABASE_URL"])
+
+        port = free_port()
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+            cwd=ROOT, env=env,
+        )
+        try:
+            base_url = f"http://127.0.0.1:{port}"
+            for _ in range(100):
+                try:
+                    httpx.get(f"{base_url}/health")
+                    break
+                except httpx.TransportError:
+                    time.sleep(0.1)
+            connect_ms, fanout_ms, before, after, closed = asyncio.run(
+                run_benchmark(base_url, args.subscribers, args.bursts, args.writes, args.timeout)
+            )
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    print(f"Suscriptores: {args.subscribers}, ráfagas: {args.bursts} x {args.writes} incidentes")
+    print(
+        f"snapshot inicial  mediana={statistics.median(connect_ms):8.1f} ms  "
+        f"p95={p95(connect_ms):8.1f} ms  max={max(connect_ms):8.1f} ms"
+    )
+    print(
+        f"entrega del delta mediana={statistics.median(fanout_ms):8.1f} ms  "
+        f"p95={p95(fanout_ms):8.1f} ms  max={max(fanout_ms):8.1f} ms"
+    )
+    print(f"cálculos del estado: {before['computations']} al conectar, {after['computations'] - before['computations']} durante las ráfagas")
+    print(f"eventos difundidos: {after['events'] - before['events']}, reenvíos de snapshot a clientes lentos: {after['resyncs']}")
+    print(f"suscriptores tras cerrar: {closed['subscribers']} (recálculo activo: {closed['running']})")
+
+
+if __name__ == "__main__":
+    main()
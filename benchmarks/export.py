@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la exportación en streaming
+
+Carga N incidentes en una SQLite temporal, arranca uvicorn y descarga
+GET /api/incidents/export completo midiendo filas por segundo y la memoria
+residente (RSS) del servidor a medida que avanza la descarga: con el cursor
+del servidor la memoria debe mantenerse plana. Después abre otra exportación,
+corta la conexión tras unas pocas filas y mide la CPU que sigue gastando el
+servidor: si la consulta se cancela, queda en reposo.
+
+Solo Linux (lee /proc/<pid>).
+
+Uso:
+    python benchmarks/export.py --rows 1000000 --format ndjson
+"""
+import sys
+import os
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+import argparse
+import subprocess
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.dashboard_stream import free_port
+from benchmarks.pagination import seed
+
+
+def rss_mib(pid: int) -> float:
+    """Memoria residente actual de un proceso"""
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def cpu_seconds(pid: int) -> float:
+    """CPU consumida (usuario + sistema) por un proceso"""
+    with open(f"/proc/{pid}/stat") as stat:
+        fields = stat.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000000, help="Incidentes a cargar")
+    parser.add_argument("--format", choices=("ndjson", "csv"), default="ndjson")
+    parser.add_argument("--checkpoints", type=int, default=5, help="Mediciones de memoria durante la descarga")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        # La aplicación lee la configuración al importarse
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+        os.environ.setdefault("SLOW_QUERY_THRESHOLD_MS", "0")
+        from app.migrate import migrate
+        from app.models.database import engine
+
+        migrate(engine)
+        start = time.perf_counter()
+        seed(engine, args.rows)
+        engine.dispose()
+        print(f"{args.rows:,} incidentes cargados en {time.perf_counter() - start:.1f} s")
+
+        port = free_port()
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+            cwd=ROOT, env=dict(os.environ),
+        )
+        try:
+            base_url = f"http://127.0.0.1:{port}"
+            for _ in range(100):
+                try:
+                    httpx.get(f"{base_url}/health")
+                    break
+                except httpx.TransportError:
+                    time.sleep(0.1)
+            with httpx.Client(base_url=base_url, timeout=None) as client:
+                token = client.post("/api/auth/login", data={"username": "bench", "password": "bench"}).json()["access_token"]
+                headers = {"Authorization": f"Bearer {token}"}
+                url = f"/api/incidents/export?format={args.format}"
+                client.get(f"{url}&status_filter=closed", headers=headers)  # calentar
+                baseline = rss_mib(server.pid)
+                print(f"\nGET {url}")
+                print(f"RSS del servidor antes de exportar: {baseline:.1f} MiB")
+
+                every = max(1, args.rows // args.checkpoints)
+                lines, size, peak = 0, 0, baseline
+                start = time.perf_counter()
+                with client.stream("GET", url, headers=headers) as response:
+                    response.raise_for_status()
+                    for line in response.iter_lines():
+                        lines += 1
+                        size += len(line) + 1
+                        if lines % every == 0:
+                            current = rss_mib(server.pid)
+                            peak = max(peak, current)
+                            print(f"  {lines:>10,} líneas  RSS {current:7.1f} MiB")
+                seconds = time.perf_counter() - start
+                records = lines - 1 if args.format == "csv" else lines
+                print(f"{records:,} filas en {seconds:.1f} s ({records / seconds:,.0f} filas/s, "
+                      f"{size / 1024 / 1024 / seconds:.1f} MiB/s, {size / 1024 / 1024:.0f} MiB)")
+                print(f"RSS máximo durante la descarga: {peak:.1f} MiB (+{peak - baseline:.1f} MiB)")
+
+                # Desconexión a mitad de la exportación
+                with client.stream("GET", url, headers=headers) as response:
+                    for index, _ in enumerate(response.iter_lines()):
+                        if index == 1000:
+                            break
+                cut = time.perf_counter()
+                time.sleep(0.5)  # el servidor detecta el cierre de la conexión
+                cpu_start = cpu_seconds(server.pid)
+                time.sleep(2)
+                idle_cpu = cpu_seconds(server.pid) - cpu_start
+                print(f"\nConexión cortada tras 1.000 filas; CPU del servidor en los 2 s siguientes: "
+                      f"{idle_cpu * 1000:.0f} ms ({'consulta cancelada' if idle_cpu < 0.5 else 'la consulta SIGUE en curso'})")
+                # El servidor sigue atendiendo peticiones después del corte
+                health = client.get("/health").status_code
+                print(f"/health tras el corte: {health} ({(time.perf_counter() - cut) * 1000:.0f} ms después)")
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
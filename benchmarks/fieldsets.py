@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Benchmark de listas con campos a elección (?fields=)
+
+Carga N incidentes (con descripción e impacto de texto largo) y compara la
+lista completa con la misma lista pidiendo solo las columnas que muestra la
+tabla del frontend. Para cada variante mide tiempo, memoria máxima en el
+proceso (tracemalloc) y tamaño del JSON.
+
+Uso:
+    python benchmarks/fieldsets.py --rows 10000 --fields title,status,priority,created_at
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import tempfile
+
+from benchmarks.conditional_get import seed
+from benchmarks.serialization import measure
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000, help="Incidentes a cargar y pedir en una página")
+    parser.add_argument("--fields", default="title,status,priority,created_at")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        # La aplicación lee la configuración al importarse
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+        os.environ.setdefault("SLOW_QUERY_THRESHOLD_MS", "0")
+        os.environ["CACHE_ENABLED"] = "False"
+        os.environ["ETAG_ENABLED"] = "False"
+        from fastapi.testclient import TestClient
+        from app.main import app
+        from app.migrate import migrate
+        from app.models.database import engine
+
+        migrate(engine)
+        seed(engine, args.rows)
+
+        print(f"GET /api/incidents/ con {args.rows} filas (mediana de {args.repeat} repeticiones)")
+        with TestClient(app) as client:
+            token = client.post("/api/auth/login", data={"username": "bench", "password": "bench"}).json()["access_token"]
+            headers = {"Authorization": f"Bearer {token}"}
+            for name, url in (
+                ("completa", f"/api/incidents/?limit={args.rows}"),
+                (f"fields={args.fields}", f"/api/incidents/?limit={args.rows}&fields={args.fields}"),
+            ):
+                seconds, peak, response = measure(lambda: client.get(url, headers=headers), args.repeat)
+                response.raise_for_status()
+                print(
+                    f"{name:45s} {seconds * 1000:8.1f} ms  memoria máx. {peak / 1024 / 1024:6.1f} MiB  "
+                    f"{len(response.content) / 1024:8.0f} KiB"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Benchmark de filtros y órdenes de las listas
+
+Carga N incidentes con estados, prioridades, asignados y fechas variados y
+pide la lista de incidentes con varias combinaciones de filtros y orden.
+Para cada una muestra si un índice la sirve (app/filters.py), el plan de
+SQLite (SEARCH/SCAN y si necesita ordenar con TEMP B-TREE), el estado de la
+respuesta y el tiempo. Las combinaciones sin índice que filtran más de
+LIST_UNINDEXED_MAX_ROWS filas se rechazan con 400 en lugar de ordenar la tabla.
+
+Uso:
+    python benchmarks/list_filters.py --rows 300000
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+QUERIES = (
+    "",
+    "status=open",
+    "assigned_to=7",
+    "priority=critical&created_at_from=2026-03-01&created_at_to=2026-03-31",
+    "sort=-occurred_at&occurred_at_from=2026-06-01",
+    "status=open&sort=occurred_at",
+    "status=open,in_progress",
+    "priority=critical&status=open",
+    "assigned_to=7&status=open&sort=occurred_at",
+)
+
+
+def seed(bind, rows: int, batch: int = 50000):
+    """Cargar `rows` incidentes repartidos a lo largo de un año y un usuario administrador"""
+    from sqlalchemy import insert
+    from app.auth import get_password_hash
+    from app.models.user import User, UserRole
+    from app.models.incident import Incident, IncidentType, IncidentPriority, IncidentStatus
+
+    start = datetime(2026, 1, 1)
+    rnd = random.Random(42)
+    with bind.begin() as conn:
+        conn.execute(insert(User).values(
+            username="bench", email="bench@example.com", full_name="Benchmark",
+            hashed_password=get_password_hash("bench"), role=UserRole.ADMIN, is_active=True,
+        ))
+        for first in range(0, rows, batch):
+            values = []
+            for i in range(first, min(first + batch, rows)):
+                created = start + timedelta(seconds=i * 365 * 86400 // rows)
+                values.append({
+                    "title": f"Incidente {i}",
+                    "description": "Benchmark",
+                    "incident_type": rnd.choice(list(IncidentType)),
+                    "priority": rnd.choice(list(IncidentPriority)),
+                    "status": rnd.choice(list(IncidentStatus)),
+                    "assigned_to": rnd.randint(1, 50),
+                    "reported_by": rnd.randint(1, 50),
+                    "occurred_at": created - timedelta(hours=rnd.randint(0, 72)),
+                    "detected_at": created,
+                    "created_at": created,
+                })
+            conn.execute(insert(Incident), values)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=300000, help="Incidentes a cargar")
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        # La aplicación lee la configuración al importarse
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+        os.environ.setdefault("SLOW_QUERY_THRESHOLD_MS", "0")
+        os.environ["CACHE_ENABLED"] = "False"
+        os.environ["ETAG_ENABLED"] = "False"
+        from fastapi.testclient import TestClient
+        from sqlalchemy.dialects import sqlite
+        from starlette.requests import Request
+        from app.filters import LIST_UNINDEXED_MAX_ROWS
+        from app.main import app
+        from app.migrate import migrate
+        from app.models.database import engine, SessionLocal
+        from app.pagination import PageParams, paginate
+        from app.routers.incidents import INCIDENT_FIELDS, INCIDENT_QUERY
+
+        migrate(engine)
+        start = time.perf_counter()
+        seed(engine, args.rows)
+        with engine.begin() as conn:
+            conn.exec_driver_sql("ANALYZE")
+        print(f"{args.rows:,} incidentes cargados en {time.perf_counter() - start:.1f} s "
+              f"(LIST_UNINDEXED_MAX_ROWS={LIST_UNINDEXED_MAX_ROWS})\n")
+
+        def plan(query_string: str, db) -> tuple:
+            """¿Lo sirve un índice? y plan de SQLite de la consulta de la página"""
+            request = Request({"type": "http", "query_string": query_string.encode(), "path_params": {}, "headers": []})
+            sort = request.query_params.get("sort")
+            parsed = INCIDENT_QUERY.parse(request, sort, db)
+            query = paginate(INCIDENT_FIELDS.select(None).where(*parsed.where), parsed.sort, PageParams(args.limit, 0, None), db)
+            sql = str(query.compile(dialect=sqlite.dialect(), compile_kwargs={"literal_binds": True}))
+            steps = db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").all()
+            return parsed.indexed, "; ".join(step[-1] for step in steps)
+
+        with TestClient(app) as client, SessionLocal() as db:
+            token = client.post("/api/auth/login", data={"username": "bench", "password": "bench"}).json()["access_token"]
+            headers = {"Authorization": f"Bearer {token}"}
+            for query_string in QUERIES:
+                indexed, steps = plan(query_string, db)
+                url = f"/api/incidents/?limit={args.limit}" + (f"&{query_string}" if query_string else "")
+                timings = []
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    response = client.get(url, headers=headers)
+                    timings.append((time.perf_counter() - started) * 1000)
+                print(f"?{query_string or '(sin filtros)'}")
+                print(f"  índice: {'sí' if indexed else 'no'}  -> {response.status_code} en {statistics.median(timings):.1f} ms")
+                print(f"  plan: {steps}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Benchmark de paginación profunda: offset frente a cursor
+
+Carga N incidentes en una SQLite temporal y pide la misma página a la
+profundidad indicada de dos formas:
+- offset: GET /api/incidents/?skip=<profundidad>&limit=<L> (modo heredado);
+  la base de datos recorre y descarta todas las filas anteriores
+- cursor: GET /api/incidents/?cursor=<...>&limit=<L>; el índice
+  (created_at, id) lleva directamente a la primera fila de la página
+Comprueba que ambas devuelven las mismas filas y muestra los planes de consulta.
+
+Uso:
+    python benchmarks/pagination.py --rows 1050000 --depth 1000000
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+
+def seed(bind, rows: int, batch: int = 50000):
+    """Cargar `rows` incidentes pequeños (por lotes) y un usuario administrador"""
+    from sqlalchemy import insert
+    from app.auth import get_password_hash
+    from app.models.user import User, UserRole
+    from app.models.incident import Incident, IncidentType, IncidentPriority, IncidentStatus
+
+    now = datetime.utcnow()
+    with bind.begin() as conn:
+        conn.execute(insert(User).values(
+            username="bench", email="bench@example.com", full_name="Benchmark",
+            hashed_password=get_password_hash("bench"), role=UserRole.ADMIN, is_active=True,
+        ))
+        for start in range(0, rows, batch):
+            conn.execute(insert(Incident), [
+                {
+                    "title": f"Incidente {i}",
+                    "description": "Benchmark",
+                    "incident_type": IncidentType.OTHER,
+                    "priority": IncidentPriority.LOW,
+                    "status": IncidentStatus.OPEN,
+                    "occurred_at": now,
+                    "detected_at": now,
+                    # Cada 10 filas comparten created_at: el id desempata
+                    "created_at": now - timedelta(seconds=i // 10),
+                } for i in range(start, min(start + batch, rows))
+            ])
+
+
+def timed(client, url: str, headers: dict, repeat: int):
+    """Mediana de tiempo (ms) y última respuesta"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(url, headers=headers)
+        timings.append((time.perf_counter() - start) * 1000)
+    response.raise_for_status()
+    return statistics.median(timings), response
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1050000, help="Incidentes a cargar")
+    parser.add_argument("--depth", type=int, default=1000000, help="Filas anteriores a la página pedida")
+    parser.add_argument("--limit", type=int, default=50, help="Filas por página")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    if args.depth + args.limit > args.rows:
+        parser.error("--depth + --limit no puede superar --rows")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        # La aplicación lee la configuración al importarse
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+        os.environ.setdefault("SLOW_QUERY_THRESHOLD_MS", "0")
+        os.environ["CACHE_ENABLED"] = "False"
+        os.environ["ETAG_ENABLED"] = "False"
+        from fastapi.testclient import TestClient
+        from sqlalchemy import select
+        from sqlalchemy.dialects import sqlite
+        from app.main import app
+        from app.migrate import migrate
+        from app.models.database import engine, SessionLocal
+        from app.models.incident import Incident
+        from app.pagination import PageParams, encode_cursor, paginate
+        from app.routers.incidents import INCIDENT_QUERY
+
+        migrate(engine)
+        start = time.perf_counter()
+        seed(engine, args.rows)
+        print(f"{args.rows:,} incidentes cargados en {time.perf_counter() - start:.1f} s")
+
+        INCIDENT_SORT = INCIDENT_QUERY.default_sort
+
+        # Cursor de la última fila antes de la página (como si se hubiera llegado paginando)
+        with SessionLocal() as db:
+            page = PageParams(limit=1, skip=args.depth - 1, cursor=None)
+            row = db.execute(paginate(select(Incident.id), INCIDENT_SORT, page, db)).first()
+            cursor = encode_cursor(INCIDENT_SORT, row.sort_key, row.id)
+            for name, page in (
+                ("offset", PageParams(args.limit, args.depth, None)),
+                ("cursor", PageParams(args.limit, 0, cursor)),
+            ):
+                query = paginate(select(Incident), INCIDENT_SORT, page, db)
+                sql = str(query.compile(dialect=sqlite.dialect(), compile_kwargs={"literal_binds": True}))
+                plan = db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").all()
+                print(f"plan {name}: " + "; ".join(step[-1] for step in plan))
+
+        with TestClient(app) as client:
+            token = client.post("/api/auth/login", data={"username": "bench", "password": "bench"}).json()["access_token"]
+            headers = {"Authorization": f"Bearer {token}"}
+            offset_ms, offset_response = timed(client, f"/api/incidents/?skip={args.depth}&limit={args.limit}", headers, args.repeat)
+            cursor_ms, cursor_response = timed(client, f"/api/incidents/?cursor={cursor}&limit={args.limit}", headers, args.repeat)
+            first_ms, _ = timed(client, f"/api/incidents/?limit={args.limit}", headers, args.repeat)
+
+    same = [item["id"] for item in offset_response.json()] == [item["id"] for item in cursor_response.json()]
+    print(f"\nPágina de {args.limit} filas a {args.depth:,} filas de profundidad (mediana de {args.repeat})")
+    print(f"primera página      {first_ms:9.1f} ms")
+    print(f"offset (skip)       {offset_ms:9.1f} ms")
+    print(f"cursor              {cursor_ms:9.1f} ms  ({offset_ms / cursor_ms:,.0f}x más rápido)")
+    print(f"mismas filas: {'sí' if same else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark de serialización de listas grandes
+
+Carga N incidentes como objetos ORM y compara, en el proceso, tres formas de
+convertirlos en el cuerpo JSON de la respuesta:
+- fastapi+json: la ruta de FastAPI con response_model (validar, volcar a
+  objetos JSON de Python y codificar con json de la biblioteca estándar)
+- fastapi+orjson: la misma ruta codificando con orjson (ORJSONResponse)
+- typeadapter: TypeAdapter cacheado que valida una vez y genera el JSON con
+  pydantic-core, por bloques de filas (app.serialization.dump_json_list)
+Para cada una mide filas por segundo y memoria máxima (tracemalloc). Después
+mide la petición completa GET /api/incidents/?limit=N.
+
+Uso:
+    python benchmarks/serialization.py --rows 10000 --repeat 5
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import statistics
+import tempfile
+import time
+import tracemalloc
+from typing import List
+
+from benchmarks.conditional_get import seed
+
+
+def measure(function, repeat: int):
+    """Mediana de tiempo (s) y memoria máxima (bytes) de una función"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = function()
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return statistics.median(timings), peak, body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000, help="Incidentes a serializar")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        # La aplicación lee la configuración al importarse
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+        os.environ.setdefault("SLOW_QUERY_THRESHOLD_MS", "0")
+        os.environ["CACHE_ENABLED"] = "False"
+        os.environ["ETAG_ENABLED"] = "False"
+        import orjson
+        from fastapi.testclient import TestClient
+        from pydantic import TypeAdapter
+        from sqlalchemy import select
+        from app.main import app
+        from app.migrate import migrate
+        from app.models.database import engine, SessionLocal
+        from app.models.incident import Incident
+        from app.schemas import Incident as IncidentSchema
+        from app.serialization import dump_json_list
+
+        migrate(engine)
+        seed(engine, args.rows)
+        with SessionLocal() as db:
+            rows = db.execute(select(Incident).limit(args.rows)).scalars().all()
+
+        adapter = TypeAdapter(List[IncidentSchema])
+
+        def fastapi_json():
+            content = adapter.dump_python(adapter.validate_python(rows, from_attributes=True), mode="json")
+            return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+        def fastapi_orjson():
+            content = adapter.dump_python(adapter.validate_python(rows, from_attributes=True), mode="json")
+            return orjson.dumps(content)
+
+        def type_adapter():
+            return dump_json_list(IncidentSchema, rows)
+
+        print(f"Serialización de {len(rows)} incidentes (mediana de {args.repeat} repeticiones)")
+        results = {}
+        for name, function in (("fastapi+json", fastapi_json), ("fastapi+orjson", fastapi_orjson), ("typeadapter", type_adapter)):
+            seconds, peak, body = measure(function, args.repeat)
+            results[name] = json.loads(body)
+            print(
+                f"{name:15s} {seconds * 1000:8.1f} ms  {len(rows) / seconds:10,.0f} filas/s  "
+                f"memoria máx. {peak / 1024 / 1024:7.1f} MiB  {len(body) / 1024:8.0f} KiB"
+            )
+        same = all(result == results["fastapi+json"] for result in results.values())
+        print(f"mismo contenido en las tres: {'sí' if same else 'NO'}")
+
+        with TestClient(app) as client:
+            token = client.post("/api/auth/login", data={"username": "bench", "password": "bench"}).json()["access_token"]
+            headers = {"Authorization": f"Bearer {token}"}
+            url = f"/api/incidents/?limit={args.rows}"
+            seconds, peak, response = measure(lambda: client.get(url, headers=headers), args.repeat)
+        print(
+            f"\nGET {url}: {seconds * 1000:.1f} ms  memoria máx. {peak / 1024 / 1024:.1f} MiB  "
+            f"{len(response.content) / 1024:.0f} KiB  ({response.headers['content-type']})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Benchmark de concurrencia lectura/escritura sobre SQLite
+
+Compara el perfil "default" (rollback journal) con el perfil "production"
+(WAL + PRAGMAs ajustados) ejecutando lectores tipo dashboard y escritores
+que registran incidentes de forma simultánea.
+
+Uso:
+    python benchmarks/sqlite_concurrency.py --readers 8 --writers 2 --seconds 5
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database import Base, create_db_engine
+from app.models import user, document, non_conformity, incident, audit, business_continuity, notification, kpi, change_control
+from app.models.incident import Incident, IncidentType, IncidentPriority, IncidentStatus
+
+
+def seed(Session, rows: int):
+    """Cargar incidentes iniciales"""
+    db = Session()
+    now = datetime.utcnow()
+    db.add_all([
+        Incident(
+            title=f"Incidente {i}",
+            description="Benchmark",
+            incident_type=IncidentType.OTHER,
+            priority=list(IncidentPriority)[i % 4],
+            status=list(IncidentStatus)[i % 5],
+            occurred_at=now,
+            detected_at=now,
+        ) for i in range(rows)
+    ])
+    db.commit()
+    db.close()
+
+
+def reader(Session, stop: threading.Event, counters: dict, lock: threading.Lock):
+    """Lector que simula las consultas del dashboard"""
+    ops = errors = 0
+    while not stop.is_set():
+        db = Session()
+        try:
+            db.query(Incident).count()
+            db.query(Incident).filter(Incident.status.in_(["open", "in_progress"])).count()
+            db.query(Incident).order_by(Incident.created_at.desc()).limit(5).all()
+            ops += 1
+        except OperationalError:
+            errors += 1
+        finally:
+            db.close()
+    with lock:
+        counters["reads"] += ops
+        counters["read_errors"] += errors
+
+
+def writer(Session, stop: threading.Event, counters: dict, lock: threading.Lock):
+    """Escritor que registra incidentes"""
+    ops = errors = 0
+    now = datetime.utcnow()
+    while not stop.is_set():
+        db = Session()
+        try:
+            db.add(Incident(
+                title="Nuevo incidente",
+                description="Benchmark",
+                incident_type=IncidentType.OTHER,
+                priority=IncidentPriority.MEDIUM,
+                occurred_at=now,
+                detected_at=now,
+            ))
+            db.commit()
+            ops += 1
+        except OperationalError:
+            db.rollback()
+            errors += 1
+        finally:
+            db.close()
+    with lock:
+        counters["writes"] += ops
+        counters["write_errors"] += errors
+
+
+def run_profile(profile: str, args) -> dict:
+    """Ejecutar el benchmark para un perfil de SQLite"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        url = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+        bind = create_db_engine(url, sqlite_profile=profile, pool_size=args.readers + args.writers)
+        Base.metadata.create_all(bind=bind)
+        Session = sessionmaker(bind=bind)
+        seed(Session, args.rows)
+
+        counters = {"reads": 0, "writes": 0, "read_errors": 0, "write_errors": 0}
+        lock = threading.Lock()
+        stop = threading.Event()
+        threads = [threading.Thread(target=reader, args=(Session, stop, counters, lock)) for _ in range(args.readers)]
+        threads += [threading.Thread(target=writer, args=(Session, stop, counters, lock)) for _ in range(args.writers)]
+
+        for t in threads:
+            t.start()
+        time.sleep(args.seconds)
+        stop.set()
+        for t in threads:
+            t.join()
+        bind.dispose()
+
+    counters["reads_per_s"] = round(counters["reads"] / args.seconds, 1)
+    counters["writes_per_s"] = round(counters["writes"] / args.seconds, 1)
+    return counters
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--rows", type=int, default=5000)
+    args = parser.parse_args()
+
+    print(f"Lectores: {args.readers}, escritores: {args.writers}, duración: {args.seconds}s, filas: {args.rows}")
+    for profile in ("default", "production"):
+        result = run_profile(profile, args)
+        print(
+            f"{profile:<12} lecturas/s={result['reads_per_s']:>8} escrituras/s={result['writes_per_s']:>8} "
+            f"errores lectura={result['read_errors']} errores escritura={result['write_errors']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -7,7 +7,8 @@ import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from sqlalchemy.orm import Session
-from app.models.database import SessionLocal, engine, Base
+from app.models.database import SessionLocal
+from app.migrate import migrate
 from app.models.user import User, UserRole
 from app.models.document import Document, DocumentType, DocumentStatus
 from app.models.incident import Incident, IncidentType, IncidentPriority, IncidentStatus
@@ -30,7 +31,7 @@ import random
 
 def create_tables():
     """Crear todas las tablas"""
-    Base.metadata.create_all(bind=engine)
+    migrate()
     print("✅ Tablas creadas correctamente")
 
 def create_users(db: Session):
@@ -0,0 +1,45 @@
+"""
+Configuración de las pruebas
+La aplicación lee la configuración al importarse: se fija aquí, antes de
+importar app, para usar una SQLite temporal sin caché ni ETags.
+"""
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TEST_DIR = tempfile.mkdtemp(prefix="sgcn-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(TEST_DIR, 'test.db')}"
+os.environ["CACHE_ENABLED"] = "False"
+os.environ["CACHE_BACKEND"] = "memory"
+os.environ["ETAG_ENABLED"] = "False"
+os.environ["SLOW_QUERY_THRESHOLD_MS"] = "0"
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def seeded_db():
+    """Base de datos con los datos de prueba de init_data (admin / admin)"""
+    import init_data
+    from app.models.database import engine
+    init_data.main()
+    yield engine
+    engine.dispose()
+    shutil.rmtree(TEST_DIR, ignore_errors=True)
+
+
+@pytest.fixture(scope="session")
+def client(seeded_db):
+    from fastapi.testclient import TestClient
+    from app.main import app
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture(scope="session")
+def admin_headers(client):
+    token = client.post("/api/auth/login", data={"username": "admin", "password": "admin"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
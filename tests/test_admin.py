@@ -0,0 +1,24 @@
+"""
+Endpoints de diagnóstico: solo admin; /health queda abierto para las sondas
+"""
+import pytest
+
+ADMIN_URLS = ("/api/admin/db", "/api/admin/cache", "/api/admin/slow-queries", "/api/admin/streams")
+
+
+def test_health_is_open(client):
+    assert client.get("/health").status_code == 200
+
+
+@pytest.mark.parametrize("url", ADMIN_URLS)
+def test_diagnostics_require_admin(client, admin_headers, url):
+    assert client.get(url).status_code in (401, 403)
+    token = client.post("/api/auth/login", data={"username": "operador1", "password": "operador"}).json()["access_token"]
+    assert client.get(url, headers={"Authorization": f"Bearer {token}"}).status_code == 403
+    assert client.get(url, headers=admin_headers).status_code == 200
+
+
+def test_database_stats(client, admin_headers):
+    status = client.get("/api/admin/db", headers=admin_headers).json()
+    assert status["dialect"] == "sqlite"
+    assert "async_pool" in status
@@ -0,0 +1,47 @@
+"""
+Caché de respuestas (app.cache.ResponseCache)
+Con un almacén bloqueante las consultas se ejecutan en hilos; los aciertos y
+fallos se cuentan en el bucle de eventos y cuadran con las consultas hechas.
+"""
+import asyncio
+from app.cache import ResponseCache
+from app.cache_backends import SQLiteBackend
+
+LOOKUPS = 200
+
+
+def test_hit_and_miss_counters_under_concurrency(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "cache.db"), max_entries=1000)
+    cache = ResponseCache(backend)
+    for key in range(0, LOOKUPS, 2):
+        backend.set(key, {"value": key}, ttl=60, tags=["incidents"])
+
+    async def scenario():
+        return await asyncio.gather(*(cache.get(key) for key in range(LOOKUPS)))
+
+    values = asyncio.run(scenario())
+    assert values == [{"value": key} if key % 2 == 0 else None for key in range(LOOKUPS)]
+    assert (cache.hits, cache.misses) == (LOOKUPS // 2, LOOKUPS // 2)
+    assert cache.stats()["hit_ratio"] == 0.5
+
+
+def test_get_or_compute_counts_once_per_lookup(tmp_path):
+    cache = ResponseCache(SQLiteBackend(str(tmp_path / "cache.db"), max_entries=1000))
+    computations = 0
+
+    async def compute():
+        nonlocal computations
+        computations += 1
+        await asyncio.sleep(0.01)
+        return {"total": 3}
+
+    async def scenario():
+        first = await asyncio.gather(*(cache.get_or_compute("stats", 60, ["incidents"], compute) for _ in range(20)))
+        second = await cache.get_or_compute("stats", 60, ["incidents"], compute)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first == [{"total": 3}] * 20 and second == {"total": 3}
+    assert computations == 1
+    assert (cache.hits, cache.misses) == (1, 20)
+    assert cache.coalesced == 19
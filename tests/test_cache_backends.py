@@ -0,0 +1,127 @@
+"""
+Almacenes de la caché de respuestas (app.cache_backends)
+Las mismas pruebas se ejecutan contra cada almacén: lectura y escritura,
+caducidad por TTL, invalidación por etiquetas (incluido el descarte de
+valores calculados antes de una invalidación) y, en los compartidos, la
+difusión de las invalidaciones a otro worker. Redis se sustituye por
+fakeredis, como en benchmarks/cache_workers.py.
+"""
+import threading
+import time
+import fakeredis
+import pytest
+from app.cache_backends import CacheBackend, MemoryBackend, SQLiteBackend, RedisBackend
+
+
+@pytest.fixture
+def make_backend(request, tmp_path):
+    """Fábrica de workers del almacén: todos los que crea comparten los datos"""
+    name = request.param
+    server = fakeredis.FakeServer()
+    backends = []
+
+    def make():
+        if name == "memory":
+            backend = MemoryBackend(max_entries=100)
+        elif name == "sqlite":
+            backend = SQLiteBackend(str(tmp_path / "cache.db"), max_entries=100, poll_interval=0.01)
+        else:
+            backend = RedisBackend("redis://fake", client=fakeredis.FakeRedis(server=server))
+        backends.append(backend)
+        return backend
+
+    yield make
+    for backend in backends:
+        backend.stop()
+
+
+ALL = pytest.mark.parametrize("make_backend", ["memory", "sqlite", "redis"], indirect=True)
+SHARED = pytest.mark.parametrize("make_backend", ["sqlite", "redis"], indirect=True)
+
+
+def wait_for(condition, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timeout"
+        time.sleep(0.01)
+
+
+def test_backend_is_abstract():
+    with pytest.raises(TypeError):
+        CacheBackend()
+
+
+@ALL
+def test_get_set(make_backend):
+    backend = make_backend()
+    assert backend.get(("incidents", 1)) is None
+    backend.set(("incidents", 1), {"items": [1, 2], "total": 2}, ttl=60, tags=["incidents"])
+    assert backend.get(("incidents", 1)) == {"items": [1, 2], "total": 2}
+    assert backend.get(("incidents", 2)) is None
+
+
+@ALL
+def test_ttl_expires(make_backend):
+    backend = make_backend()
+    backend.set("short", 1, ttl=0.05, tags=[])
+    backend.set("long", 2, ttl=60, tags=[])
+    assert backend.get("short") == 1
+    time.sleep(0.1)
+    assert backend.get("short") is None
+    assert backend.get("long") == 2
+
+
+@ALL
+def test_invalidate_tags(make_backend):
+    backend = make_backend()
+    backend.set("incidents", 1, ttl=60, tags=["incidents"])
+    backend.set("dashboard", 2, ttl=60, tags=["incidents", "kpis"])
+    backend.set("kpis", 3, ttl=60, tags=["kpis"])
+    assert backend.invalidate_tags(["incidents"]) == 2
+    assert backend.get("incidents") is None
+    assert backend.get("dashboard") is None
+    assert backend.get("kpis") == 3
+    assert backend.invalidations == 2
+
+
+@ALL
+def test_set_discarded_after_concurrent_invalidation(make_backend):
+    backend = make_backend()
+    generations = backend.generations(["incidents"])
+    # Una escritura invalida la etiqueta mientras se calculaba el valor
+    backend.invalidate_tags(["incidents"])
+    backend.set("stale", 1, ttl=60, tags=["incidents"], generations=generations)
+    assert backend.get("stale") is None
+    backend.set("fresh", 2, ttl=60, tags=["incidents"], generations=backend.generations(["incidents"]))
+    assert backend.get("fresh") == 2
+
+
+@SHARED
+def test_invalidation_visible_to_other_worker(make_backend):
+    first, second = make_backend(), make_backend()
+    first.set("incidents", 1, ttl=60, tags=["incidents"])
+    assert second.get("incidents") == 1
+    second.invalidate_tags(["incidents"])
+    assert first.get("incidents") is None
+
+
+@SHARED
+def test_publish_reaches_other_worker(make_backend):
+    writer, reader = make_backend(), make_backend()
+    received, own = [], []
+    arrived = threading.Event()
+
+    def on_invalidation(tables):
+        received.append(tables)
+        arrived.set()
+
+    reader.start(on_invalidation)
+    # El propio worker ignora sus invalidaciones difundidas
+    writer.start(own.append)
+    if isinstance(reader, RedisBackend):
+        wait_for(lambda: reader.client.pubsub_numsub(reader.channel)[0][1] == 2)
+    writer.publish({"incidents", "kpis"})
+    assert arrived.wait(5)
+    wait_for(lambda: reader.received == 1)
+    assert received == [{"incidents", "kpis"}]
+    assert own == [] and writer.received == 0
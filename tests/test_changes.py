@@ -0,0 +1,116 @@
+"""
+Sincronización incremental (GET /api/{entidad}/changes)
+Un cliente que guarda el token recibe después solo las altas, modificaciones
+y tombstones posteriores, una vez cada fila y en orden de commit; los tokens
+de PostgreSQL (txid.seq) se recorren en orden de transacción.
+"""
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import delete, insert
+from app.models.change_log import ChangeLogEntry
+from app.services.change_service import DELETE, UPSERT, format_token, parse_token
+
+KPI = {"name": "Disponibilidad", "kpi_type": "quality", "measurement_unit": "percentage", "target_value": 99.5}
+
+
+def sync(client, headers, path: str, token: str, limit: int = 500) -> tuple:
+    """Todas las páginas de cambios desde `token`: (nuevo token, cambios)"""
+    changes = []
+    while True:
+        response = client.get(f"{path}?since={token}&limit={limit}", headers=headers)
+        assert response.status_code == 200, response.text
+        body = response.json()
+        changes += body["changes"]
+        token = body["token"]
+        if not body["has_more"]:
+            return token, changes
+
+
+def test_changes_since_token(client, admin_headers):
+    token, initial = sync(client, admin_headers, "/api/kpis/changes", "")
+    assert initial and all(change["op"] == UPSERT for change in initial)
+    assert [change["seq"] for change in initial] == sorted(change["seq"] for change in initial)
+    # Sin cambios el token no avanza
+    assert sync(client, admin_headers, "/api/kpis/changes", token) == (token, [])
+
+    created = client.post("/api/kpis/", json=KPI, headers=admin_headers).json()
+    kept = client.post("/api/kpis/", json={**KPI, "name": "Cobertura"}, headers=admin_headers).json()
+    client.put(f"/api/kpis/{created['id']}", json={"target_value": 98.0}, headers=admin_headers)
+    client.put(f"/api/kpis/{kept['id']}", json={"target_value": 90.0}, headers=admin_headers)
+    client.put(f"/api/kpis/{kept['id']}", json={"target_value": 95.0}, headers=admin_headers)
+
+    # Páginas de un cambio: cada fila una sola vez, con su último estado
+    token, changes = sync(client, admin_headers, "/api/kpis/changes", token, limit=1)
+    assert [(change["id"], change["op"]) for change in changes] == [(created["id"], UPSERT), (kept["id"], UPSERT)]
+    assert changes[0]["data"]["target_value"] == 98.0
+    assert changes[1]["data"]["target_value"] == 95.0
+
+
+def test_deletes_become_tombstones(client, admin_headers):
+    kpi = client.post("/api/kpis/", json=KPI, headers=admin_headers).json()
+    measurement = {"kpi_id": kpi["id"], "measured_value": 99.9, "measurement_date": "2025-01-31T00:00:00"}
+    measurement_id = client.post(f"/api/kpis/{kpi['id']}/measurements", json=measurement, headers=admin_headers).json()["id"]
+    kpi_token, _ = sync(client, admin_headers, "/api/kpis/changes", "")
+    measurement_token, _ = sync(client, admin_headers, "/api/kpis/measurements/changes", "")
+
+    assert client.delete(f"/api/kpis/{kpi['id']}", headers=admin_headers).status_code == 200
+    _, changes = sync(client, admin_headers, "/api/kpis/changes", kpi_token)
+    assert changes == [{"seq": changes[0]["seq"], "op": DELETE, "id": kpi["id"]}]
+    # Las mediciones borradas en bloque también dejan tombstone
+    _, changes = sync(client, admin_headers, "/api/kpis/measurements/changes", measurement_token)
+    assert [(change["id"], change["op"]) for change in changes] == [(measurement_id, DELETE)]
+
+
+def test_business_continuity_plan_changes(client, admin_headers):
+    path = "/api/business-continuity/plans/changes"
+    token, initial = sync(client, admin_headers, path, "")
+    assert all(change["op"] == UPSERT for change in initial)
+
+    plan = {"title": "Plan de recuperación", "scope": "CPD principal", "recovery_time_objective": 4}
+    created = client.post("/api/business-continuity/plans/", json=plan, headers=admin_headers).json()
+    client.put(f"/api/business-continuity/plans/{created['id']}", json={"status": "active"}, headers=admin_headers)
+
+    token, changes = sync(client, admin_headers, path, token)
+    assert [(change["id"], change["op"]) for change in changes] == [(created["id"], UPSERT)]
+    # Mismos campos que el detalle del plan
+    detail = client.get(f"/api/business-continuity/plans/{created['id']}", headers=admin_headers).json()
+    data = changes[0]["data"]
+    assert set(data) == set(detail)
+    assert (data["status"], data["scope"], data["rto_hours"]) == ("active", "CPD principal", 4)
+    assert sync(client, admin_headers, path, token) == (token, [])
+
+
+def test_entries_follow_transaction_order(client, admin_headers, seeded_db):
+    """Una secuencia menor de una transacción posterior se entrega después del token"""
+    table = ChangeLogEntry.__table__
+    token, _ = sync(client, admin_headers, "/api/audits/changes", "")
+    after = parse_token(token)
+    entries = [
+        {"table_name": "audits", "row_id": 900001, "op": DELETE, "txid": 200},
+        {"table_name": "audits", "row_id": 900002, "op": DELETE, "txid": 100},
+    ]
+    with seeded_db.begin() as connection:
+        connection.execute(insert(table), entries)
+    try:
+        token, changes = sync(client, admin_headers, "/api/audits/changes", format_token(*after), limit=1)
+        assert [change["id"] for change in changes] == [900002, 900001]
+        assert changes[0]["seq"] > changes[1]["seq"]
+        assert token == f"200.{changes[1]['seq']}"
+        assert sync(client, admin_headers, "/api/audits/changes", token) == (token, [])
+    finally:
+        with seeded_db.begin() as connection:
+            connection.execute(delete(table).where(table.c.row_id.in_([900001, 900002])))
+
+
+@pytest.mark.parametrize("token, position", [("", (0, 0)), ("42", (0, 42)), ("17.42", (17, 42))])
+def test_parse_token(token, position):
+    assert parse_token(token) == position
+    if token:
+        assert format_token(*position) == token
+
+
+@pytest.mark.parametrize("token", ["abc", "-1", "1.2.3", "1.-2", "1."])
+def test_invalid_token(token):
+    with pytest.raises(HTTPException) as error:
+        parse_token(token)
+    assert error.value.status_code == 400
@@ -0,0 +1,115 @@
+"""
+Planes de las consultas de las listas y filtros de los routers
+Cada petición se ejecuta contra la aplicación y cada SELECT que emite se pasa
+por app.instrumentation.explain_statement: ninguna puede recorrer una tabla
+entera (SCAN <tabla> sin USING INDEX). Las exportaciones (/export) leen la
+tabla completa a propósito y no se comprueban.
+"""
+import re
+import pytest
+from sqlalchemy import event
+from app.filters import DateRangeFilter
+from app.instrumentation import explain_statement
+from app.models.database import Base, engine, async_engine
+from app.routers.incidents import INCIDENT_QUERY
+from app.routers.non_conformities import NON_CONFORMITY_QUERY
+from app.routers.documents import DOCUMENT_QUERY
+from app.routers.audits import AUDIT_QUERY
+from app.routers.kpis import KPI_QUERY, MEASUREMENT_QUERY
+
+LIST_QUERIES = (
+    ("/api/incidents/", INCIDENT_QUERY),
+    ("/api/non-conformities/", NON_CONFORMITY_QUERY),
+    ("/api/documents/", DOCUMENT_QUERY),
+    ("/api/audits/", AUDIT_QUERY),
+    ("/api/kpis/", KPI_QUERY),
+    ("/api/kpis/1/measurements", MEASUREMENT_QUERY),
+)
+
+OTHER_URLS = (
+    "/api/incidents/stats/summary",
+    "/api/non-conformities/stats/summary",
+    "/api/audits/stats/summary",
+    "/api/kpis/stats/summary",
+    "/api/kpis/1/dashboard",
+    "/api/business-continuity/plans/",
+    "/api/business-continuity/simulations/",
+    "/api/business-continuity/simulations/?status_filter=planned",
+    "/api/business-continuity/stats/summary",
+    "/api/dashboard/stats",
+    "/api/dashboard/alerts",
+    "/api/dashboard/trends",
+    "/api/notifications/",
+    "/api/notifications/?unread_only=true",
+    "/api/notifications/stats",
+    "/api/incidents/changes",
+    "/api/kpis/measurements/changes",
+    "/api/business-continuity/plans/changes",
+    "/api/business-continuity/simulations/changes",
+)
+
+TABLES = set(Base.metadata.tables)
+SCAN = re.compile(r"^SCAN (\w+)")
+
+
+def sample_value(spec) -> str:
+    """Un valor válido para un filtro de valores"""
+    convert = spec.convert
+    if isinstance(convert, type) and hasattr(convert, "__members__"):
+        return next(iter(convert)).value
+    return "1"
+
+
+def list_urls(path: str, list_query) -> list:
+    """La lista sin parámetros, con cada filtro y con cada orden"""
+    urls = [path]
+    for name, spec in list_query.filters.items():
+        if isinstance(spec, DateRangeFilter):
+            urls.append(f"{path}?{name}_from=2024-01-01&{name}_to=2030-12-31")
+        else:
+            urls.append(f"{path}?{name}={sample_value(spec)}")
+    urls.extend(f"{path}?sort={sort}" for sort in list_query.sort_keys)
+    return urls
+
+
+URLS = [url for path, list_query in LIST_QUERIES for url in list_urls(path, list_query)] + list(OTHER_URLS)
+
+
+@pytest.fixture(scope="module")
+def captured_plans(seeded_db):
+    """Registrar el plan de cada SELECT ejecutado mientras dura la prueba"""
+    plans = []
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if conn.info.get("explaining") or executemany or conn.dialect.name != "sqlite":
+            return
+        plan = explain_statement(conn, statement, parameters)
+        if plan is not None and statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            plans.append((statement, plan))
+
+    binds = (engine, async_engine.sync_engine)
+    for bind in binds:
+        event.listen(bind, "after_cursor_execute", after_cursor_execute)
+    yield plans
+    for bind in binds:
+        event.remove(bind, "after_cursor_execute", after_cursor_execute)
+
+
+def full_scans(plan: list) -> list:
+    """Pasos del plan que recorren una tabla sin índice"""
+    scans = []
+    for step in plan:
+        match = SCAN.match(step)
+        if match and match.group(1) in TABLES and "USING" not in step:
+            scans.append(step)
+    return scans
+
+
+@pytest.mark.parametrize("url", URLS)
+def test_router_query_uses_index(client, admin_headers, captured_plans, url):
+    captured_plans.clear()
+    response = client.get(url, headers=admin_headers)
+    assert response.status_code == 200, response.text
+    assert captured_plans, f"{url} no ejecutó ninguna consulta"
+    failures = [(statement, scans) for statement, plan in captured_plans if (scans := full_scans(plan))]
+    assert not failures, f"{url} recorre tablas completas: {failures}"
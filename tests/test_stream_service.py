@@ -0,0 +1,99 @@
+"""
+Difusión del stream del dashboard (app.services.stream_service.Broadcaster)
+Cientos de suscriptores comparten un único cálculo: cada uno recibe el
+snapshot y, tras una ráfaga de escrituras, exactamente un delta agrupado;
+las colas de los suscriptores lentos no crecen por encima de su límite.
+"""
+import asyncio
+import copy
+import json
+from app.services.stream_service import Broadcaster
+
+SUBSCRIBERS = 200
+QUEUE_SIZE = 8
+DEBOUNCE = 0.05
+
+
+def decode_event(event: bytes) -> tuple:
+    """(tipo, datos) de un evento SSE"""
+    fields = dict(line.split(": ", 1) for line in event.decode().strip().split("\n"))
+    return fields["event"], json.loads(fields["data"])
+
+
+class FakeState:
+    """Estado del dashboard que se puede cambiar desde la prueba"""
+
+    def __init__(self):
+        self.state = {"stats": {"open_incidents": 3, "pending_documents": 1}, "alerts": {"total_alerts": 0}}
+        self.computations = 0
+
+    async def compute(self, db) -> dict:
+        self.computations += 1
+        return copy.deepcopy(self.state)
+
+
+async def wait_for(condition, timeout: float = 5):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timeout"
+        await asyncio.sleep(0.01)
+
+
+def test_burst_fans_out_one_coalesced_delta():
+    async def scenario():
+        fake = FakeState()
+        broadcaster = Broadcaster(fake.compute, {"incidents"}, interval=60, debounce=DEBOUNCE, queue_size=QUEUE_SIZE)
+        queues = await asyncio.gather(*(broadcaster.subscribe() for _ in range(SUBSCRIBERS)))
+        # Los suscriptores simultáneos esperan el mismo cálculo
+        assert fake.computations == 1
+        assert len(broadcaster.subscribers) == SUBSCRIBERS
+
+        # Ráfaga de escrituras: un único recálculo y un único delta
+        fake.state["stats"]["open_incidents"] = 4
+        fake.state["alerts"]["total_alerts"] = 1
+        for _ in range(50):
+            broadcaster.mark_dirty({"incidents"})
+        broadcaster.mark_dirty({"users"})  # tabla ajena: no provoca recálculo
+        await wait_for(lambda: fake.computations == 2)
+        await asyncio.sleep(DEBOUNCE * 4)
+        assert fake.computations == 2
+
+        for queue in queues:
+            assert queue.qsize() == 2
+            kind, snapshot = decode_event(queue.get_nowait())
+            assert kind == "snapshot"
+            assert snapshot["stats"] == {"open_incidents": 3, "pending_documents": 1}
+            kind, delta = decode_event(queue.get_nowait())
+            assert kind == "delta"
+            assert delta["stats"] == {"open_incidents": 4}
+            assert delta["alerts"] == {"total_alerts": 1}
+            assert queue.empty()
+
+        for queue in queues:
+            broadcaster.unsubscribe(queue)
+        assert broadcaster.stats()["running"] is False
+
+    asyncio.run(scenario())
+
+
+def test_slow_subscriber_queue_is_bounded():
+    async def scenario():
+        fake = FakeState()
+        broadcaster = Broadcaster(fake.compute, {"incidents"}, interval=60, debounce=0, queue_size=QUEUE_SIZE)
+        slow = await broadcaster.subscribe()
+        for value in range(QUEUE_SIZE * 3):
+            fake.state["stats"]["open_incidents"] = value + 10
+            await broadcaster.refresh()
+            assert slow.qsize() <= QUEUE_SIZE
+        assert broadcaster.resyncs > 0
+        # Tras descartar lo pendiente recibe el estado completo, no deltas sueltos
+        events = [decode_event(slow.get_nowait()) for _ in range(slow.qsize())]
+        assert events[0][0] == "snapshot"
+        last_state = {**events[0][1]["stats"]}
+        for kind, data in events[1:]:
+            assert kind == "delta"
+            last_state.update(data["stats"])
+        assert last_state["open_incidents"] == QUEUE_SIZE * 3 + 9
+        broadcaster.unsubscribe(slow)
+
+    asyncio.run(scenario())